@@ -39,6 +39,48 @@ _ENV_VAR_PATTERN = re.compile("\\$\\{([a-zA-Z0-9_]+)\\}")
 logging.getLogger("venv").setLevel(logging.ERROR)
 
 
+# Per-process memoization of git root folders and parent project loaders
+_GIT_ROOTS = {}
+_LOADERS = {}
+
+
+def find_git_root(path: Path) -> Union[Path, None]:
+    """
+    Find git working tree root folder for provided path, walking up the file system.
+    Recognizes **.git** folders, **.git** files (worktrees, submodules) and **GIT_DIR**/**GIT_WORK_TREE** environment variables;
+    git is only invoked for unknown layouts.
+
+    :param path: Path to start from
+    :return: Git root folder path, or None if not in a git working tree
+    """
+
+    # Already known?
+    path = path.resolve()
+    if path in _GIT_ROOTS:
+        return _GIT_ROOTS[path]
+
+    # Explicit git folder: git uses provided work tree, or current folder
+    out = None
+    if os.getenv("GIT_DIR"):
+        work_tree = Path(os.getenv("GIT_WORK_TREE", str(path))).resolve()
+        out = work_tree if work_tree == path or work_tree in path.parents else None
+    else:
+        # Walk up
+        for candidate in [path] + list(path.parents):
+            dot_git = candidate / ".git"
+            if (dot_git / "HEAD").is_file() or (dot_git.is_file() and dot_git.read_text(errors="ignore").startswith("gitdir:")):
+                out = candidate
+                break
+            if dot_git.exists():
+                # Unknown layout: ask git
+                cp = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, cwd=path, check=False)
+                out = Path(cp.stdout.decode().splitlines()[0].strip()) if cp.returncode == 0 and cp.stdout.strip() else None
+                break
+
+    _GIT_ROOTS[path] = out
+    return out
+
+
 def to_linux_path(path: Path) -> str:
     """
     Turn provided path to a Linux style path.
@@ -194,12 +236,13 @@ class BuildEnvLoader:
         current_path = self.project_path
         go_on = True
         while self.look_up and go_on:
-            # Ask git
-            cp = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, cwd=current_path, check=False)
-            if cp.returncode == 0:
-                # Git root folder found: check for venv
-                candidate_path = Path(cp.stdout.decode().splitlines()[0].strip())
-                candidate_loader = BuildEnvLoader(candidate_path)
+            # Look for git root folder
+            candidate_path = find_git_root(current_path)
+            if candidate_path is not None:
+                # Git root folder found: check for venv (config file is read only once per candidate)
+                if candidate_path not in _LOADERS:
+                    _LOADERS[candidate_path] = self if candidate_path == self.project_path.resolve() else BuildEnvLoader(candidate_path)
+                candidate_loader = _LOADERS[candidate_path]
                 if (candidate_loader.venv_path / VENV_OK).is_file():
                     # Venv found!
                     return candidate_loader.venv_path
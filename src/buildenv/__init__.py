@@ -4,9 +4,9 @@ Python main module for **buildenv** tool.
 
 from importlib.metadata import version
 
-from .extension import BuildEnvExtension, BuildEnvInfo, BuildEnvProjectTemplate, BuildEnvRenderer
+from .extension import BuildEnvEnvironment, BuildEnvExtension, BuildEnvInfo, BuildEnvInputs, BuildEnvProjectTemplate, BuildEnvRenderer, BuildEnvRenderItem
 
-__all__ = ["BuildEnvExtension", "BuildEnvInfo", "BuildEnvProjectTemplate", "BuildEnvRenderer"]
+__all__ = ["BuildEnvEnvironment", "BuildEnvExtension", "BuildEnvInfo", "BuildEnvInputs", "BuildEnvProjectTemplate", "BuildEnvRenderer", "BuildEnvRenderItem"]
 
 __title__ = "buildenv"
 try:
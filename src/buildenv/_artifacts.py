@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from ._utils import LOGGER_NAME, cache_dir
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Supported distribution artifacts extensions
+_WHEEL_SUFFIX = ".whl"
+_SDIST_SUFFIXES = (".tar.gz", ".zip")
+
+# Digests cache file name (in buildenv cache folder)
+_DIGESTS_CACHE = "digests.json"
+
+# Read buffer size for hashing
+_CHUNK_SIZE = 1024 * 1024
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize distribution name, as specified by PEP 503
+
+    :param name: distribution name
+    :return: normalized name
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_artifact_name(file_name: str) -> tuple[str, str] | None:
+    """
+    Parse distribution name and version from an artifact file name (wheel or sdist)
+
+    :param file_name: artifact file name
+    :return: tuple of normalized distribution name and version, or None if not a distribution artifact
+    """
+
+    # Wheel: {name}-{version}(-{build})?-{python}-{abi}-{platform}.whl
+    if file_name.endswith(_WHEEL_SUFFIX):
+        parts = file_name.removesuffix(_WHEEL_SUFFIX).split("-")
+        return (normalize_name(parts[0]), parts[1]) if len(parts) >= 5 else None
+
+    # Sdist: {name}-{version}.tar.gz (or .zip)
+    for suffix in _SDIST_SUFFIXES:
+        if file_name.endswith(suffix):
+            parts = file_name.removesuffix(suffix).rsplit("-", 1)
+            return (normalize_name(parts[0]), parts[1]) if len(parts) == 2 else None
+    return None
+
+
+class ArtifactsIndex:
+    """
+    Index of distribution artifacts found in a set of folders (walked only once)
+
+    :param folders: folders to be walked (recursively) for artifacts
+    """
+
+    def __init__(self, folders: list[Path]):
+        self._artifacts: dict[tuple[str, str], list[Path]] = {}
+        for folder in folders:
+            _LOGGER.debug(f"Indexing artifacts from {folder}")
+            for root, _, files in os.walk(folder):
+                for file_name in files:
+                    parsed = parse_artifact_name(file_name)
+                    if parsed is not None:
+                        self._artifacts.setdefault(parsed, []).append(Path(root) / file_name)
+
+    def find(self, name: str, version: str) -> list[Path]:
+        """
+        Find artifacts for given distribution
+
+        :param name: distribution name
+        :param version: distribution version
+        :return: list of artifacts paths (sorted by file name, possibly empty)
+        """
+        return sorted(self._artifacts.get((normalize_name(name), version), []), key=lambda p: p.name)
+
+
+def _sha256(path: Path) -> str:
+    # Hash file content by chunks
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_artifacts(artifacts: list[Path]) -> dict[Path, str]:
+    """
+    Compute sha256 digests of provided artifacts, in parallel processes.
+    Digests are cached (in buildenv cache folder), and reused as long as artifacts size and modification time are unchanged.
+
+    :param artifacts: list of artifacts to hash
+    :return: map of artifacts digests (hex format), indexed by artifact path
+    """
+
+    # Load cached digests
+    cache_file = cache_dir() / _DIGESTS_CACHE
+    try:
+        cache: dict[str, list[str | int]] = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        cache = {}
+
+    # Filter artifacts which digest is still valid
+    out: dict[Path, str] = {}
+    to_hash: list[Path] = []
+    for artifact in artifacts:
+        st = artifact.stat()
+        cached = cache.get(str(artifact))
+        if cached is not None and cached[:2] == [st.st_size, st.st_mtime_ns]:
+            out[artifact] = str(cached[2])
+        else:
+            to_hash.append(artifact)
+
+    # Hash remaining ones (spread over a process pool if more than one)
+    if to_hash:
+        _LOGGER.debug(f"Computing digests for {len(to_hash)} artifact(s) ({len(out)} reused from cache)")
+        if len(to_hash) > 1:
+            with ProcessPoolExecutor() as pool:
+                digests = list(pool.map(_sha256, to_hash))
+        else:
+            digests = [_sha256(to_hash[0])]
+        for artifact, digest in zip(to_hash, digests, strict=True):
+            st = artifact.stat()
+            cache[str(artifact)] = [st.st_size, st.st_mtime_ns, digest]
+            out[artifact] = digest
+
+        # Persist cache
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(cache))
+
+    return out
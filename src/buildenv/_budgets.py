@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from ._utils import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+BUDGETS_ENV_VAR = "BUILDENV_EXT_BUDGETS"
+"""Environment variable holding extensions hooks time budgets"""
+
+HOOKS = {"init": "init", "completion": "completion commands", "environment": "environment", "scripts": "activation scripts"}
+"""Map of extensions hooks labels, indexed by hook short name (as used in budgets specification)"""
+
+# Timings history file name (in project state folder), and number of durations kept per extension hook
+_TIMINGS_FILE = ".buildenv_timings.json"
+_HISTORY_SIZE = 20
+
+
+@dataclass
+class Budget:
+    """
+    Time budget for an extension hook (in seconds)
+    """
+
+    soft: float | None = None
+    """Duration above which a warning is logged"""
+
+    hard: float | None = None
+    """Duration above which the hook call is aborted"""
+
+    def __str__(self) -> str:
+        return "/".join("-" if b is None else f"{b:g}s" for b in (self.soft, self.hard))
+
+
+def _parse_duration(value: str, entry: str) -> float | None:
+    if not value:
+        return None
+    try:
+        duration = float(value)
+    except ValueError:
+        duration = -1.0
+    assert duration > 0, f"Invalid duration in {BUDGETS_ENV_VAR} entry: {entry}"
+    return duration
+
+
+class ExtensionsBudgets:
+    """
+    Extensions hooks time budgets, parsed from a comma-separated list of **[extension.]hook=soft[:hard]** entries (durations in seconds), where
+    hook is one of **init**, **completion**, **environment** or **scripts**. An entry without extension name applies to all extensions;
+    extension specific entries take precedence.
+
+    :param spec: budgets specification (default: read from **BUILDENV_EXT_BUDGETS** environment variable)
+    """
+
+    def __init__(self, spec: str | None = None):
+        self._budgets: dict[tuple[str, str], Budget] = {}
+        for entry in filter(None, map(str.strip, (spec if spec is not None else os.getenv(BUDGETS_ENV_VAR, "")).split(","))):
+            # Split entry parts
+            key, sep, durations = entry.partition("=")
+            name, _, hook = key.strip().rpartition(".")
+            assert sep and hook in HOOKS, f"Invalid {BUDGETS_ENV_VAR} entry (expected [extension.]hook=soft[:hard], with hook in {'/'.join(HOOKS)}): {entry}"
+            soft, _, hard = durations.strip().partition(":")
+            budget = Budget(_parse_duration(soft, entry), _parse_duration(hard, entry))
+            assert budget.soft is None or budget.hard is None or budget.soft <= budget.hard, f"Soft budget exceeds hard one in {BUDGETS_ENV_VAR} entry: {entry}"
+            self._budgets[(name, HOOKS[hook])] = budget
+
+    def get(self, name: str, label: str) -> Budget:
+        """
+        Get time budget for an extension hook
+
+        :param name: extension name
+        :param label: hook label
+        :return: extension hook budget (with no limits if not configured)
+        """
+        return self._budgets.get((name, label), self._budgets.get(("", label), Budget()))
+
+
+class ExtensionsTimings:
+    """
+    Persistent extensions hooks timings history, stored in the project state folder of the venv
+
+    :param state_folder: project state folder
+    """
+
+    def __init__(self, state_folder: Path):
+        self._path = state_folder / _TIMINGS_FILE
+        try:
+            self._timings: dict[str, dict[str, list[float]]] = json.loads(self._path.read_text())
+        except (OSError, ValueError):
+            self._timings = {}
+        self._dirty = False
+
+    def record(self, name: str, label: str, duration: float):
+        """
+        Record an extension hook call duration
+
+        :param name: extension name
+        :param label: hook label
+        :param duration: call duration (in seconds)
+        """
+        history = self._timings.setdefault(name, {}).setdefault(label, [])
+        history.append(round(duration, 6))
+        del history[:-_HISTORY_SIZE]
+        self._dirty = True
+
+    def history(self, name: str) -> dict[str, list[float]]:
+        """
+        Get recorded durations for an extension
+
+        :param name: extension name
+        :return: map of recorded durations (oldest first), indexed by hook label
+        """
+        return self._timings.get(name, {})
+
+    def save(self):
+        """
+        Persist timings history (if modified)
+        """
+        if self._dirty:
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                self._path.write_text(json.dumps(self._timings, indent=4, sort_keys=True))
+            except OSError as e:  # pragma: no cover
+                _LOGGER.warning(f"Failed to save extensions timings: {e}")
+            self._dirty = False
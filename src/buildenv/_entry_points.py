@@ -1,28 +1,77 @@
+import hashlib
 import importlib.metadata
+import json
+import logging
+from dataclasses import asdict, dataclass
 from typing import TypeVar
 
+from ._utils import LOGGER_NAME, cache_dir
 from .extension import BuildEnvEntryPoint, BuildEnvExtension, BuildEnvInfo, BuildEnvProjectTemplate
 
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
 # Buildenv extension entry point name
 _BUILDENV_EXT = "buildenv_extension"
 
 # Buildenv project template entry point name
 _BUILDENV_TEMPLATE = "buildenv_template"
 
+# Project templates manifests cache folder (in buildenv cache folder)
+_TEMPLATES_CACHE = "templates"
+
 # Type var for generic entry point loading
 _EntryPointClass = TypeVar("_EntryPointClass", bound=BuildEnvEntryPoint)
 
 
-# Entry points parser
-def parse_entrypoints(group_name: str, info: BuildEnvInfo, sample_instance: _EntryPointClass, with_name: bool = False) -> dict[str, _EntryPointClass]:
-    # Build entry points map (to handle duplicate names)
+@dataclass
+class ProjectTemplateManifest:
+    """
+    Project template metadata, usable without importing the template class
+    """
+
+    name: str
+    """Template name"""
+
+    description: str
+    """Template description"""
+
+    weight: int
+    """Template weight"""
+
+    auto_extra: bool
+    """Default extra template flag"""
+
+
+# Entry points map for a group (to handle duplicate names)
+def _entry_points(group_name: str) -> dict[str, importlib.metadata.EntryPoint]:
     unfiltered_entry_points: importlib.metadata.EntryPoints = importlib.metadata.entry_points(group=group_name)
     all_entry_points: dict[str, importlib.metadata.EntryPoint] = {}
     for p in unfiltered_entry_points:
         all_entry_points[p.name] = p
+    return all_entry_points
+
 
+# Fingerprint of entry points definitions, and of their distributions versions (None if some entry point distribution is unknown)
+def _entry_points_fingerprint(points: dict[str, importlib.metadata.EntryPoint]) -> str | None:
+    h = hashlib.sha256()
+    for name, point in points.items():
+        dist = getattr(point, "dist", None)
+        if dist is None:
+            return None
+        h.update(f"{name}={getattr(point, 'value', '')}@{dist.name}=={dist.version}\n".encode())
+    return h.hexdigest()
+
+
+# Entry points parser
+def parse_entrypoints(
+    group_name: str, info: BuildEnvInfo, sample_instance: _EntryPointClass, with_name: bool = False, names: set[str] | None = None
+) -> dict[str, _EntryPointClass]:
     out: dict[str, _EntryPointClass] = {}
-    for name, point in all_entry_points.items():
+    for name, point in _entry_points(group_name).items():
+        # Filtered out?
+        if names is not None and name not in names:
+            continue
+
         # Instantiate extension
         try:
             # Check type
@@ -47,6 +96,30 @@ def parse_extensions(info: BuildEnvInfo) -> dict[str, BuildEnvExtension]:
     return parse_entrypoints(_BUILDENV_EXT, info, BuildEnvExtension(info))
 
 
-# Iterate on entry points to load project templates
-def parse_project_templates(info: BuildEnvInfo) -> dict[str, BuildEnvProjectTemplate]:
-    return parse_entrypoints(_BUILDENV_TEMPLATE, info, BuildEnvProjectTemplate(info, name=""), with_name=True)
+# Iterate on entry points to load project templates (all of them, or only the specified ones)
+def parse_project_templates(info: BuildEnvInfo, names: set[str] | None = None) -> dict[str, BuildEnvProjectTemplate]:
+    return parse_entrypoints(_BUILDENV_TEMPLATE, info, BuildEnvProjectTemplate(info, name=""), with_name=True, names=names)
+
+
+# Get project templates manifests, from cache if entry points are unchanged (templates are loaded only on cache miss)
+def parse_project_templates_manifests(info: BuildEnvInfo) -> dict[str, ProjectTemplateManifest]:
+    # Look for cached manifests (shared by all projects, as templates metadata is static)
+    fingerprint = _entry_points_fingerprint(_entry_points(_BUILDENV_TEMPLATE))
+    cache_file = cache_dir() / _TEMPLATES_CACHE / f"{fingerprint}.json" if fingerprint is not None else None
+    if cache_file is not None and cache_file.is_file():
+        try:
+            return {name: ProjectTemplateManifest(**m) for name, m in json.loads(cache_file.read_text()).items()}
+        except (OSError, ValueError, TypeError) as e:  # pragma: no cover
+            _LOGGER.debug(f"Ignoring invalid project templates cache: {e}")
+
+    # Load all templates to build manifests (cache is not persisted if any of them fails to load)
+    manifests = {name: ProjectTemplateManifest(t.name, t.description, t.weight, t.auto_extra) for name, t in parse_project_templates(info).items()}
+
+    # Persist cache
+    if cache_file is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(json.dumps({name: asdict(m) for name, m in manifests.items()}, indent=4))
+        except OSError as e:  # pragma: no cover
+            _LOGGER.warning(f"Failed to save project templates cache: {e}")
+    return manifests
@@ -0,0 +1,157 @@
+"""
+Advisory lock on a build environment, shared by buildenv processes working on the same project (loader scripts, and python backend).
+
+The lock is a folder next to the venv (named after it, with a **.mutex** suffix), atomically created by its owner, and holding an **owner** file
+with the owner process ID. Waiters poll it, logging their progress. A lock is considered as stale (and taken over) when its owner process is gone,
+or when its owner process can't be checked and the lock is older than **BUILDENV_LOCK_TIMEOUT** seconds.
+
+The lock is re-entrant: it is considered as already held by its owner process, and by the owner child processes (through the
+**BUILDENV_LOCK_OWNER** environment variable, set by the owner while holding the lock).
+"""
+
+import contextlib
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from types import TracebackType
+
+import psutil
+
+from ._utils import LOGGER_NAME
+
+LOCK_SUFFIX = ".mutex"
+"""Lock folder name suffix"""
+
+LOCK_OWNER_ENV_VAR = "BUILDENV_LOCK_OWNER"
+"""Environment variable holding the lock owner process ID (set by the owner, for its child processes)"""
+
+LOCK_TIMEOUT_ENV_VAR = "BUILDENV_LOCK_TIMEOUT"
+"""Environment variable holding the age (in seconds) after which a lock with an unchecked owner is considered as stale"""
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Defaults
+_DEFAULT_TIMEOUT = 900  # seconds
+_POLL_DELAY = 0.5  # seconds
+_PROGRESS_DELAY = 10  # seconds
+
+# Lock folder content
+_OWNER_FILE = "owner"
+
+
+def lock_folder(venv: Path) -> Path:
+    """
+    Get lock folder for a venv
+
+    :param venv: venv folder (may not exist yet)
+    :return: lock folder (next to the venv)
+    """
+    return venv.with_name(f"{venv.name}{LOCK_SUFFIX}")
+
+
+class EnvLock:
+    """
+    Advisory lock on a build environment, to be used as a context manager
+
+    :param venv: venv folder (may not exist yet)
+    :param logger: logger for waiting progress messages (default: buildenv logger)
+    """
+
+    def __init__(self, venv: Path, logger: logging.Logger | None = None):
+        self.folder = lock_folder(venv)
+        self.waited = False
+        self._logger = logger if logger else _LOGGER
+        self._owned = False
+        self._previous_owner: str | None = None
+
+    def _owner(self) -> str | None:
+        # Read owner process ID (if known yet)
+        try:
+            return (self.folder / _OWNER_FILE).read_text().strip() or None
+        except OSError:
+            return None
+
+    def _stale_reason(self, owner: str | None) -> str | None:
+        # Owner process is gone? (can't be checked on Windows, where git-bash loader scripts don't write native process IDs)
+        if owner is not None and owner.isdigit() and os.name != "nt":
+            return None if psutil.pid_exists(int(owner)) else f"owner process {owner} is gone"
+
+        # Otherwise, check lock age
+        try:
+            age = time.time() - self.folder.stat().st_mtime
+        except OSError:
+            return None
+        timeout = int(os.getenv(LOCK_TIMEOUT_ENV_VAR, str(_DEFAULT_TIMEOUT)))
+        return f"older than {timeout}s" if age > timeout else None
+
+    def _break(self, owner: str | None):
+        # Rename stale lock before removing it, so that a lock concurrently taken over by another waiter is left untouched
+        stale = self.folder.with_name(f"{self.folder.name}.stale-{os.getpid()}")
+        with contextlib.suppress(OSError):
+            self.folder.rename(stale)
+            if (stale / _OWNER_FILE).is_file() and (stale / _OWNER_FILE).read_text().strip() != (owner or ""):
+                stale.rename(self.folder)
+        shutil.rmtree(stale, ignore_errors=True)
+
+    def acquire(self):
+        """
+        Acquire the lock, waiting for other processes holding it (unless already held by this process, or by one of its parents)
+        """
+
+        me = str(os.getpid())
+        start = last_progress = time.monotonic()
+        while True:
+            try:
+                self.folder.mkdir()
+            except FileExistsError:
+                # Already held by this process, or by a parent one?
+                owner = self._owner()
+                if owner is not None and owner in (me, os.getenv(LOCK_OWNER_ENV_VAR)):
+                    return
+
+                # Stale lock?
+                reason = self._stale_reason(owner)
+                if reason is not None:
+                    self._logger.warning(f"Take over stale {self.folder.name} lock ({reason})")
+                    self._break(owner)
+                    continue
+
+                # Wait for owner, logging progress
+                now = time.monotonic()
+                if not self.waited or now - last_progress >= _PROGRESS_DELAY:
+                    self._logger.info(
+                        f"Waiting for another buildenv process (pid {owner or 'unknown'}) working on this environment..."
+                        + (f" ({int(now - start)}s)" if self.waited else "")
+                    )
+                    last_progress = now
+                self.waited = True
+                time.sleep(_POLL_DELAY)
+                continue
+
+            # Lock is ours: remember it for child processes
+            (self.folder / _OWNER_FILE).write_text(me)
+            self._owned = True
+            self._previous_owner = os.environ.get(LOCK_OWNER_ENV_VAR)
+            os.environ[LOCK_OWNER_ENV_VAR] = me
+            return
+
+    def release(self):
+        """
+        Release the lock (if owned)
+        """
+        if self._owned:
+            if self._previous_owner is None:
+                os.environ.pop(LOCK_OWNER_ENV_VAR, None)
+            else:
+                os.environ[LOCK_OWNER_ENV_VAR] = self._previous_owner
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self._owned = False
+
+    def __enter__(self) -> "EnvLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc_value: BaseException | None, traceback: TracebackType | None):
+        self.release()
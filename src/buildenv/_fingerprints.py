@@ -0,0 +1,130 @@
+import functools
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+from pathlib import Path
+
+from ._utils import LOGGER_NAME
+from .extension import BuildEnvExtension
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Fingerprints file name (in project state folder)
+_FINGERPRINTS_FILE = ".buildenv_extensions.json"
+
+
+@functools.lru_cache(maxsize=1)
+def _packages_distributions() -> dict[str, list[str]]:
+    # Map of top-level packages to distributions (walks all installed distributions: only done once)
+    return dict(importlib.metadata.packages_distributions())
+
+
+def extension_version(extension: BuildEnvExtension) -> str:
+    """
+    Get version of the distribution providing an extension class
+
+    :param extension: extension instance
+    :return: distribution name and version string
+    """
+    top_level = type(extension).__module__.split(".")[0]
+    for dist in _packages_distributions().get(top_level, []):
+        try:
+            return f"{dist}=={importlib.metadata.version(dist)}"
+        except importlib.metadata.PackageNotFoundError:  # pragma: no cover
+            continue
+    return f"{top_level}==?"
+
+
+def _package_version(name: str) -> str:
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return "-"
+
+
+def extension_fingerprint(extension: BuildEnvExtension, project_path: Path | None) -> str | None:
+    """
+    Compute fingerprint of an extension declared inputs
+
+    :param extension: extension instance
+    :param project_path: project root folder (for files globs)
+    :return: fingerprint string, or None if extension doesn't declare its inputs
+    """
+
+    # Inputs declared?
+    inputs = extension.inputs
+    if inputs is None:
+        return None
+
+    # Extension version
+    h = hashlib.sha256(f"ext:{extension_version(extension)}\n".encode())
+
+    # Files
+    if project_path is not None:
+        for pattern in inputs.files:
+            for f in sorted(filter(lambda p: p.is_file(), project_path.glob(pattern))):
+                st = f.stat()
+                h.update(f"file:{f.relative_to(project_path).as_posix()}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+
+    # Environment variables
+    for var in inputs.env_vars:
+        h.update(f"env:{var}={os.getenv(var)}\n".encode())
+
+    # Packages
+    for package in inputs.packages:
+        h.update(f"pkg:{package}=={_package_version(package)}\n".encode())
+
+    return h.hexdigest()
+
+
+class ExtensionsFingerprints:
+    """
+    Persistent extensions fingerprints, stored in the project state folder of the venv
+
+    :param state_folder: project state folder
+    """
+
+    def __init__(self, state_folder: Path):
+        self._path = state_folder / _FINGERPRINTS_FILE
+        try:
+            self._fingerprints: dict[str, str] = json.loads(self._path.read_text())
+        except (OSError, ValueError):
+            self._fingerprints = {}
+        self._dirty = False
+
+    def is_up_to_date(self, name: str, fingerprint: str | None) -> bool:
+        """
+        Check if extension stored fingerprint matches the provided one
+
+        :param name: extension name
+        :param fingerprint: current extension fingerprint
+        :return: True if extension is up to date
+        """
+        return fingerprint is not None and self._fingerprints.get(name) == fingerprint
+
+    def update(self, name: str, fingerprint: str | None):
+        """
+        Update extension fingerprint
+
+        :param name: extension name
+        :param fingerprint: new extension fingerprint (None to forget it)
+        """
+        if fingerprint is None:
+            self._dirty |= self._fingerprints.pop(name, None) is not None
+        elif self._fingerprints.get(name) != fingerprint:
+            self._fingerprints[name] = fingerprint
+            self._dirty = True
+
+    def save(self):
+        """
+        Persist fingerprints (if modified)
+        """
+        if self._dirty:
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                self._path.write_text(json.dumps(self._fingerprints, indent=4, sort_keys=True))
+            except OSError as e:  # pragma: no cover
+                _LOGGER.warning(f"Failed to save extensions fingerprints: {e}")
+            self._dirty = False
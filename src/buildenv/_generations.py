@@ -0,0 +1,158 @@
+"""
+Environment generations: previous states of a venv (built venv + lock files contents), kept after upgrades so that they can be rolled back instantly.
+
+Generations are stored next to the live venv (in a folder named after it, with a **.generations** suffix), and share their unchanged files
+with other generations and the live venv through hard links. The number of kept generations is configured by the **BUILDENV_GENERATIONS**
+environment variable (default: 0, i.e. generations are disabled, as snapshotting the live venv before each upgrade isn't free).
+"""
+
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from ._store import link_tree
+
+GENERATIONS_ENV_VAR = "BUILDENV_GENERATIONS"
+"""Environment variable holding the number of kept environment generations"""
+
+GENERATIONS_SUFFIX = ".generations"
+"""Generations folder name suffix"""
+
+# Defaults
+_DEFAULT_GENERATIONS = 0
+
+# Generation folder content
+_GENERATION_VENV = "venv"
+_GENERATION_META = "meta.json"
+_LAST_ID = "last"  # Last generation number (numbers are never reused)
+
+
+def max_generations() -> int:
+    """
+    Get the number of environment generations to be kept
+
+    :return: number of kept generations, read from **BUILDENV_GENERATIONS** environment variable
+    """
+    return max(0, int(os.getenv(GENERATIONS_ENV_VAR, str(_DEFAULT_GENERATIONS))))
+
+
+@dataclass
+class Generation:
+    """
+    Environment generation
+    """
+
+    id: int
+    """Generation number (increasing)"""
+
+    folder: Path
+    """Generation folder"""
+
+    created: float
+    """Creation timestamp"""
+
+    packages: dict[str, str]
+    """Installed packages versions in this generation (indexed by package name)"""
+
+    locks: dict[str, str | None]
+    """Lock files contents for this generation (indexed by file name; None if file didn't exist)"""
+
+    @property
+    def venv(self) -> Path:
+        """
+        Generation venv folder
+        """
+        return self.folder / _GENERATION_VENV
+
+
+class GenerationsStore:
+    """
+    Environment generations store, for a live venv
+
+    :param venv: live venv folder
+    """
+
+    def __init__(self, venv: Path):
+        self.root = venv.with_name(f"{venv.name}{GENERATIONS_SUFFIX}")
+        self._venv = venv
+
+    def list(self) -> list[Generation]:
+        """
+        List kept generations
+
+        :return: generations, newest first
+        """
+        out: list[Generation] = []
+        for meta_file in self.root.glob(f"*/{_GENERATION_META}") if self.root.is_dir() else []:
+            if meta_file.parent.name.isdigit():
+                meta = json.loads(meta_file.read_text())
+                out.append(Generation(int(meta_file.parent.name), meta_file.parent, meta["created"], meta["packages"], meta["locks"]))
+        return sorted(out, key=lambda g: g.id, reverse=True)
+
+    def get(self, generation_id: int | None = None) -> Generation:
+        """
+        Get a kept generation
+
+        :param generation_id: generation number (default: latest one)
+        :return: generation
+        """
+        generations = self.list()
+        assert generations, "No previous environment generation is kept"
+        if generation_id is None:
+            return generations[0]
+        found = [g for g in generations if g.id == generation_id]
+        assert found, f"Unknown environment generation: {generation_id} (kept ones: {', '.join(str(g.id) for g in generations)})"
+        return found[0]
+
+    def snapshot(self) -> Path:
+        """
+        Snapshot live venv (linking files when possible) in a temporary folder, to be added as a generation or discarded later
+
+        :return: snapshot folder
+        """
+        snapshot = self.root / f"snapshot-{os.getpid()}"
+        shutil.rmtree(snapshot, ignore_errors=True)
+        link_tree(self._venv, snapshot)
+        return snapshot
+
+    def add(self, venv: Path, packages: dict[str, str], locks: dict[str, str | None]) -> Generation:
+        """
+        Add a new generation, moving provided venv folder in it; oldest generations are trimmed afterwards
+
+        :param venv: venv folder (must be on the same file system than the live venv)
+        :param packages: venv installed packages versions (indexed by package name)
+        :param locks: lock files contents (indexed by file name; None if file doesn't exist)
+        :return: new generation
+        """
+
+        # Prepare generation in a temporary folder, then move in place
+        generations = self.list()
+        try:
+            last_id = int((self.root / _LAST_ID).read_text())
+        except (OSError, ValueError):
+            last_id = 0
+        generation_id = max([last_id] + [g.id for g in generations]) + 1
+        folder = self.root / str(generation_id)
+        tmp = self.root / f"{generation_id}.tmp-{os.getpid()}"
+        tmp.mkdir(parents=True)
+        venv.rename(tmp / _GENERATION_VENV)
+        created = time.time()
+        (tmp / _GENERATION_META).write_text(json.dumps({"created": created, "packages": packages, "locks": locks}))
+        tmp.rename(folder)
+        (self.root / _LAST_ID).write_text(str(generation_id))
+
+        # Trim old generations
+        for old in generations[max(0, max_generations() - 1) :]:
+            self.remove(old)
+        return Generation(generation_id, folder, created, packages, locks)
+
+    def remove(self, generation: Generation):
+        """
+        Remove a generation
+
+        :param generation: generation to be removed
+        """
+        shutil.rmtree(generation.folder, ignore_errors=True)
@@ -0,0 +1,395 @@
+"""
+Simple package index client (PEP 503 HTML and PEP 691 JSON APIs), used to look for available packages versions (and their files hashes).
+
+The index URL is configured by the **BUILDENV_INDEX_URL** environment variable (falling back to **PIP_INDEX_URL**, then to PyPI).
+It may also be a local directory (or **file://** URL) mirror, laid out as a simple index.
+
+Remote projects pages are queried concurrently, through a pool of persistent connections (honoring proxies settings, e.g. **HTTPS_PROXY** and
+**NO_PROXY** environment variables), and cached on disk: a cached page is reused as is while younger than **BUILDENV_INDEX_TTL** seconds,
+and revalidated with its ETag (or modification date) afterwards.
+"""
+
+import base64
+import contextlib
+import functools
+import gzip
+import hashlib
+import http.client
+import json
+import logging
+import os
+import platform
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import TypeVar
+
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.tags import Tag, sys_tags
+from packaging.utils import InvalidSdistFilename, InvalidWheelFilename, canonicalize_name, parse_sdist_filename, parse_wheel_filename
+from packaging.version import InvalidVersion, Version
+
+from ._utils import LOGGER_NAME, cache_dir
+
+INDEX_URL_ENV_VAR = "BUILDENV_INDEX_URL"
+"""Environment variable holding the package index URL"""
+
+INDEX_TTL_ENV_VAR = "BUILDENV_INDEX_TTL"
+"""Environment variable holding the time (in seconds) during which cached index pages are used without revalidation"""
+
+DEFAULT_INDEX_URL = "https://pypi.org/simple/"
+"""Default package index URL"""
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Query results type
+_T = TypeVar("_T")
+
+# Defaults
+_DEFAULT_TTL = 600  # seconds
+_DEFAULT_JOBS = 8
+_TIMEOUT = 30  # seconds
+_MAX_REDIRECTS = 5
+
+# Preferred content types (PEP 691 JSON, then PEP 503 HTML)
+_JSON_TYPE = "application/vnd.pypi.simple.v1+json"
+_ACCEPT = f"{_JSON_TYPE}, application/vnd.pypi.simple.v1+html;q=0.2, text/html;q=0.01"
+
+
+def index_url() -> str:
+    """
+    Get the configured package index URL
+
+    :return: package index URL (or local folder path), read from **BUILDENV_INDEX_URL** or **PIP_INDEX_URL** environment variables
+    """
+    return os.getenv(INDEX_URL_ENV_VAR) or os.getenv("PIP_INDEX_URL") or DEFAULT_INDEX_URL
+
+
+@dataclass
+class IndexFile:
+    """
+    File listed in a package index project page
+    """
+
+    filename: str
+    """File name"""
+
+    requires_python: str | None = None
+    """Python versions requirement of this file (if any)"""
+
+    yanked: bool = False
+    """Yanked file flag"""
+
+    sha256: str | None = None
+    """File sha256 digest (hex format), if provided by the index"""
+
+
+@dataclass
+class PackageVersions:
+    """
+    Latest versions of a package, available on the index
+    """
+
+    latest: Version | None = None
+    """Latest version (whatever the current environment)"""
+
+    latest_compatible: Version | None = None
+    """Latest version installable in the current environment (python version and platform tags)"""
+
+
+class _LinksParser(HTMLParser):
+    # PEP 503 project page parser: collects anchors
+    def __init__(self):
+        super().__init__()
+        self.files: list[IndexFile] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]):
+        if tag == "a":
+            a = dict(attrs)
+            href = urllib.parse.urlsplit(a.get("href") or "")
+            filename = urllib.parse.unquote(href.path.rsplit("/", 1)[-1])
+            if filename:
+                digest = href.fragment.removeprefix("sha256=") if href.fragment.startswith("sha256=") else None
+                self.files.append(IndexFile(filename, a.get("data-requires-python") or None, "data-yanked" in a, digest))
+
+
+@functools.lru_cache
+def _supported_tags() -> frozenset[Tag]:
+    # Wheel tags supported by running interpreter (computed once)
+    return frozenset(sys_tags())
+
+
+def parse_project_page(content: str, content_type: str = "") -> list[IndexFile]:
+    """
+    Parse an index project page
+
+    :param content: page content
+    :param content_type: page content type (JSON if PEP 691 content type, or if content looks like JSON; HTML otherwise)
+    :return: listed files
+    """
+    if content_type.startswith(_JSON_TYPE) or content.lstrip().startswith("{"):
+        return [
+            IndexFile(f["filename"], f.get("requires-python") or None, bool(f.get("yanked", False)), f.get("hashes", {}).get("sha256"))
+            for f in json.loads(content).get("files", [])
+        ]
+    parser = _LinksParser()
+    parser.feed(content)
+    return parser.files
+
+
+def _file_version(f: IndexFile) -> tuple[Version, frozenset[Tag] | None] | None:
+    # Parse file version (and tags for wheels), if valid
+    try:
+        if f.filename.endswith(".whl"):
+            _, version, _, tags = parse_wheel_filename(f.filename)
+            return version, tags
+        return parse_sdist_filename(f.filename)[1], None
+    except (InvalidWheelFilename, InvalidSdistFilename, InvalidVersion):
+        return None
+
+
+def latest_versions(files: list[IndexFile], prereleases: bool = False) -> PackageVersions:
+    """
+    Find latest versions from listed files (yanked files are ignored)
+
+    :param files: listed files
+    :param prereleases: if True, pre-release versions are considered
+    :return: latest versions
+    """
+    out = PackageVersions()
+    python_version = platform.python_version()
+    for f in filter(lambda f: not f.yanked, files):
+        # Parse version (and tags for wheels)
+        parsed = _file_version(f)
+        if parsed is None:
+            continue
+        version, tags = parsed
+        if version.is_prerelease and not prereleases:
+            continue
+        out.latest = max(out.latest or version, version)
+
+        # Check compatibility
+        try:
+            compatible = f.requires_python is None or SpecifierSet(f.requires_python).contains(python_version, prereleases=True)
+        except InvalidSpecifier:
+            compatible = True
+        if compatible and (tags is None or not tags.isdisjoint(_supported_tags())):
+            out.latest_compatible = max(out.latest_compatible or version, version)
+    return out
+
+
+def _proxy_headers(proxy: urllib.parse.SplitResult) -> dict[str, str]:
+    # Proxy authentication headers, if proxy URL holds credentials
+    if not proxy.username:
+        return {}
+    credentials = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode()).decode()}
+
+
+class _ConnectionsPool:
+    # Pool of persistent HTTP connections (per scheme + host), with bounded concurrency, honoring proxies settings (e.g. HTTPS_PROXY/NO_PROXY)
+    def __init__(self, size: int):
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._proxies = urllib.request.getproxies()
+
+    def _proxy(self, parts: urllib.parse.SplitResult) -> urllib.parse.SplitResult | None:
+        # Proxy to be used for this URL, if any
+        proxy = self._proxies.get(parts.scheme)
+        if not proxy or urllib.request.proxy_bypass(parts.hostname or ""):
+            return None
+        return urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+    def _connect(self, parts: urllib.parse.SplitResult, proxy: urllib.parse.SplitResult | None) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get((parts.scheme, parts.netloc))
+            if idle:
+                return idle.pop()
+        host = parts.netloc.rsplit("@", 1)[-1]
+        if proxy is None:
+            return http.client.HTTPSConnection(host, timeout=_TIMEOUT) if parts.scheme == "https" else http.client.HTTPConnection(host, timeout=_TIMEOUT)
+
+        # Through proxy: CONNECT tunnel for HTTPS, plain requests (with absolute URLs) for HTTP
+        proxy_host = proxy.netloc.rsplit("@", 1)[-1]
+        if parts.scheme == "https":
+            conn = http.client.HTTPSConnection(proxy_host, timeout=_TIMEOUT)
+            conn.set_tunnel(host, headers=_proxy_headers(proxy))
+            return conn
+        return http.client.HTTPConnection(proxy_host, timeout=_TIMEOUT)
+
+    def get(self, url: str, headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        # GET request, following redirects; returns status, headers (lowercase names) and body
+        for _ in range(_MAX_REDIRECTS):
+            parts = urllib.parse.urlsplit(url)
+            proxy = self._proxy(parts)
+            request_headers = dict(headers)
+            if parts.username:
+                credentials = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+                request_headers["Authorization"] = "Basic " + base64.b64encode(credentials.encode()).decode()
+            target = parts.path + (f"?{parts.query}" if parts.query else "")
+            if proxy is not None and parts.scheme == "http":
+                # Plain HTTP through proxy: absolute URL (without credentials)
+                target = urllib.parse.urlunsplit((parts.scheme, parts.netloc.rsplit("@", 1)[-1], parts.path, parts.query, ""))
+                request_headers.update(_proxy_headers(proxy))
+            with self._slots:
+                # Retry once with a new connection, if a reused one was closed by server
+                for attempt in range(2):
+                    conn = self._connect(parts, proxy)
+                    try:
+                        conn.request("GET", target, headers=request_headers)
+                        response = conn.getresponse()
+                        body = response.read()
+                    except (http.client.HTTPException, OSError):
+                        conn.close()
+                        if attempt:
+                            raise
+                        continue
+                    if response.will_close:
+                        conn.close()
+                    else:
+                        with self._lock:
+                            self._idle.setdefault((parts.scheme, parts.netloc), []).append(conn)
+                    break
+            response_headers = {k.lower(): v for k, v in response.getheaders()}
+            if response.status in (301, 302, 303, 307, 308) and "location" in response_headers:
+                url = urllib.parse.urljoin(url, response_headers["location"])
+                continue
+            if response_headers.get("content-encoding") == "gzip":
+                body = gzip.decompress(body)
+            return response.status, response_headers, body
+        raise OSError(f"Too many redirects for {url}")
+
+    def close(self):
+        with self._lock:
+            for conn in (c for idle in self._idle.values() for c in idle):
+                conn.close()
+            self._idle.clear()
+
+
+class SimpleIndex:
+    """
+    Simple package index client
+
+    :param url: index URL, or local folder path (default: see :func:`index_url`)
+    :param cache_folder: folder where remote index pages are cached (default: **index** folder in host-wide buildenv cache folder)
+    :param ttl: time (in seconds) during which cached pages are used without revalidation (default: **BUILDENV_INDEX_TTL** environment variable, or 600)
+    :param jobs: max number of concurrent queries
+    """
+
+    def __init__(self, url: str | None = None, cache_folder: Path | None = None, ttl: int | None = None, jobs: int = _DEFAULT_JOBS):
+        url = url or index_url()
+        self._local = Path(urllib.request.url2pathname(url[7:])) if url.startswith("file://") else Path(url) if "://" not in url else None
+        self._url = url.rstrip("/") + "/"
+        self._cache_folder = cache_folder if cache_folder is not None else cache_dir() / "index"
+        self._ttl = ttl if ttl is not None else int(os.getenv(INDEX_TTL_ENV_VAR, str(_DEFAULT_TTL)))
+        self._jobs = jobs
+
+    def _local_files(self, name: str) -> list[IndexFile]:
+        # Local mirror: project folder with an index page, or raw files
+        assert self._local is not None
+        folder = self._local / name
+        for page in ("index.json", "index.html"):
+            if (folder / page).is_file():
+                return parse_project_page((folder / page).read_text(encoding="utf-8"))
+        return [IndexFile(p.name) for p in folder.iterdir() if p.is_file()] if folder.is_dir() else []
+
+    def _remote_files(self, name: str, pool: _ConnectionsPool) -> list[IndexFile]:
+        # Fresh cached page?
+        url = f"{self._url}{name}/"
+        cache_file = self._cache_folder / f"{hashlib.sha256(url.encode()).hexdigest()[:32]}.json"
+        try:
+            cached = json.loads(cache_file.read_text())
+        except (OSError, ValueError):
+            cached = None
+        if cached is not None and time.time() - cached["time"] < self._ttl:
+            return parse_project_page(cached["body"], cached["type"])
+
+        # Query (conditionally, if cached)
+        headers = {"Accept": _ACCEPT, "Accept-Encoding": "gzip"}
+        if cached is not None and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached is not None and cached.get("modified"):
+            headers["If-Modified-Since"] = cached["modified"]
+        status, response_headers, body = pool.get(url, headers)
+        if status == 304 and cached is not None:
+            cached["time"] = time.time()
+        elif status == 404:
+            return []
+        elif status == 200:
+            cached = {
+                "time": time.time(),
+                "etag": response_headers.get("etag"),
+                "modified": response_headers.get("last-modified"),
+                "type": response_headers.get("content-type", ""),
+                "body": body.decode("utf-8"),
+            }
+        else:
+            raise OSError(f"HTTP error {status} for {url}")
+
+        # Update cache (atomically, as other processes may read it concurrently)
+        with contextlib.suppress(OSError):
+            self._cache_folder.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(cached))
+            os.replace(tmp, cache_file)
+        return parse_project_page(cached["body"], cached["type"])
+
+    def _query(self, names: list[str], handler: Callable[[str, list[IndexFile]], _T]) -> dict[str, _T]:
+        # Query index concurrently for provided packages, and process their listed files (packages for which the query fails are logged and ignored)
+        pool = _ConnectionsPool(self._jobs)
+
+        def query(name: str) -> _T | None:
+            try:
+                name_ = canonicalize_name(name)
+                return handler(name, self._local_files(name_) if self._local is not None else self._remote_files(name_, pool))
+            except (OSError, ValueError, KeyError, http.client.HTTPException) as e:
+                _LOGGER.warning(f"Failed to query package index for {name}: {e}")
+                return None
+
+        try:
+            with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+                results = dict(zip(names, executor.map(query, names), strict=True))
+        finally:
+            pool.close()
+        return {name: result for name, result in results.items() if result is not None}
+
+    def latest_versions(self, installed: dict[str, str]) -> dict[str, PackageVersions]:
+        """
+        Query index concurrently for latest versions of installed packages.
+        Pre-release versions are only considered for packages which installed version is a pre-release.
+        Packages for which the query fails are logged and ignored.
+
+        :param installed: map of installed packages versions (indexed by package name)
+        :return: map of latest versions (indexed by package name)
+        """
+
+        def handler(name: str, files: list[IndexFile]) -> PackageVersions:
+            try:
+                prereleases = Version(installed[name]).is_prerelease
+            except InvalidVersion:
+                prereleases = False
+            return latest_versions(files, prereleases)
+
+        return self._query(list(installed), handler)
+
+    def files_hashes(self, packages: dict[str, str]) -> dict[str, list[str]]:
+        """
+        Query index concurrently for sha256 hashes of all files (wheels for all platforms, and sdists) of given packages versions.
+        Files without a hash provided by the index are ignored; packages for which the query fails are logged and ignored.
+
+        :param packages: map of packages versions (indexed by package name)
+        :return: map of sorted hashes lists (hex format; indexed by package name)
+        """
+
+        def handler(name: str, files: list[IndexFile]) -> list[str]:
+            version = Version(packages[name])
+            return sorted({f.sha256 for f in files if f.sha256 and (parsed := _file_version(f)) is not None and parsed[0] == version})
+
+        return self._query(list(packages), handler)
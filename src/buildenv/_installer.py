@@ -0,0 +1,352 @@
+"""
+Built-in wheels installer, for fully locked environments.
+
+When all the packages of a lockfile are hash-pinned and available as wheels in local folders (e.g. a wheelhouse), no resolution is needed:
+wheels are verified against the locked hashes, then unpacked concurrently in the venv (with RECORD/INSTALLER metadata files and console scripts wrappers).
+
+This module is standalone (i.e. it doesn't have any dependencies out of the raw python SDK), as it is extracted from the locked buildenv wheel,
+to be invoked by loading scripts before buildenv is installed in the venv:
+
+    <venv python> installer.py <venv folder> <lockfile> <wheels folder>...
+"""
+
+import base64
+import csv
+import functools
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import sysconfig
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+from email.parser import HeaderParser
+from pathlib import Path, PurePosixPath
+
+INSTALLER_ENV_VAR = "BUILDENV_INSTALLER"
+"""Environment variable selecting the packages installer for pip backend (default: pip)"""
+
+BUILTIN_INSTALLER = "builtin"
+"""Built-in installer name (for fully locked environments, see this module)"""
+
+UV_INSTALLER = "uv"
+"""Accelerated installer name (delegating to **uv pip**, if available)"""
+
+# Installer name, written in installed distributions metadata
+_INSTALLER_NAME = "buildenv"
+
+# Wheel format version supported by this installer
+_WHEEL_VERSION = 1
+
+# Read buffer size for hashing and unpacking
+_CHUNK_SIZE = 1024 * 1024
+
+# Console script wrapper template
+_SCRIPT_TEMPLATE = """#!{python}
+# -*- coding: utf-8 -*-
+import re
+import sys
+from {module} import {import_name}
+if __name__ == "__main__":
+    sys.argv[0] = re.sub(r"(-script\\.pyw|\\.exe)?$", "", sys.argv[0])
+    sys.exit({call})
+"""
+
+
+def _normalize_name(name: str) -> str:
+    # Normalize distribution name, as specified by PEP 503
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_lockfile(lock_file: Path) -> dict[str, tuple[str, set[str]]] | None:
+    """
+    Parse a hash-pinned requirements lockfile
+
+    :param lock_file: lockfile path
+    :return: map of locked versions and sha256 hashes (indexed by normalized distribution name), or None if some requirement is not hash-pinned
+    """
+
+    out: dict[str, tuple[str, set[str]]] = {}
+    for requirement in lock_file.read_text().replace("\\\n", " ").splitlines():
+        # Ignore comments and empty lines
+        requirement = requirement.split("#", 1)[0].strip()
+        if not requirement:
+            continue
+
+        # Only support "name==version --hash=sha256:..." requirements
+        m = re.fullmatch(r"([A-Za-z0-9._-]+)==([^\s;]+)((?:\s+--hash=sha256:[0-9a-f]+)+)", requirement)
+        if m is None:
+            return None
+        out[_normalize_name(m.group(1))] = (m.group(2), set(re.findall(r"--hash=sha256:([0-9a-f]+)", m.group(3))))
+    return out
+
+
+def _glibc_version() -> tuple[int, int] | None:
+    # Version of the glibc used by current interpreter, if any (e.g. "glibc 2.35")
+    try:
+        version = os.confstr("CS_GNU_LIBC_VERSION")
+    except (AttributeError, OSError, ValueError):  # pragma: no cover -- not a glibc platform
+        return None
+    m = re.fullmatch(r"glibc (\d+)\.(\d+).*", version or "")
+    return (int(m[1]), int(m[2])) if m else None
+
+
+def _musl_version(arch: str) -> tuple[int, int] | None:
+    # Version of the musl libc, if any (printed by its dynamic loader, e.g. "Version 1.2.4")
+    loader = Path(f"/lib/ld-musl-{arch}.so.1")
+    if not loader.is_file():
+        return None
+    try:
+        cp = subprocess.run([str(loader)], capture_output=True, text=True, check=False)
+    except OSError:  # pragma: no cover
+        return None
+    m = re.search(r"Version (\d+)\.(\d+)", cp.stderr)
+    return (int(m[1]), int(m[2])) if m else None
+
+
+@functools.lru_cache(maxsize=1)
+def _platform_tags() -> list[str]:
+    # Platform tags patterns compatible with current interpreter (simplified matching; hashes are the real safeguard)
+    platform = sysconfig.get_platform().replace("-", "_").replace(".", "_")
+    if platform.startswith("linux_"):
+        # Linux wheels built for a libc version up to the one of current interpreter (including legacy manylinux aliases)
+        arch = platform.removeprefix("linux_")
+        tags = ["any", platform]
+        glibc = _glibc_version()
+        musl = _musl_version(arch) if glibc is None else None
+        if glibc is not None and glibc[0] == 2:
+            tags += [f"manylinux_2_{minor}_{arch}" for minor in range(glibc[1], -1, -1)]
+            tags += [f"{alias}_{arch}" for alias, minor in (("manylinux2014", 17), ("manylinux2010", 12), ("manylinux1", 5)) if glibc[1] >= minor]
+        elif musl is not None and musl[0] == 1:
+            tags += [f"musllinux_1_{minor}_{arch}" for minor in range(musl[1], -1, -1)]
+        return tags
+    if platform.startswith("macosx_"):
+        arch = platform.rsplit("_", 1)[-1]
+        return ["any", f"macosx_*_{arch}", "macosx_*_universal2"] + (["macosx_*_x86_64"] if arch == "universal2" else [])
+    return ["any", platform]
+
+
+def is_compatible(wheel_name: str) -> bool:
+    """
+    Check if a wheel is compatible with current interpreter
+
+    :param wheel_name: wheel file name
+    :return: True if compatible
+    """
+
+    # {name}-{version}(-{build})?-{python}-{abi}-{platform}.whl
+    parts = wheel_name.removesuffix(".whl").split("-")
+    if len(parts) < 5:
+        return False
+    pythons, abis, platforms = (set(p.split(".")) for p in parts[-3:])
+
+    # Python + ABI tags
+    major, minor = sys.version_info[:2]
+    supported = {(f"py{major}", "none"), (f"py{major}{minor}", "none")}
+    if sys.implementation.name == "cpython":
+        cpython = f"cp{major}{minor}"
+        supported |= {(cpython, "none"), (cpython, cpython), (cpython, f"{cpython}{sys.abiflags}")}
+        supported |= {(f"cp{major}{m}", "abi3") for m in range(2, minor + 1)}
+    if not any((p, a) in supported for p in pythons for a in abis):
+        return False
+
+    # Platform tag
+    return any(re.fullmatch(pattern.replace("*", r"[0-9_]+"), p) for pattern in _platform_tags() for p in platforms)
+
+
+def _sha256(path: Path) -> str:
+    # Hash file content by chunks
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _record_hash(data: bytes) -> str:
+    # RECORD file hash format
+    return "sha256=" + base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+
+
+def find_wheels(requirements: dict[str, tuple[str, set[str]]], folders: list[Path]) -> dict[str, list[Path]]:
+    """
+    Find compatible wheels candidates for locked requirements
+
+    :param requirements: locked requirements, as returned by :func:`parse_lockfile`
+    :param folders: folders where to look for wheels
+    :return: map of wheels candidates (indexed by normalized distribution name)
+    """
+
+    # Index compatible wheels
+    out: dict[str, list[Path]] = {name: [] for name in requirements}
+    for folder in folders:
+        for root, _, files in os.walk(folder):
+            for file_name in filter(lambda f: f.endswith(".whl") and is_compatible(f), files):
+                parts = file_name.split("-")
+                name = _normalize_name(parts[0])
+                if name in requirements and parts[1] == requirements[name][0]:
+                    out[name].append(Path(root) / file_name)
+
+    # All requirements must have at least one candidate
+    missing = sorted(name for name, candidates in out.items() if not candidates)
+    assert not missing, f"Can't find any compatible wheel for these locked packages: {', '.join(missing)}"
+    return out
+
+
+class WheelInstaller:
+    """
+    Wheels installer, for a given venv
+
+    :param venv: venv root folder (python interpreter running this installer must be the venv one)
+    """
+
+    def __init__(self, venv: Path):
+        self._venv = venv.resolve()
+        scheme = sysconfig.get_paths(vars={"base": str(self._venv), "platbase": str(self._venv)})
+        self._paths = {key: Path(scheme[key]) for key in ("purelib", "platlib", "scripts", "data")}
+        self._paths["headers"] = Path(scheme["include"])
+        self._python = str(self._paths["scripts"] / Path(sys.executable).name)
+
+    def _write_script(self, path: Path, content: bytes) -> None:
+        # Write script file, and make it executable
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        path.chmod(path.stat().st_mode | 0o111)
+
+    def install(self, wheel: Path, hashes: set[str]) -> str:
+        """
+        Install a wheel in the venv
+
+        :param wheel: wheel file
+        :param hashes: expected sha256 hashes (wheel is rejected if its hash is not one of them)
+        :return: installed distribution name
+        """
+
+        # Verify wheel hash
+        assert _sha256(wheel) in hashes, f"{wheel.name} doesn't match any of the locked hashes"
+
+        with zipfile.ZipFile(wheel) as zf:
+            # Read wheel metadata
+            dist_info = next(n.split("/")[0] for n in zf.namelist() if n.split("/")[0].endswith(".dist-info") and n.endswith("/WHEEL"))
+            data_dir = dist_info.removesuffix(".dist-info") + ".data"
+            wheel_meta = HeaderParser().parsestr(zf.read(f"{dist_info}/WHEEL").decode())
+            assert int(str(wheel_meta.get("Wheel-Version", "1.0")).split(".")[0]) == _WHEEL_VERSION, f"Unsupported wheel version for {wheel.name}"
+            root = self._paths["purelib" if str(wheel_meta.get("Root-Is-Purelib", "true")).lower() == "true" else "platlib"]
+
+            # Unpack all files
+            records: list[tuple[str, str, str]] = []
+            for info in filter(lambda i: not i.is_dir(), zf.infolist()):
+                # Resolve target path (refusing paths out of target folder)
+                member = PurePosixPath(info.filename)
+                assert not member.is_absolute() and ".." not in member.parts, f"Invalid path in {wheel.name}: {info.filename}"
+                if member.parts[0] == data_dir:
+                    assert len(member.parts) > 2 and member.parts[1] in self._paths, f"Invalid data path in {wheel.name}: {info.filename}"
+                    target = self._paths[member.parts[1]].joinpath(*member.parts[2:])
+                else:
+                    target = root.joinpath(*member.parts)
+                if member.parts[0] == dist_info and member.name in ("RECORD", "INSTALLER"):
+                    # Will be written at the end
+                    continue
+
+                # Scripts: fix-up python shebang
+                if member.parts[0] == data_dir and member.parts[1] == "scripts":
+                    content = zf.read(info)
+                    if content.startswith(b"#!python"):
+                        content = b"#!" + self._python.encode() + content[len(b"#!python") :]
+                    self._write_script(target, content)
+                    records.append((os.path.relpath(target, root), _record_hash(content), str(len(content))))
+                    continue
+
+                # Other files: stream to disk, while hashing
+                target.parent.mkdir(parents=True, exist_ok=True)
+                h = hashlib.sha256()
+                with zf.open(info) as src, target.open("wb") as dst:
+                    for chunk in iter(lambda src=src: src.read(_CHUNK_SIZE), b""):
+                        h.update(chunk)
+                        dst.write(chunk)
+                if info.external_attr >> 16 & 0o111:
+                    target.chmod(target.stat().st_mode | 0o111)
+                digest = "sha256=" + base64.urlsafe_b64encode(h.digest()).rstrip(b"=").decode()
+                records.append((os.path.relpath(target, root), digest, str(info.file_size)))
+
+            # Generate console scripts wrappers
+            entry_points_file = f"{dist_info}/entry_points.txt"
+            if entry_points_file in zf.namelist():
+                parser = ConfigParser(delimiters=("=",), interpolation=None)
+                parser.optionxform = str  # type: ignore
+                parser.read_string(zf.read(entry_points_file).decode())
+                for section in filter(parser.has_section, ("console_scripts", "gui_scripts")):
+                    for script_name, reference in parser.items(section):
+                        module, _, attrs = (part.strip() for part in reference.split("[")[0].partition(":"))
+                        assert attrs, f"Invalid {script_name} entry point in {wheel.name}: {reference}"
+                        content = _SCRIPT_TEMPLATE.format(python=self._python, module=module, import_name=attrs.split(".")[0], call=f"{attrs}()").encode()
+                        target = self._paths["scripts"] / script_name
+                        self._write_script(target, content)
+                        records.append((os.path.relpath(target, root), _record_hash(content), str(len(content))))
+
+        # Installer + RECORD metadata
+        installer = f"{_INSTALLER_NAME}\n".encode()
+        (root / dist_info / "INSTALLER").write_bytes(installer)
+        records.append((f"{dist_info}/INSTALLER", _record_hash(installer), str(len(installer))))
+        records.append((f"{dist_info}/RECORD", "", ""))
+        with (root / dist_info / "RECORD").open("w", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerows(records)
+        return dist_info.split("-")[0]
+
+    def install_all(self, wheels: dict[str, list[Path]], requirements: dict[str, tuple[str, set[str]]]) -> list[str]:
+        """
+        Install wheels concurrently
+
+        :param wheels: map of wheels candidates, as returned by :func:`find_wheels`
+        :param requirements: locked requirements, as returned by :func:`parse_lockfile`
+        :return: installed distributions names
+        """
+
+        # Select first candidate with a locked hash, for each package
+        def install(name: str) -> str:
+            errors: list[str] = []
+            for candidate in wheels[name]:
+                try:
+                    return self.install(candidate, requirements[name][1])
+                except AssertionError as e:
+                    errors.append(str(e))
+            raise AssertionError("\n".join(errors))
+
+        # Unpacking (decompression, hashing, files writing) mostly runs out of the GIL
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            return list(pool.map(install, sorted(wheels.keys())))
+
+
+def main(args: list[str]) -> int:
+    """
+    Installer command line entry point, for loading scripts
+
+    :param args: command line arguments (<venv folder> <lockfile> <wheels folder>...)
+    :return: 0 if all locked packages were installed, 1 otherwise (caller is expected to fall back to another installer)
+    """
+
+    # Check arguments, and environment support (console scripts can't be generated for Windows, as they require launchers)
+    if len(args) < 3 or os.name == "nt":
+        return 1
+    venv, lock_file, folders = Path(args[0]), Path(args[1]), [Path(a) for a in args[2:]]
+    requirements = parse_lockfile(lock_file)
+    if requirements is None:
+        print(f"[WARNING] {lock_file.name} is not fully hash-pinned, can't use built-in installer")
+        return 1
+
+    # Install
+    start = time.perf_counter()
+    try:
+        installed = WheelInstaller(venv).install_all(find_wheels(requirements, folders), requirements)
+    except (AssertionError, OSError, zipfile.BadZipFile) as e:
+        print(f"[WARNING] Built-in installer failed: {e}")
+        return 1
+    print(f"[INFO] Installed {len(installed)} packages with built-in installer in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,202 @@
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+
+from ._utils import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Inventory cache file name (in venv root folder)
+_INVENTORY_FILE = ".buildenv_inventory.json"
+
+# Inventory cache format version (to be bumped on format change)
+_INVENTORY_VERSION = 1
+
+
+@dataclass
+class InventoryPackage:
+    """
+    Installed package, as indexed in inventory
+    """
+
+    name: str
+    """Package name (as declared in its metadata)"""
+
+    version: str
+    """Installed version"""
+
+    requires: list[str] = field(default_factory=list)
+    """Installed dependencies (normalized names), for current environment markers and requested extras"""
+
+    required_by: list[str] = field(default_factory=list)
+    """Installed dependent packages (normalized names)"""
+
+
+def parse_requirement_name(line: str) -> str | None:
+    """
+    Parse the normalized package name of a requirement line
+
+    :param line: requirement line (e.g. from a requirements file)
+    :return: normalized package name, or None if line is not a package requirement (e.g. comment, option, path or URL)
+    """
+    line = line.split("#", 1)[0].strip()
+    if not line or line.startswith("-"):
+        return None
+    try:
+        return canonicalize_name(Requirement(line).name)
+    except InvalidRequirement:
+        return None
+
+
+class PackagesInventory:
+    """
+    Installed packages inventory, with dependencies graph (built from distributions **Requires-Dist** metadata, with markers evaluation).
+    The inventory is persisted in the venv, and only rebuilt when installed distributions change.
+
+    :param venv_root: venv root folder (where inventory is persisted)
+    :param path: folders where to look for installed distributions (default: current **sys.path**)
+    """
+
+    def __init__(self, venv_root: Path, path: list[str] | None = None):
+        self._cache_path = venv_root / _INVENTORY_FILE
+        self._path = path if path is not None else sys.path
+
+        # Reload persisted inventory, if still valid
+        fingerprint = self._fingerprint()
+        try:
+            cache = json.loads(self._cache_path.read_text())
+            assert cache["version"] == _INVENTORY_VERSION and cache["fingerprint"] == fingerprint
+            self.packages = {name: InventoryPackage(**p) for name, p in cache["packages"].items()}
+        except (OSError, ValueError, AssertionError, KeyError, TypeError):
+            # Rebuild and persist inventory
+            self.packages = self._build()
+            try:
+                self._cache_path.write_text(
+                    json.dumps({"version": _INVENTORY_VERSION, "fingerprint": fingerprint, "packages": {n: p.__dict__ for n, p in self.packages.items()}})
+                )
+            except OSError as e:  # pragma: no cover
+                _LOGGER.debug(f"Failed to persist packages inventory: {e}")
+
+    def _fingerprint(self) -> str:
+        # Fingerprint of installed distributions metadata folders (names + modification times)
+        h = hashlib.sha256()
+        for folder in self._path:
+            try:
+                entries = sorted((e.name, e.stat().st_mtime_ns) for e in os.scandir(folder) if e.name.endswith((".dist-info", ".egg-info")))
+            except OSError:
+                continue
+            h.update(json.dumps([folder, entries]).encode())
+        return h.hexdigest()
+
+    @staticmethod
+    def _applies(req: Requirement, extras: set[str]) -> bool:
+        # Check if requirement applies to current environment, for package requested extras
+        return req.marker is None or any(req.marker.evaluate({"extra": e}) for e in {""} | extras)
+
+    def _build(self) -> dict[str, InventoryPackage]:
+        # Index installed distributions (first one wins, as for imports)
+        dists: dict[str, importlib.metadata.Distribution] = {}
+        for dist in importlib.metadata.distributions(path=self._path):
+            if dist.metadata["Name"]:
+                dists.setdefault(canonicalize_name(dist.metadata["Name"]), dist)
+
+        # Parse requirements
+        parsed: dict[str, list[Requirement]] = {}
+        for name, dist in dists.items():
+            parsed[name] = []
+            for req in dist.requires or []:
+                try:
+                    parsed[name].append(Requirement(req))
+                except InvalidRequirement:
+                    _LOGGER.debug(f"Ignoring invalid requirement for {name}: {req}")
+
+        # Requested extras for each package (from installed dependents requirements, until stable as extras may request other extras)
+        extras: dict[str, set[str]] = {name: set() for name in dists}
+        changed = True
+        while changed:
+            changed = False
+            for name, reqs in parsed.items():
+                for req in reqs:
+                    dep = canonicalize_name(req.name)
+                    if dep in extras and not req.extras <= extras[dep] and self._applies(req, extras[name]):
+                        extras[dep].update(req.extras)
+                        changed = True
+
+        # Build graph, evaluating markers for base requirements and requested extras
+        out = {name: InventoryPackage(str(dist.metadata["Name"]), dist.version) for name, dist in dists.items()}
+        for name, reqs in parsed.items():
+            requires: set[str] = set()
+            for req in reqs:
+                dep = canonicalize_name(req.name)
+                if dep in out and dep != name and self._applies(req, extras[name]):
+                    requires.add(dep)
+            out[name].requires = sorted(requires)
+            for dep in requires:
+                out[dep].required_by.append(name)
+        for p in out.values():
+            p.required_by.sort()
+        return out
+
+    def get(self, name: str) -> InventoryPackage:
+        """
+        Get an installed package
+
+        :param name: package name
+        :return: installed package
+        """
+        package = self.packages.get(canonicalize_name(name))
+        assert package is not None, f"Package {name} is not installed"
+        return package
+
+    def reachable(self, roots: set[str]) -> set[str]:
+        """
+        Get all packages reachable from some root packages (including them)
+
+        :param roots: root packages (normalized names; not installed ones are ignored)
+        :return: reachable packages normalized names
+        """
+        out: set[str] = set()
+        pending = [r for r in roots if r in self.packages]
+        while pending:
+            name = pending.pop()
+            if name not in out:
+                out.add(name)
+                pending.extend(self.packages[name].requires)
+        return out
+
+    def format_tree(self, roots: list[str], reverse: bool = False, top_level: set[str] | None = None) -> list[str]:
+        """
+        Format a dependencies tree (each package is only expanded once; next occurrences are suffixed with **(*)**)
+
+        :param roots: tree root packages (normalized names)
+        :param reverse: if True, walk dependent packages instead of dependencies
+        :param top_level: top-level requirements, to be flagged in tree (if any)
+        :return: tree lines
+        """
+
+        out: list[str] = []
+        expanded: set[str] = set()
+
+        def walk(name: str, prefix: str, child_prefix: str):
+            package = self.packages[name]
+            children = package.required_by if reverse else package.requires
+            flags = (" (top-level)" if top_level and name in top_level else "") + (" (*)" if name in expanded and children else "")
+            out.append(f"{prefix}{package.name} {package.version}{flags}")
+            if name in expanded:
+                return
+            expanded.add(name)
+            for i, child in enumerate(children):
+                last = i == len(children) - 1
+                walk(child, child_prefix + ("└── " if last else "├── "), child_prefix + ("    " if last else "│   "))
+
+        for root in roots:
+            walk(root, "", "")
+        return out
@@ -5,7 +5,7 @@ from pathlib import Path
 import argcomplete
 
 from . import __version__
-from ._entry_points import parse_project_templates
+from ._entry_points import parse_project_templates, parse_project_templates_manifests
 from ._shells.factory import KNOWN_SHELLS
 from ._utils import LOGGER_NAME, StopHereException
 from .backends.factory import EnvBackendFactory
@@ -16,6 +16,11 @@ _LOGGER = logging.getLogger(LOGGER_NAME)
 _DEFAULT_SHELL = "bash"
 
 
+# Project templates names completer (from manifests, i.e. without importing templates classes)
+def _complete_templates(prefix: str, parsed_args: Namespace, **kwargs: object) -> list[str]:
+    return [name for name in parse_project_templates_manifests(BuildEnvInfo(project_root=parsed_args.project_folder)) if name.startswith(prefix)]
+
+
 class BuildEnvParser:
     """
     Command-line interface parser for buildenv manager
@@ -65,7 +70,7 @@ class BuildEnvParser:
         )
         whole_templates_group = install_parser.add_argument_group(title="project template options")
         templates_group = whole_templates_group.add_mutually_exclusive_group()
-        templates_group.add_argument(
+        template_arg = templates_group.add_argument(
             "--template",
             "-t",
             metavar="TEMPLATE",
@@ -75,7 +80,7 @@ class BuildEnvParser:
         )
         templates_group.add_argument("--no-template", action="store_true", default=False, help="forces project install without any template")
         templates_group.add_argument("--list-templates", action="store_true", default=False, help="prints all available project templates and exit")
-        whole_templates_group.add_argument(
+        extra_template_arg = whole_templates_group.add_argument(
             "--extra-template",
             "-X",
             action="append",
@@ -84,7 +89,7 @@ class BuildEnvParser:
             default=[],
             help="adds extra project template support (can be specified multiple times)",
         )
-        whole_templates_group.add_argument(
+        ignore_template_arg = whole_templates_group.add_argument(
             "--ignore-template",
             "-I",
             action="append",
@@ -93,8 +98,16 @@ class BuildEnvParser:
             default=[],
             help="removes extra project template support (can be specified multiple times)",
         )
+        for arg in (template_arg, extra_template_arg, ignore_template_arg):
+            arg.completer = _complete_templates  # type: ignore
         install_parser.add_argument("--no-clean", action="store_true", default=False, help="don't clean legacy buildenv files")
-        install_parser.set_defaults(func="install", kwargs_map={"packages": lambda o: o.packages, "clean_old_files": lambda o: not o.no_clean})  # type: ignore
+        install_parser.add_argument(
+            "--dry-run", action="store_true", default=False, help="only print files generation plan (created/changed/unchanged files), without writing anything"
+        )
+        install_parser.set_defaults(
+            func="install",
+            kwargs_map={"packages": lambda o: o.packages, "clean_old_files": lambda o: not o.no_clean, "dry_run": lambda o: o.dry_run},  # type: ignore
+        )
 
         # init sub-command
         init_help = "create venv and initialize extensions (implicitly done with shell and run commands)"
@@ -142,11 +155,86 @@ class BuildEnvParser:
         _common_args(list_parser)
         list_parser.set_defaults(func="list")
 
+        # why sub-command
+        why_help = "show why a package is installed in the current build environment (tree of its dependent packages)"
+        why_parser = sub_parsers.add_parser("why", help=why_help, description=why_help)
+        _common_args(why_parser)
+        why_parser.set_defaults(func="why", kwargs_map={"package": lambda o: o.PACKAGE})  # type: ignore
+        why_parser.add_argument("PACKAGE", help="installed package name")
+
+        # tree sub-command
+        tree_help = "show installed packages dependencies tree in the current build environment"
+        tree_parser = sub_parsers.add_parser("tree", help=tree_help, description=tree_help)
+        _common_args(tree_parser)
+        tree_parser.set_defaults(func="tree", kwargs_map={"unused": lambda o: o.unused})  # type: ignore
+        tree_parser.add_argument(
+            "--unused", action="store_true", default=False, help="list installed packages which are not reachable from top-level requirements instead"
+        )
+
+        # outdated sub-command
+        outdated_help = "list outdated packages in the current build environment (compared to versions available on the package index)"
+        outdated_parser = sub_parsers.add_parser("outdated", help=outdated_help, description=outdated_help)
+        _common_args(outdated_parser)
+        outdated_parser.set_defaults(func="outdated")
+
+        # extensions sub-command
+        extensions_help = "list extensions loaded in the current build environment"
+        extensions_parser = sub_parsers.add_parser("extensions", help=extensions_help, description=extensions_help)
+        _common_args(extensions_parser)
+        extensions_parser.set_defaults(func="extensions", kwargs_map={"timings": lambda o: o.timings})  # type: ignore
+        extensions_parser.add_argument(
+            "--timings",
+            action="store_true",
+            default=False,
+            help="show extensions hooks timings history (calls count, last/mean/max durations) and configured time budgets",
+        )
+
+        # verify sub-command
+        verify_help = "verify installed packages files integrity in the current build environment"
+        verify_parser = sub_parsers.add_parser("verify", help=verify_help, description=verify_help)
+        _common_args(verify_parser)
+        verify_parser.set_defaults(func="verify", kwargs_map={"output": lambda o: o.output})  # type: ignore
+        verify_parser.add_argument(
+            "--output", metavar="FILE", type=Path, default=None, help="write JSON report to this file (instead of printing it to stdout)"
+        )
+
         # lock sub-command
         lock_help = "lock build environment packages versions"
         lock_parser = sub_parsers.add_parser("lock", help=lock_help, description=lock_help)
         _common_args(lock_parser)
-        lock_parser.set_defaults(func="lock")
+        lock_parser.set_defaults(
+            func="lock",
+            kwargs_map={
+                "hashes": lambda o: o.hashes,  # type: ignore
+                "find_links": lambda o: o.find_links,  # type: ignore
+                "wheelhouse": lambda o: o.wheelhouse,  # type: ignore
+                "dry_run": lambda o: o.dry_run,  # type: ignore
+            },
+        )
+        lock_parser.add_argument(
+            "--hashes", action="store_true", default=False, help="pin locked packages with their artifacts hashes (requirements based backends only)"
+        )
+        lock_parser.add_argument(
+            "--find-links",
+            action="append",
+            metavar="DIR",
+            type=Path,
+            default=[],
+            help="additional folder where to look for packages artifacts to be hashed (can be specified multiple times)",
+        )
+        lock_parser.add_argument(
+            "--wheelhouse",
+            metavar="DIR",
+            type=Path,
+            default=None,
+            help="collect wheels for all locked packages in this folder, and install them offline from there (requirements based backends only)",
+        )
+        lock_parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            default=False,
+            help="only print lock files generation plan (created/changed/unchanged files), without writing anything",
+        )
 
         # unlock sub-command
         unlock_help = "unlock build environment packages versions"
@@ -158,7 +246,47 @@ class BuildEnvParser:
         upgrade_help = "upgrade build environment packages to their latest version"
         upgrade_parser = sub_parsers.add_parser("upgrade", help=upgrade_help, description=upgrade_help)
         _common_args(upgrade_parser)
-        upgrade_parser.set_defaults(func="upgrade")
+        upgrade_parser.set_defaults(
+            func="upgrade",
+            kwargs_map={
+                "dry_run": lambda o: o.dry_run,  # type: ignore
+                "packages": lambda o: o.PACKAGE or None,  # type: ignore
+                "blue_green": lambda o: o.blue_green,  # type: ignore
+                "prepare": lambda o: o.prepare,  # type: ignore
+            },
+        )
+        upgrade_parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            default=False,
+            help="only resolve packages versions and print updates that would be done, without modifying the environment",
+        )
+        upgrade_parser.add_argument(
+            "--blue-green",
+            action="store_true",
+            default=False,
+            help="upgrade a staging copy of the environment, then swap it in atomically once validated (live environment is never half-upgraded)",
+        )
+        upgrade_parser.add_argument(
+            "--prepare",
+            action="store_true",
+            default=False,
+            help="only prepare the upgraded staging environment (e.g. from a background job), to be swapped in by a next --blue-green upgrade",
+        )
+        upgrade_parser.add_argument("PACKAGE", nargs="*", help="only upgrade these packages (and their dependencies, if required) instead of all packages")
+
+        # rollback sub-command
+        rollback_help = "roll back build environment to a previous generation (kept by upgrades), swapping it in instantly"
+        rollback_parser = sub_parsers.add_parser("rollback", help=rollback_help, description=rollback_help)
+        _common_args(rollback_parser)
+        rollback_parser.set_defaults(func="rollback", kwargs_map={"generation": lambda o: o.GENERATION})  # type: ignore
+        rollback_parser.add_argument("GENERATION", type=int, nargs="?", help="generation number (default: latest one)")
+
+        # generations sub-command
+        generations_help = "list kept build environment generations, with packages updates that a rollback to each of them would do"
+        generations_parser = sub_parsers.add_parser("generations", help=generations_help, description=generations_help)
+        _common_args(generations_parser)
+        generations_parser.set_defaults(func="generations")
 
         # Handle completion
         argcomplete.autocomplete(self._parser)
@@ -173,8 +301,9 @@ class BuildEnvParser:
             - list of additional project templates, if any
         """
 
-        # Parse project templates
-        all_templates = parse_project_templates(BuildEnvInfo(project_root=options.project_folder))
+        # Parse project templates manifests (templates classes are only loaded once selected)
+        info = BuildEnvInfo(project_root=options.project_folder)
+        all_templates = parse_project_templates_manifests(info)
         max_name_length = 0
         max_weight = 0
         main_templates_names: list[str] = []
@@ -257,7 +386,8 @@ class BuildEnvParser:
         # Ready to go
         _LOGGER.info(f"Main template: {main_template}")
         _LOGGER.info(f"Extra templates: {', '.join(extra_templates_names)}")
-        return (all_templates[main_template], [all_templates[t] for t in extra_templates_names])
+        loaded_templates = parse_project_templates(info, {main_template} | set(extra_templates_names))
+        return (loaded_templates[main_template], [loaded_templates[t] for t in extra_templates_names])
 
     def execute(self, args: list[str]) -> int:
         """
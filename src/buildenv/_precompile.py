@@ -0,0 +1,126 @@
+"""
+Installed packages bytecode precompilation, run after environment installs and upgrades.
+
+Precompilation mode is configured by the **BUILDENV_PRECOMPILE** environment variable:
+
+- **off** (default): nothing is precompiled here (bytecode is compiled on first import, as usual)
+- **lazy**: precompilation is run in a detached background process, out of the critical path
+- **eager**: precompilation is run immediately, with a pool of workers
+
+Files for which the **.pyc** file is already valid (i.e. matching source timestamp and size) are not recompiled.
+
+This module is standalone (i.e. it doesn't have any dependencies out of the raw python SDK), and can be invoked by loading scripts
+with the venv python interpreter:
+
+    <venv python> -m buildenv._precompile <venv folder>
+"""
+
+import compileall
+import logging
+import os
+import subprocess
+import sys
+import sysconfig
+import time
+from pathlib import Path
+
+PRECOMPILE_ENV_VAR = "BUILDENV_PRECOMPILE"
+"""Environment variable holding the precompilation mode"""
+
+PRECOMPILE_OFF = "off"
+"""Precompilation disabled"""
+
+PRECOMPILE_LAZY = "lazy"
+"""Precompilation in background"""
+
+PRECOMPILE_EAGER = "eager"
+"""Immediate precompilation"""
+
+_MODES = (PRECOMPILE_OFF, PRECOMPILE_LAZY, PRECOMPILE_EAGER)
+
+_LOGGER = logging.getLogger("buildenv")
+
+
+def precompile_mode() -> str:
+    """
+    Get the precompilation mode
+
+    :return: precompilation mode, read from **BUILDENV_PRECOMPILE** environment variable
+    """
+    mode = os.getenv(PRECOMPILE_ENV_VAR, "").strip().lower() or PRECOMPILE_OFF
+    assert mode in _MODES, f"Invalid {PRECOMPILE_ENV_VAR} value (expected one of {'/'.join(_MODES)}): {mode}"
+    return mode
+
+
+def site_packages(venv: Path) -> list[Path]:
+    """
+    Get the site-packages folders of a venv (for the running python version)
+
+    :param venv: venv root folder
+    :return: existing site-packages folders
+    """
+    scheme = sysconfig.get_paths(vars={"base": str(venv), "platbase": str(venv)})
+    return sorted(p for p in {Path(scheme["purelib"]), Path(scheme["platlib"])} if p.is_dir())
+
+
+def precompile(venv: Path, mode: str | None = None, logger: logging.Logger | None = None) -> bool:
+    """
+    Precompile venv installed packages bytecode
+
+    :param venv: venv root folder
+    :param mode: precompilation mode (default: see :func:`precompile_mode`)
+    :param logger: logger to use (default: buildenv logger)
+    :return: False if some files failed to be compiled, True otherwise
+    """
+
+    _logger = logger if logger else _LOGGER
+    mode = mode if mode is not None else precompile_mode()
+    folders = site_packages(venv)
+    if mode == PRECOMPILE_OFF or not folders:
+        return True
+
+    # Lazy mode: delegate to a detached eager process
+    if mode == PRECOMPILE_LAZY:
+        _logger.info("Precompiling installed packages in background...")
+        subprocess.Popen(
+            [sys.executable, "-m", "buildenv._precompile", str(venv)],
+            env=dict(os.environ, **{PRECOMPILE_ENV_VAR: PRECOMPILE_EAGER}),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return True
+
+    # Eager mode: compile with all cores (already valid .pyc files are skipped)
+    start = time.perf_counter()
+    success = True
+    for folder in folders:
+        success = compileall.compile_dir(folder, quiet=2, workers=0) and success
+    _logger.info(f"Precompiled installed packages in {time.perf_counter() - start:.2f}s")
+    if not success:
+        _logger.debug("Some installed files couldn't be compiled (e.g. syntax errors in packages data)")
+    return success
+
+
+def main(args: list[str]) -> int:
+    """
+    Precompilation command line entry point, for loading scripts
+
+    :param args: command line arguments (<venv folder>)
+    :return: 0 if precompilation was done (or not enabled), 1 otherwise
+    """
+
+    if len(args) != 1:
+        return 1
+    try:
+        precompile(Path(args[0]))
+    except AssertionError as e:
+        print(f"[WARNING] {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s", stream=sys.stdout)
+    sys.exit(main(sys.argv[1:]))
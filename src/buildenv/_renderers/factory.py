@@ -1,12 +1,14 @@
+import contextlib
 import logging
 import stat
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from jinja2 import Environment
 
-from .._utils import run_subprocess
-from ..extension import BuildEnvRenderer
-from .renderer import Keywords, Renderer
+from ..extension import BuildEnvRenderer, BuildEnvRenderItem
+from .git import GitIndexBatch
+from .renderer import Keywords, Renderer, RenderStatus
 
 
 # Default renderer used for non specific files
@@ -53,12 +55,12 @@ class _ShRenderer(Renderer):
     def comment_prefix(self) -> str:
         return "# "
 
-    def render(self, target: Path, executable: bool = False, keywords: Keywords | None = None):
+    def render(self, target: Path, executable: bool = False, keywords: Keywords | None = None, dry_run: bool = False, stream: bool = False) -> RenderStatus:
         # Super call
-        super().render(target, executable, keywords)
+        status = super().render(target, executable, keywords, dry_run, stream)
 
         # Make script executable if required
-        if executable:
+        if executable and not dry_run:
             # System chmod
             target.chmod(target.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
 
@@ -66,22 +68,25 @@ class _ShRenderer(Renderer):
             if (self._project_path is not None) and (target.is_relative_to(self._project_path)):
                 relative_target = target.relative_to(self._project_path)
 
-                # Git add
-                run_subprocess(["git", "add", str(relative_target)], cwd=self._project_path, error_msg=f"Failed to add {relative_target} to git index")
-
-                # Git chmod
-                run_subprocess(
-                    ["git", "update-index", "--chmod=+x", str(relative_target)],
-                    cwd=self._project_path,
-                    error_msg=f"Failed to set executable flag for {relative_target} in git index",
-                )
+                # Git add + chmod, even if unchanged (may not be tracked yet); batched with other files of the rendering session, if any
+                if self._git_index is not None:
+                    self._git_index.add(relative_target)
+                else:
+                    with GitIndexBatch(self._project_path, self._logger) as git_index:
+                        git_index.add(relative_target)
+        return status
 
 
 # Renderer factory
 class RendererFactory:
     @staticmethod
     def create(
-        template: Path, backend_name: str, environment: Environment | None = None, project_path: Path | None = None, logger: logging.Logger | None = None
+        template: Path,
+        backend_name: str,
+        environment: Environment | None = None,
+        project_path: Path | None = None,
+        logger: logging.Logger | None = None,
+        git_index: GitIndexBatch | None = None,
     ) -> Renderer:
         """
         Create a renderer for the given template
@@ -91,24 +96,49 @@ class RendererFactory:
         :param environment: Jinja2 environment to use for rendering
         :param project_path: Path to the project root for this rendering operation
         :param logger: Logger to use for this rendering operation
+        :param git_index: Git index batch collecting executable files for this rendering session
         """
         if template.suffixes == [".cmd", ".jinja"]:
-            return _CmdRenderer(template, backend_name, environment, project_path, logger)
+            return _CmdRenderer(template, backend_name, environment, project_path, logger, git_index)
         elif template.suffixes == [".sh", ".jinja"]:
-            return _ShRenderer(template, backend_name, environment, project_path, logger)
+            return _ShRenderer(template, backend_name, environment, project_path, logger, git_index)
         else:
-            return _DefaultRenderer(template, backend_name, environment, project_path, logger)
+            return _DefaultRenderer(template, backend_name, environment, project_path, logger, git_index)
 
 
 # Renderer adapter for contributed classes
 class RenderingAdapter(BuildEnvRenderer):
-    def __init__(self, target_path: Path, backend_name: str):
+    def __init__(
+        self,
+        target_path: Path,
+        backend_name: str,
+        project_path: Path | None = None,
+        logger: logging.Logger | None = None,
+        git_index: GitIndexBatch | None = None,
+    ):
         self._target_path = target_path
         self._backend_name = backend_name
+        self._project_path = project_path
+        self._logger = logger
+        self._git_index = git_index
 
-    def render(self, environment: Environment, template: str, executable: bool = False, keywords: Keywords | None = None, sub_path: Path | str | None = None):  # type: ignore
+    def _render_item(self, environment: Environment, item: BuildEnvRenderItem, git_index: GitIndexBatch | None, stream: bool = False):
         # Delegate rendering to the renderer factory
-        template_path = Path(template)
-        RendererFactory.create(template_path, self._backend_name, environment).render(
-            self._target_path / (sub_path or Path()) / template_path.name.replace(".jinja", ""), executable, keywords
+        template_path = Path(item.template)
+        RendererFactory.create(template_path, self._backend_name, environment, self._project_path, self._logger, git_index).render(
+            self._target_path / (item.sub_path or Path()) / template_path.name.replace(".jinja", ""), item.executable, item.keywords, stream=stream
         )
+
+    def render(self, environment: Environment, template: str, executable: bool = False, keywords: Keywords | None = None, sub_path: Path | str | None = None):  # type: ignore
+        self._render_item(environment, BuildEnvRenderItem(template, executable, keywords, sub_path), self._git_index)  # type: ignore
+
+    def render_many(self, environment: Environment, items: list[BuildEnvRenderItem]):
+        # Git index batch for this rendering session (if not provided)
+        session_git_index = GitIndexBatch(self._project_path, self._logger) if self._git_index is None and self._project_path is not None else None
+        git_index = self._git_index if self._git_index is not None else session_git_index
+
+        # Render items concurrently (streamed to disk)
+        with session_git_index if session_git_index is not None else contextlib.nullcontext(), ThreadPoolExecutor() as pool:
+            for future in [pool.submit(self._render_item, environment, item, git_index, True) for item in items]:
+                # Propagate errors (if any)
+                future.result()
@@ -0,0 +1,61 @@
+import logging
+import threading
+from pathlib import Path
+from types import TracebackType
+
+from .._utils import run_subprocess
+
+
+class GitIndexBatch:
+    """
+    Batch of executable files to be added to the project git index.
+    Files are collected during a rendering session, then flushed with one **git add** and one **git update-index --chmod=+x** calls.
+
+    :param project_path: Path to the project root (i.e. git working tree)
+    :param logger: Logger to use for git commands
+    """
+
+    def __init__(self, project_path: Path, logger: logging.Logger | None = None):
+        self._project_path = project_path
+        self._logger = logger
+        self._files: list[Path] = []
+        self._lock = threading.Lock()
+
+    def add(self, relative_target: Path):
+        """
+        Add executable file to the batch (may be called from concurrent rendering threads)
+
+        :param relative_target: Path to the file, relative to the project root
+        """
+        with self._lock:
+            if relative_target not in self._files:
+                self._files.append(relative_target)
+
+    def _run(self, args: list[str], error_msg: str) -> None:
+        # Batched call first
+        cp = run_subprocess(args + ["--"] + [str(f) for f in self._files], cwd=self._project_path, check=False, logger=self._logger)
+        if cp.returncode != 0:
+            # Retry file per file, to report errors for the culprit ones
+            for f in self._files:
+                run_subprocess(args + [str(f)], cwd=self._project_path, logger=self._logger, error_msg=error_msg.format(f))
+
+    def flush(self):
+        """
+        Add all collected files to git index, and set their executable flag
+        """
+
+        # Nothing to do?
+        if not self._files:
+            return
+
+        # Git add + git chmod
+        self._run(["git", "add"], "Failed to add {} to git index")
+        self._run(["git", "update-index", "--chmod=+x"], "Failed to set executable flag for {} in git index")
+        self._files.clear()
+
+    def __enter__(self) -> "GitIndexBatch":
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc_val: BaseException | None, exc_tb: TracebackType | None):
+        # Flush collected files, even if rendering session was interrupted
+        self.flush()
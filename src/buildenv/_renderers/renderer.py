@@ -1,14 +1,28 @@
+import contextlib
+import locale
 import logging
+import os
+import shutil
+import sys
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Literal
 
 from jinja2 import Environment, PackageLoader
 
-Keywords = dict[str, str | list[str] | bool | dict[str, str]]
+from .git import GitIndexBatch
+
+Keywords = dict[str, str | list[str] | bool | dict[str, str] | dict[str, list[str]]]
 """
 Type for keywords used in templates
 """
 
+RenderStatus = Literal["created", "changed", "unchanged"]
+"""
+Type for target file status after (or before, in dry-run mode) rendering
+"""
+
 
 class Renderer(ABC):
     """
@@ -19,16 +33,24 @@ class Renderer(ABC):
     :param environment: Jinja2 environment to use for rendering
     :param project_path: Path to the project root for this rendering operation
     :param logger: Logger to use for this rendering operation
+    :param git_index: Git index batch collecting executable files for this rendering session (if None, git index is updated immediately)
     """
 
     def __init__(
-        self, template: Path, backend_name: str, environment: Environment | None = None, project_path: Path | None = None, logger: logging.Logger | None = None
+        self,
+        template: Path,
+        backend_name: str,
+        environment: Environment | None = None,
+        project_path: Path | None = None,
+        logger: logging.Logger | None = None,
+        git_index: GitIndexBatch | None = None,
     ):
         self._template = template
         self._backend_name = backend_name
         self._environment = environment if environment is not None else Environment(loader=PackageLoader("buildenv", "_templates"))
         self._project_path = project_path
         self._logger = logger if logger is not None else logging.getLogger(self.__class__.__name__)
+        self._git_index = git_index
 
     @property
     @abstractmethod
@@ -54,15 +76,7 @@ class Renderer(ABC):
         """
         pass
 
-    def render(self, target: Path, executable: bool = False, keywords: Keywords | None = None):
-        """
-        Render template to target file
-
-        :param target: Target file to be generated
-        :param executable: States if target file as to be set as executable
-        :param keyword: Map of keywords provided to template
-        """
-
+    def _generate(self, keywords: Keywords | None) -> Iterator[bytes]:
         # Build keywords map
         all_keywords: Keywords = {
             "backend": self._backend_name,
@@ -72,12 +86,77 @@ class Renderer(ABC):
         if keywords is not None:
             all_keywords.update(keywords)
 
-        # Render template
-        generated_content = self._environment.get_template(self._template.as_posix()).render(all_keywords)
+        # Generate template chunks (with newlines and encoding as if written in text mode)
+        encoding = "utf-8" if sys.flags.utf8_mode else locale.getpreferredencoding(False)
+        for chunk in self._environment.get_template(self._template.as_posix()).generate(all_keywords):
+            yield chunk.replace("\n", self.new_line).encode(encoding)
+
+    def _render_stream(self, target: Path, keywords: Keywords | None, dry_run: bool) -> RenderStatus:
+        # Stream generated content to a temporary file, while comparing it with existing target
+        if not dry_run:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        temp_target = target.with_name(f".{target.name}.tmp")
+        exists = target.is_file()
+        same = exists
+        try:
+            with (
+                temp_target.open("wb") if not dry_run else contextlib.nullcontext() as out,
+                target.open("rb") if exists else contextlib.nullcontext() as existing,
+            ):
+                for chunk in self._generate(keywords):
+                    if out is not None:
+                        out.write(chunk)
+                    if same and existing is not None and existing.read(len(chunk)) != chunk:
+                        same = False
+                        if dry_run:
+                            # No need to go further
+                            break
+                else:
+                    same = same and existing is not None and not existing.read(1)
+        except BaseException:
+            temp_target.unlink(missing_ok=True)
+            raise
+
+        # Replace target only if changed (keeping its mode)
+        status: RenderStatus = "unchanged" if same else ("changed" if exists else "created")
+        if not dry_run:
+            if same:
+                temp_target.unlink()
+            else:
+                if exists:
+                    shutil.copymode(target, temp_target)
+                os.replace(temp_target, target)
+        return status
+
+    def render(self, target: Path, executable: bool = False, keywords: Keywords | None = None, dry_run: bool = False, stream: bool = False) -> RenderStatus:
+        """
+        Render template to target file (file is written only if its content changes)
+
+        :param target: Target file to be generated
+        :param executable: States if target file as to be set as executable
+        :param keyword: Map of keywords provided to template
+        :param dry_run: If True, only compute target file status, without writing it
+        :param stream: If True, stream generated content to disk (instead of rendering it in memory first); useful for large files
+        :return: target file status
+        """
+
+        # Streamed rendering
+        if stream:
+            return self._render_stream(target, keywords, dry_run)
+
+        # Render template in memory
+        generated_bytes = b"".join(self._generate(keywords))
 
-        # Create target directory if needed
-        target.parent.mkdir(parents=True, exist_ok=True)
+        # Compare with existing target
+        if not target.is_file():
+            status: RenderStatus = "created"
+        elif target.read_bytes() != generated_bytes:
+            status = "changed"
+        else:
+            status = "unchanged"
 
-        # Generate target
-        with target.open("w", newline=self.new_line) as f:
-            f.write(generated_content)
+        # Generate target (creating target directory if needed)
+        if status != "unchanged" and not dry_run:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(generated_bytes)
+        return status
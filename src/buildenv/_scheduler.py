@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from ._budgets import Budget, ExtensionsBudgets, ExtensionsTimings
+from ._utils import LOGGER_NAME
+from .aio import _HOOK_CALL, _HookCallState
+from .extension import BuildEnvExtension
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+JOBS_ENV_VAR = "BUILDENV_INIT_JOBS"
+"""Environment variable holding the max number of extensions hooks run concurrently"""
+
+
+def default_jobs() -> int:
+    """
+    Get the max number of extensions hooks to be run concurrently (extensions hooks are not required to be thread-safe,
+    so they are run serially unless concurrency is explicitly enabled)
+
+    :return: max concurrent jobs
+    """
+    return max(1, int(os.getenv(JOBS_ENV_VAR, "1")))
+
+
+def extensions_dependencies(extensions: dict[str, BuildEnvExtension]) -> dict[str, set[str]]:
+    """
+    Build extensions dependencies graph, from their **before**/**after** declarations (unknown extensions names are ignored)
+
+    :param extensions: map of extensions, indexed by name
+    :return: map of extensions names that must be run before each extension, indexed by extension name
+    """
+    deps: dict[str, set[str]] = {name: {a for a in ext.after if a in extensions and a != name} for name, ext in extensions.items()}
+    for name, ext in extensions.items():
+        for b in filter(lambda b: b in extensions and b != name, ext.before):
+            deps[b].add(name)
+    return deps
+
+
+def topological_order(deps: dict[str, set[str]]) -> list[str]:
+    """
+    Sort tasks so that each task comes after its dependencies (keeping input order as much as possible)
+
+    :param deps: map of dependencies, indexed by task name
+    :return: sorted tasks names
+    """
+
+    out: list[str] = []
+    remaining = list(deps.keys())
+    while remaining:
+        # First task with all dependencies sorted
+        ready = next((n for n in remaining if deps[n].issubset(out)), None)
+        if ready is None:
+            # Dependencies cycle: find it for error reporting
+            cycle = [remaining[0]]
+            while cycle.count(cycle[-1]) < 2:
+                cycle.append(sorted(deps[cycle[-1]] - set(out))[0])
+            cycle = cycle[cycle.index(cycle[-1]) :]
+            raise AssertionError(f"Dependencies cycle detected between extensions: {' -> '.join(reversed(cycle))}")
+        out.append(ready)
+        remaining.remove(ready)
+    return out
+
+
+async def _timed_call(name: str, label: str, task: Callable[[], Awaitable[None]], budget: Budget, timings: ExtensionsTimings | None, serial: bool):
+    # Await task (aborted if exceeding hard budget), and log elapsed time
+    # (synchronous hooks are called inline when run serially, unless a hard budget requires them to be run in a separated thread)
+    state = _HookCallState(inline=serial and budget.hard is None)
+    token = _HOOK_CALL.set(state)
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(task(), budget.hard)
+    except asyncio.TimeoutError as e:
+        # Threads can't be stopped: say so if some are still running
+        if any(t.is_alive() for t in state.threads):
+            raise TimeoutError(
+                f"exceeded its hard time budget ({budget.hard:g}s), but its synchronous code can't be stopped and is still running in background"
+            ) from e
+        raise TimeoutError(f"aborted, as it exceeded its hard time budget ({budget.hard:g}s)") from e
+    finally:
+        _HOOK_CALL.reset(token)
+        elapsed = time.perf_counter() - start
+        _LOGGER.debug(f"{name} extension {label} took {elapsed:.3f}s")
+        if timings is not None:
+            timings.record(name, label, elapsed)
+
+    # Check soft budget
+    if budget.soft is not None and elapsed > budget.soft:
+        _LOGGER.warning(f"{name} extension {label} took {elapsed:.3f}s, exceeding its soft time budget ({budget.soft:g}s)")
+
+
+async def _schedule(
+    tasks: dict[str, Callable[[], Awaitable[None]]],
+    deps: dict[str, set[str]],
+    label: str,
+    order: list[str],
+    jobs: int,
+    budgets: ExtensionsBudgets,
+    timings: ExtensionsTimings | None,
+) -> dict[str, Exception]:
+    # Tasks state
+    errors: dict[str, Exception] = {}
+    failed: set[str] = set()
+    finished = {name: asyncio.Event() for name in order}
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def run(name: str):
+        try:
+            # Wait for dependencies
+            for dep in deps[name]:
+                await finished[dep].wait()
+
+            # Don't run task if any of its dependencies failed
+            failed_deps = sorted(deps[name] & failed)
+            if failed_deps:
+                _LOGGER.debug(f"Skip {name} extension {label}, as {', '.join(failed_deps)} extension(s) {label} failed")
+                failed.add(name)
+                return
+
+            # Run task
+            async with semaphore:
+                await _timed_call(name, label, tasks[name], budgets.get(name, label), timings, jobs <= 1)
+        except Exception as e:
+            errors[name] = e
+            failed.add(name)
+        finally:
+            finished[name].set()
+
+    # Run tasks (serially or concurrently)
+    if jobs <= 1:
+        for name in order:
+            await run(name)
+    else:
+        await asyncio.gather(*(run(name) for name in order))
+    return errors
+
+
+def schedule(
+    tasks: dict[str, Callable[[], Awaitable[None]]],
+    deps: dict[str, set[str]],
+    label: str,
+    jobs: int | None = None,
+    timings: ExtensionsTimings | None = None,
+) -> dict[str, Exception]:
+    """
+    Run tasks coroutines concurrently on an asyncio loop, respecting their dependencies.
+    Tasks which dependencies failed are not run. Tasks are aborted if exceeding their hard time budget (see :class:`ExtensionsBudgets`).
+
+    :param tasks: map of tasks coroutine functions to run, indexed by name
+    :param deps: map of tasks dependencies, indexed by name (all names must be in tasks map)
+    :param label: tasks label, for logging
+    :param jobs: max number of tasks run concurrently (default: see :func:`default_jobs`)
+    :param timings: timings history where to record tasks durations (if any)
+    :return: map of tasks errors, indexed by task name (in tasks order, for deterministic reporting)
+    """
+
+    # Check dependencies
+    order = topological_order(deps)
+    if not order:
+        return {}
+
+    # Run tasks on a new loop
+    errors = asyncio.run(_schedule(tasks, deps, label, order, jobs if jobs is not None else default_jobs(), ExtensionsBudgets(), timings))
+    return {name: errors[name] for name in order if name in errors}
+
+
+def check_errors(errors: dict[str, Exception], single_error: str, multiple_errors: str):
+    """
+    Raise an AssertionError for scheduled tasks errors, if any
+
+    :param errors: map of tasks errors, indexed by task name
+    :param single_error: error message for a single error (formatted with task name)
+    :param multiple_errors: error message header for multiple errors
+    """
+    if len(errors) == 1:
+        name, e = next(iter(errors.items()))
+        raise AssertionError(f"{single_error.format(name)}: {e}") from e
+    if errors:
+        raise AssertionError(f"{multiple_errors}:\n" + "\n".join(f"- {name}: {e}" for name, e in errors.items())) from next(iter(errors.values()))
@@ -0,0 +1,219 @@
+"""
+Host-wide venv seeds cache, holding pre-unpacked installer packages (pip, setuptools, wheel) per Python interpreter.
+
+Creating a venv with pip through **ensurepip** takes several seconds, as pip is unpacked and installed from scratch each time.
+Seeded venvs are instead created without pip, then seed packages are hardlinked (or copied) in their site-packages.
+Seeds are published by the **pip** backend from its own venv, and keyed on the Python implementation, version and platform.
+
+This module is standalone (i.e. it doesn't have any dependencies out of the raw python SDK), as it is copied in the seeds root folder,
+to be invoked by loading scripts before the venv exists (with the python interpreter used to create the venv):
+
+    python <seeds>/seed.py create <venv folder>
+"""
+
+import base64
+import csv
+import hashlib
+import io
+import os
+import shutil
+import sys
+import sysconfig
+from pathlib import Path
+from venv import EnvBuilder
+
+SEED_PACKAGES = ["pip", "setuptools", "wheel"]
+"""Packages published in seeds (pip is mandatory)"""
+
+# Copied seed module name in seeds root
+_SEED_SCRIPT = "seed.py"
+
+# Seed entry content
+_ENTRY_SITE_PACKAGES = "site-packages"
+_ENTRY_SCRIPTS = "scripts"
+
+# Scripts shebang placeholder in seeds (as in wheels)
+_SHEBANG_PLACEHOLDER = b"#!python"
+
+
+def seed_key() -> str:
+    """
+    Get the seed key for the running interpreter
+
+    :return: seed key (python implementation, version and platform)
+    """
+    return f"{sys.implementation.name}-{'.'.join(map(str, sys.version_info[:3]))}-{sysconfig.get_platform()}"
+
+
+def _venv_paths(venv: Path) -> tuple[Path, Path]:
+    # Site-packages and scripts folders of a venv (explicit scheme, as default one may be patched by distributions out of venvs)
+    scheme = sysconfig.get_paths(scheme="posix_prefix", vars={"base": str(venv), "platbase": str(venv)})
+    return Path(scheme["purelib"]), Path(scheme["scripts"])
+
+
+def _link(src: Path, dst: Path):
+    # Hardlink file (or copy it, e.g. when crossing file systems)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _fix_records(site_packages: Path, scripts: dict[str, bytes]):
+    # Update RECORD rows (hash + size) of generated scripts, so that the venv is verified as sane
+    # (RECORD files are replaced, as they are linked to the seed ones)
+    for record in site_packages.glob("*.dist-info/RECORD"):
+        with record.open(newline="") as f:
+            rows = [row for row in csv.reader(f) if row]
+        changed = False
+        for row in rows:
+            content = scripts.get(os.path.normpath(site_packages / row[0]))
+            if content is not None and len(row) >= 3 and "=" in row[1]:
+                algorithm = row[1].split("=", 1)[0]
+                row[1] = f"{algorithm}=" + base64.urlsafe_b64encode(hashlib.new(algorithm, content).digest()).rstrip(b"=").decode()
+                row[2] = str(len(content))
+                changed = True
+        if changed:
+            out = io.StringIO()
+            csv.writer(out, lineterminator="\n").writerows(rows)
+            record.unlink()
+            record.write_text(out.getvalue())
+
+
+class SeedsCache:
+    """
+    Venv seeds cache
+
+    :param root: seeds cache root folder
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def has(self, key: str) -> bool:
+        """
+        Check if a seed is available
+
+        :param key: seed key
+        :return: True if seed is cached
+        """
+        return (self.root / key).is_dir()
+
+    def publish(self, venv: Path) -> bool:
+        """
+        Publish seed packages installed in a venv (if not already done for the running interpreter)
+
+        :param venv: venv folder, holding installed seed packages
+        :return: True if a new seed was published
+        """
+
+        # Already published?
+        key = seed_key()
+        if self.has(key):
+            return False
+
+        # Collect seed packages files from their RECORD
+        site_packages, scripts = _venv_paths(venv.resolve())
+        files: list[Path] = []
+        for name in SEED_PACKAGES:
+            record = next(site_packages.glob(f"{name}-*.dist-info/RECORD"), None)
+            if record is None:
+                if name == SEED_PACKAGES[0]:
+                    return False
+                continue
+            with record.open(newline="") as f:
+                files.extend(Path(os.path.normpath(site_packages / row[0])) for row in csv.reader(f) if row)
+
+        # Publish in a temporary folder, then move in place
+        entry = self.root / key
+        tmp_entry = entry.with_name(f"{key}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        for file in filter(Path.is_file, files):
+            if file.is_relative_to(site_packages):
+                target = tmp_entry / _ENTRY_SITE_PACKAGES / file.relative_to(site_packages)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(file, target)
+            elif file.parent == scripts:
+                # Scripts shebang is replaced with a placeholder
+                target = tmp_entry / _ENTRY_SCRIPTS / file.name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                lines = file.read_bytes().split(b"\n", 1)
+                target.write_bytes(b"\n".join([_SHEBANG_PLACEHOLDER] + lines[1:]) if lines[0].startswith(b"#!") else file.read_bytes())
+        try:
+            tmp_entry.rename(entry)
+        except OSError:
+            # Published concurrently by another process
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return False
+
+        # Copy this module in seeds root, for loading scripts
+        script = self.root / _SEED_SCRIPT
+        own_source = Path(__file__).read_bytes()
+        if not script.is_file() or script.read_bytes() != own_source:
+            script.write_bytes(own_source)
+        return True
+
+    def create(self, venv: Path) -> bool:
+        """
+        Create a venv (for the running interpreter), seeded from cache
+
+        :param venv: venv folder to be created
+        :return: True if venv was created, False if there is no seed for the running interpreter
+        """
+
+        entry = self.root / seed_key()
+        if not entry.is_dir():
+            return False
+
+        try:
+            # Create venv without pip
+            EnvBuilder(symlinks=os.name != "nt", with_pip=False).create(venv)
+            site_packages, scripts = _venv_paths(venv.resolve())
+
+            # Link seed packages files
+            seed_site_packages = entry / _ENTRY_SITE_PACKAGES
+            for root, _, files in os.walk(seed_site_packages):
+                for name in files:
+                    src = Path(root) / name
+                    _link(src, site_packages / src.relative_to(seed_site_packages))
+
+            # Generate scripts, with venv python shebang
+            python = (scripts / Path(sys.executable).name).as_posix().encode()
+            seed_scripts = entry / _ENTRY_SCRIPTS
+            generated: dict[str, bytes] = {}
+            for src in seed_scripts.iterdir() if seed_scripts.is_dir() else []:
+                target = scripts / src.name
+                content = src.read_bytes()
+                if content.startswith(_SHEBANG_PLACEHOLDER):
+                    content = b"#!" + python + content[len(_SHEBANG_PLACEHOLDER) :]
+                    generated[os.path.normpath(target)] = content
+                target.write_bytes(content)
+                target.chmod(0o755)
+            _fix_records(site_packages, generated)
+        except OSError:
+            # Will be created from scratch by caller
+            shutil.rmtree(venv, ignore_errors=True)
+            return False
+        return True
+
+
+def main(args: list[str]) -> int:
+    """
+    Seeds command line entry point, for loading scripts
+
+    :param args: command line arguments (create <venv folder>)
+    :return: 0 if venv was created, 1 otherwise
+    """
+
+    # Scripts can't be generated for Windows, as they require launchers
+    if len(args) != 2 or args[0] != "create" or os.name == "nt":
+        return 1
+    if SeedsCache(Path(__file__).parent).create(Path(args[1])):
+        print(f"[INFO] {args[1]} created from seeds cache")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main(sys.argv[1:]))
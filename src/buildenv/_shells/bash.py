@@ -34,8 +34,16 @@ class BashShell(EnvShell):
         assert bash_path.is_file(), f"Invalid bash path: {bash_path}"
         return str(bash_path)
 
-    def __init__(self, venv_bin: Path, fake_pip: bool, backend_name: str, extensions: dict[str, BuildEnvExtension], completions: list[CompletionCommand]):
-        super().__init__(venv_bin, fake_pip, backend_name, extensions, completions)
+    def __init__(
+        self,
+        venv_bin: Path,
+        state_folder: Path,
+        fake_pip: bool,
+        backend_name: str,
+        extensions: dict[str, BuildEnvExtension],
+        completions: list[CompletionCommand],
+    ):
+        super().__init__(venv_bin, state_folder, fake_pip, backend_name, extensions, completions)
 
         # Detect shell path
         self._shell_path: str = self._detect_shell_path()
@@ -10,8 +10,16 @@ from .shell import EnvShell
 class CmdShell(EnvShell):
     NAME = "cmd"
 
-    def __init__(self, venv_bin: Path, fake_pip: bool, backend_name: str, extensions: dict[str, BuildEnvExtension], completions: list[CompletionCommand]):
-        super().__init__(venv_bin, fake_pip, backend_name, extensions, completions)
+    def __init__(
+        self,
+        venv_bin: Path,
+        state_folder: Path,
+        fake_pip: bool,
+        backend_name: str,
+        extensions: dict[str, BuildEnvExtension],
+        completions: list[CompletionCommand],
+    ):
+        super().__init__(venv_bin, state_folder, fake_pip, backend_name, extensions, completions)
         self._shell_path = "cmd"
 
     @classmethod
@@ -14,13 +14,20 @@ KNOWN_SHELLS = {shell_cls.NAME: shell_cls for shell_cls in (BashShell, CmdShell)
 class ShellFactory:
     @staticmethod
     def create(
-        name: str, venv_bin: Path, fake_pip: bool, backend_name: str, extensions: dict[str, BuildEnvExtension], completions: list[CompletionCommand]
+        name: str,
+        venv_bin: Path,
+        state_folder: Path,
+        fake_pip: bool,
+        backend_name: str,
+        extensions: dict[str, BuildEnvExtension],
+        completions: list[CompletionCommand],
     ) -> EnvShell:
         """
         Detect shell implementation from environment and OS
 
         :param name: shell name to use
         :param venv_bin: path to virtual env bin folder
+        :param state_folder: path to project state folder (for extensions timings)
         :param fake_pip: True if pip command shall be faked
         :param backend_name: name of the backend
         :param extensions: dict of contributed extensions
@@ -37,4 +44,4 @@ class ShellFactory:
         shell_class.check_supported()
 
         # Return shell instance
-        return shell_class(venv_bin, fake_pip, backend_name, extensions, completions)
+        return shell_class(venv_bin, state_folder, fake_pip, backend_name, extensions, completions)
@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 import subprocess
@@ -5,10 +6,12 @@ from abc import ABC, abstractmethod
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
+from .._budgets import ExtensionsTimings
 from .._renderers.factory import Keywords, RendererFactory, RenderingAdapter
+from .._scheduler import check_errors, extensions_dependencies, schedule
 from .._utils import LOGGER_NAME, contribute_path
 from ..completion import CompletionCommand
-from ..extension import BuildEnvExtension
+from ..extension import BuildEnvEnvironment, BuildEnvExtension
 
 # Templates folder
 _TEMPLATES_ROOT_FOLDER = Path(__file__).parent / "templates"
@@ -16,8 +19,17 @@ _TEMPLATES_ROOT_FOLDER = Path(__file__).parent / "templates"
 
 # Build environment shell abstraction class
 class EnvShell(ABC):
-    def __init__(self, venv_bin: Path, fake_pip: bool, backend_name: str, extensions: dict[str, BuildEnvExtension], completions: list[CompletionCommand]):
+    def __init__(
+        self,
+        venv_bin: Path,
+        state_folder: Path,
+        fake_pip: bool,
+        backend_name: str,
+        extensions: dict[str, BuildEnvExtension],
+        completions: list[CompletionCommand],
+    ):
         self._venv_bin = venv_bin
+        self._state_folder = state_folder
         self._fake_pip = fake_pip
         self._backend_name = backend_name
         self._extensions = extensions
@@ -80,6 +92,17 @@ class EnvShell(ABC):
         if "PYTHONHOME" in env:
             del env["PYTHONHOME"]  # Remove PYTHONHOME to avoid conflicts
 
+        # Extensions contributions (in extensions order)
+        for ext_name, contribution in self._get_extensions_environment().items():
+            for var, value in contribution.variables.items():
+                if var in env and env[var] != value:
+                    self._logger.debug(f"{ext_name} extension overrides {var} environment variable")
+                env[var] = value
+            for folder in reversed(contribution.path_prepend):
+                contribute_path(env, folder)
+            for folder in contribution.path_append:
+                contribute_path(env, folder, append=True)
+
         # PATH contributions
         if self._fake_pip:
             contribute_path(env, tmp_dir / "bin")  # temporary bin folder
@@ -157,26 +180,61 @@ class EnvShell(ABC):
 
     # Get completion commands from extensions
     def _get_completion_commands(self) -> list[CompletionCommand]:
-        # Iterate on extensions
-        completion_commands = list(self._completions)
-        for ext_name, extension in self._extensions.items():
-            # Get extension contributed completion commands
-            try:
-                completion_commands += extension.get_completion_commands()
-            except Exception as e:
-                raise AssertionError(f"Error occurred while getting {ext_name} extension completion commands: {e}") from e
-        return completion_commands
+        # Get extensions contributed completion commands (concurrently)
+        ext_commands: dict[str, list[CompletionCommand]] = {}
+
+        async def get_commands(ext_name: str, extension: BuildEnvExtension):
+            ext_commands[ext_name] = await extension.aget_completion_commands()
+
+        timings = ExtensionsTimings(self._state_folder)
+        errors = schedule(
+            {ext_name: functools.partial(get_commands, ext_name, extension) for ext_name, extension in self._extensions.items()},
+            extensions_dependencies(self._extensions),
+            "completion commands",
+            timings=timings,
+        )
+        timings.save()
+        check_errors(errors, "Error occurred while getting {} extension completion commands", "Errors occurred while getting extensions completion commands")
+
+        # Aggregate commands (in extensions order)
+        return list(self._completions) + [c for ext_name in self._extensions for c in ext_commands[ext_name]]
+
+    # Get environment contributions from extensions
+    def _get_extensions_environment(self) -> dict[str, BuildEnvEnvironment]:
+        # Get extensions contributed environment (concurrently)
+        ext_envs: dict[str, BuildEnvEnvironment | None] = {}
+
+        async def get_environment(ext_name: str, extension: BuildEnvExtension):
+            ext_envs[ext_name] = await extension.aget_environment()
+
+        timings = ExtensionsTimings(self._state_folder)
+        errors = schedule(
+            {ext_name: functools.partial(get_environment, ext_name, extension) for ext_name, extension in self._extensions.items()},
+            extensions_dependencies(self._extensions),
+            "environment",
+            timings=timings,
+        )
+        timings.save()
+        check_errors(errors, "Error occurred while getting {} extension environment", "Errors occurred while getting extensions environment")
+
+        # Contributions, in extensions order
+        return {ext_name: env for ext_name in self._extensions if (env := ext_envs[ext_name]) is not None}
 
     # Generate extensions activation scripts
     def _generate_extensions_scripts(self, tmp_dir: Path):
-        # Iterate on extensions
+        # Generate extensions activation scripts (concurrently, through renderer adapter)
         renderer = RenderingAdapter(tmp_dir, self._backend_name)
-        for ext_name, extension in self._extensions.items():
-            # Generate extension activation scripts (through renderer adapter)
-            try:
-                extension.generate_activation_scripts(renderer)
-            except Exception as e:
-                raise AssertionError(f"Error occurred while generating {ext_name} extension activation scripts: {e}") from e
+        timings = ExtensionsTimings(self._state_folder)
+        errors = schedule(
+            {ext_name: functools.partial(extension.agenerate_activation_scripts, renderer) for ext_name, extension in self._extensions.items()},
+            extensions_dependencies(self._extensions),
+            "activation scripts",
+            timings=timings,
+        )
+        timings.save()
+        check_errors(
+            errors, "Error occurred while generating {} extension activation scripts", "Errors occurred while generating extensions activation scripts"
+        )
 
     def _get_pip_stub_wording(self) -> list[str]:
         """
@@ -0,0 +1,72 @@
+"""
+Blue/green environments upgrades support.
+
+Upgraded environments are built in a staging folder next to the live one (cheaply cloned from it), then swapped in atomically,
+so that the live environment is never half-upgraded.
+"""
+
+import ctypes
+import logging
+import os
+import sys
+from pathlib import Path
+
+from ._utils import LOGGER_NAME
+
+STAGING_SUFFIX = ".staging"
+"""Staging venv folder name suffix"""
+
+READY_MARKER = ".buildenv_ready"
+"""Marker file in a staging venv, stating that it is upgraded and validated (holding the live packages versions it was built from)"""
+
+# Linux renameat2 system call parameters
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+def staging_folder(venv: Path) -> Path:
+    """
+    Get staging folder for a venv
+
+    :param venv: live venv folder
+    :return: staging venv folder (next to the live one)
+    """
+    return venv.with_name(f"{venv.name}{STAGING_SUFFIX}")
+
+
+def _renameat2_exchange(a: Path, b: Path) -> bool:
+    # Atomic exchange (Linux only)
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE) == 0:
+            return True
+        _LOGGER.debug(f"Atomic folders exchange failed: {os.strerror(ctypes.get_errno())}")
+    except (OSError, AttributeError):  # pragma: no cover -- no renameat2 in libc
+        pass
+    return False
+
+
+def exchange_folders(a: Path, b: Path):
+    """
+    Exchange two folders atomically (with **renameat2** system call on Linux), or with successive renames if not supported
+
+    :param a: first folder
+    :param b: second folder
+    """
+
+    if _renameat2_exchange(a, b):
+        return
+
+    # Fallback to successive renames (restoring first folder on failure)
+    tmp = a.with_name(f"{a.name}.swap-{os.getpid()}")
+    a.rename(tmp)
+    try:
+        b.rename(a)
+    except OSError:  # pragma: no cover -- e.g. busy folder on Windows
+        tmp.rename(a)
+        raise
+    tmp.rename(b)
@@ -0,0 +1,407 @@
+"""
+Shared venv store, holding fully built environments for the whole host.
+
+Store entries are keyed on the lockfile content, the Python interpreter (read from the venv config file) and the backend name;
+new projects (or git worktrees) with the same lock get a cheap clone of the stored venv
+(reflinks or hardlinks, with absolute paths fix-up in scripts and venv config files).
+
+This module is standalone (i.e. it doesn't have any dependencies out of the raw python SDK), as it is
+copied in the store root folder, to be invoked by loading scripts before the venv exists:
+
+    python <store>/store.py clone <backend> <venv folder> <lockfile>...
+
+(with the python interpreter that would be used to create the venv, as the store key depends on it)
+"""
+
+import base64
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+STORE_ENV_VAR = "BUILDENV_STORE"
+"""Environment variable holding the store root folder path (store is disabled if not set)"""
+
+MAX_SIZE_ENV_VAR = "BUILDENV_STORE_MAX_SIZE"
+"""Environment variable holding the store max size, in MB"""
+
+MAX_AGE_ENV_VAR = "BUILDENV_STORE_MAX_AGE"
+"""Environment variable holding the store entries max age (since last use), in days"""
+
+STORED_MARKER = ".stored"
+"""Marker file in a venv, holding the key of the store entry it has been published to (or cloned from)"""
+
+# Default trimming limits
+_DEFAULT_MAX_SIZE = 10 * 1024  # MB
+_DEFAULT_MAX_AGE = 30  # days
+
+# Store entry content
+_ENTRY_VENV = "venv"
+_ENTRY_META = "meta.json"
+_ENTRY_LAST_USED = "last_used"
+
+# Copied store module name in store root
+_STORE_SCRIPT = "store.py"
+
+# Venv root items specific to the projects using a venv (never shared through the store)
+_PROJECT_ITEMS = (".buildenv_projects", ".buildenv_extensions.json", ".buildenv_timings.json")
+
+# Linux reflink ioctl
+_FICLONE = 0x40049409
+_reflink_supported = sys.platform.startswith("linux")
+
+_LOGGER = logging.getLogger("buildenv")
+
+
+def store_root() -> Path | None:
+    """
+    Get the shared venv store root folder, if enabled
+
+    :return: store root folder, or None if the store is disabled
+    """
+    root = os.getenv(STORE_ENV_VAR, "")
+    return Path(root) if root and os.name != "nt" else None
+
+
+def python_tag(venv: Path | None = None) -> str:
+    """
+    Get the Python interpreter tag of a venv (read from its config file), or of the running interpreter
+
+    :param venv: venv folder (default: running interpreter)
+    :return: python interpreter tag (implementation, version and platform)
+    """
+    implementation, version = sys.implementation.name, f"{sys.version_info.major}.{sys.version_info.minor}"
+    config = venv / "pyvenv.cfg" if venv is not None else None
+    if config is not None and config.is_file():
+        values = {k.strip(): v.strip() for k, _, v in (line.partition("=") for line in config.read_text().splitlines())}
+        implementation = values.get("implementation", implementation).lower()
+        version = ".".join((values.get("version_info") or values.get("version") or version).split(".")[:2])
+    return f"{implementation}-{version}-{sys.platform}"
+
+
+def store_key(backend: str, lock_files: list[Path], python: str) -> str:
+    """
+    Compute store key for an environment
+
+    :param backend: backend name
+    :param lock_files: lock files describing the environment content
+    :param python: python interpreter tag of the environment (see :func:`python_tag`)
+    :return: store key
+    """
+    h = hashlib.sha256(f"{backend}\n{python}\n".encode())
+    for lock_file in lock_files:
+        h.update(lock_file.name.encode() + b"\n" + lock_file.read_bytes())
+    return h.hexdigest()[:32]
+
+
+def _needs_fixup(relative: Path) -> bool:
+    # Files which may hold absolute paths to the venv or the project
+    return (
+        relative.parts[0] in ("bin", "Scripts")
+        or relative.name in ("pyvenv.cfg", "direct_url.json")
+        or relative.suffix == ".pth"
+        or relative.name.startswith("__editable__")
+    )
+
+
+def _root_replacements(old_root: Path, new_root: Path) -> list[tuple[re.Pattern[bytes], bytes]]:
+    # Patterns matching the old root path (native and posix forms) as a whole path prefix, i.e. followed by a path separator
+    # or by the end of the path (end of content, white space, quote, or paths list separator), with their escaped replacements
+    forms = {str(old_root): str(new_root), old_root.as_posix(): new_root.as_posix()}
+    return [(re.compile(re.escape(old.encode()) + rb"(?=[/\\\s\"':;,]|$)"), new.encode().replace(b"\\", b"\\\\")) for old, new in forms.items()]
+
+
+def _replace_roots(content: bytes, replacements: list[tuple[re.Pattern[bytes], bytes]]) -> bytes:
+    # Replace root path in content
+    for pattern, new in replacements:
+        content = pattern.sub(new, content)
+    return content
+
+
+def _fix_records(venv: Path, rewritten: set[str]):
+    # Update RECORD rows (hash + size) of fixed up files, so that the venv is still verified as sane
+    # (RECORD files are replaced, so that files linked to other trees are preserved)
+    if not rewritten:
+        return
+    for record in [*venv.glob("lib/*/site-packages/*.dist-info/RECORD"), *venv.glob("Lib/site-packages/*.dist-info/RECORD")]:
+        with record.open(newline="") as f:
+            rows = [row for row in csv.reader(f) if row]
+        changed = False
+        for row in rows:
+            location = os.path.normpath(record.parent.parent / row[0])
+            if location in rewritten and len(row) >= 3 and "=" in row[1]:
+                content = Path(location).read_bytes()
+                algorithm = row[1].split("=", 1)[0]
+                row[1] = f"{algorithm}=" + base64.urlsafe_b64encode(hashlib.new(algorithm, content).digest()).rstrip(b"=").decode()
+                row[2] = str(len(content))
+                changed = True
+        if changed:
+            out = io.StringIO()
+            csv.writer(out, lineterminator="\n").writerows(rows)
+            tmp = record.with_name(f"RECORD.relocate-{os.getpid()}")
+            tmp.write_text(out.getvalue())
+            os.replace(tmp, record)
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    # Try to clone file with copy-on-write (Linux only; disabled after first failure)
+    global _reflink_supported
+    if not _reflink_supported:
+        return False
+    try:
+        import fcntl
+
+        with src.open("rb") as fs, dst.open("wb") as fd:
+            fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except (ImportError, OSError):
+        _reflink_supported = False
+        dst.unlink(missing_ok=True)
+        return False
+
+
+def _link_file(src: Path, dst: Path):
+    # Reflink, or hardlink, or copy
+    if _reflink(src, dst):
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def link_tree(src: Path, dst: Path, old_root: Path | None = None, new_root: Path | None = None, excluded: tuple[str, ...] = ()) -> int:
+    """
+    Clone a venv tree, linking files when possible, and fixing up absolute paths in scripts and config files
+    (along with their hashes in installed distributions RECORD files)
+
+    :param src: source venv folder
+    :param dst: destination venv folder (must not exist)
+    :param old_root: root path to be replaced in files needing a fix-up (None for no fix-up)
+    :param new_root: replacement root path
+    :param excluded: names of venv root items not to be cloned
+    :return: total size of cloned files
+    """
+
+    # Prepare replacements
+    replacements: list[tuple[re.Pattern[bytes], bytes]] = []
+    if old_root is not None and new_root is not None and old_root != new_root:
+        replacements = _root_replacements(old_root, new_root)
+
+    total_size = 0
+    rewritten: set[str] = set()
+    for root, dirs, files in os.walk(src):
+        root_path = Path(root)
+        dst_root = dst / root_path.relative_to(src)
+        dst_root.mkdir(parents=True, exist_ok=True)
+        if root_path == src:
+            dirs[:] = [d for d in dirs if d not in excluded]
+            files = [f for f in files if f not in excluded]
+        for name in list(dirs) + files:
+            src_item = root_path / name
+            dst_item = dst_root / name
+            relative = src_item.relative_to(src)
+
+            # Symbolic link: replicate (with fixed up target)
+            if src_item.is_symlink():
+                target = os.fsdecode(_replace_roots(os.fsencode(os.readlink(src_item)), replacements))
+                os.symlink(target, dst_item)
+                if name in dirs:
+                    dirs.remove(name)
+                continue
+            if name in dirs:
+                continue
+
+            # Regular file: fix up, or link
+            total_size += src_item.stat().st_size
+            if replacements and _needs_fixup(relative):
+                content = src_item.read_bytes()
+                fixed = _replace_roots(content, replacements)
+                if fixed != content:
+                    dst_item.write_bytes(fixed)
+                    shutil.copymode(src_item, dst_item)
+                    rewritten.add(os.path.normpath(dst_item))
+                    continue
+            _link_file(src_item, dst_item)
+    _fix_records(dst, rewritten)
+    return total_size
+
+
+def relocate_tree(venv: Path, old_root: Path, new_root: Path):
+    """
+    Fix up absolute paths in scripts and config files of a venv tree (along with their hashes in installed distributions RECORD files), in place
+    (fixed up files are replaced, so that files linked to other trees are preserved)
+
+    :param venv: venv folder
+    :param old_root: root path to be replaced
+    :param new_root: replacement root path
+    """
+    replacements = _root_replacements(old_root, new_root)
+    rewritten: set[str] = set()
+    for root, _, files in os.walk(venv):
+        for name in files:
+            path = Path(root) / name
+            if path.is_symlink() or not _needs_fixup(path.relative_to(venv)):
+                continue
+            content = path.read_bytes()
+            fixed = _replace_roots(content, replacements)
+            if fixed != content:
+                tmp = path.with_name(f"{name}.relocate-{os.getpid()}")
+                tmp.write_bytes(fixed)
+                shutil.copymode(path, tmp)
+                os.replace(tmp, path)
+                rewritten.add(os.path.normpath(path))
+    _fix_records(venv, rewritten)
+
+
+class VenvStore:
+    """
+    Shared venv store
+
+    :param root: store root folder
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def entry(self, key: str) -> Path:
+        """
+        Get store entry folder
+
+        :param key: store key
+        :return: entry folder path (may not exist)
+        """
+        return self.root / key
+
+    def has(self, key: str) -> bool:
+        """
+        Check if store holds an entry for this key
+
+        :param key: store key
+        :return: True if entry exists
+        """
+        return (self.entry(key) / _ENTRY_META).is_file()
+
+    def clone(self, key: str, venv: Path) -> bool:
+        """
+        Clone stored venv to provided venv folder
+
+        :param key: store key
+        :param venv: destination venv folder (will be replaced)
+        :return: True if venv was cloned, False if no matching entry in store
+        """
+
+        # Check entry
+        if not self.has(key):
+            return False
+        entry = self.entry(key)
+        meta = json.loads((entry / _ENTRY_META).read_text())
+
+        # Clone in a temporary folder, then move in place
+        venv = venv.absolute()
+        tmp_venv = venv.with_name(f"{venv.name}.clone-{os.getpid()}")
+        shutil.rmtree(tmp_venv, ignore_errors=True)
+        link_tree(entry / _ENTRY_VENV, tmp_venv, Path(meta["root"]), venv.parent, _PROJECT_ITEMS)
+        (tmp_venv / STORED_MARKER).write_text(key)
+        shutil.rmtree(venv, ignore_errors=True)
+        tmp_venv.rename(venv)
+
+        # Remember last use
+        (entry / _ENTRY_LAST_USED).touch()
+        return True
+
+    def publish(self, key: str, venv: Path, backend: str):
+        """
+        Publish venv in store (if not already done), then trim store
+
+        :param key: store key
+        :param venv: venv folder to be published
+        :param backend: backend name
+        """
+
+        if not self.has(key):
+            # Publish in a temporary folder, then move in place
+            entry = self.entry(key)
+            tmp_entry = entry.with_name(f"{key}.tmp-{os.getpid()}")
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            size = link_tree(venv, tmp_entry / _ENTRY_VENV, excluded=_PROJECT_ITEMS)
+            (tmp_entry / _ENTRY_META).write_text(
+                json.dumps({"root": str(venv.parent), "backend": backend, "python": python_tag(venv), "size": size, "created": time.time()})
+            )
+            (tmp_entry / _ENTRY_LAST_USED).touch()
+            try:
+                tmp_entry.rename(entry)
+            except OSError:  # pragma: no cover -- concurrent publication
+                shutil.rmtree(tmp_entry, ignore_errors=True)
+
+        # Remember publication in venv (new file, to preserve the possibly linked one in store)
+        marker = venv / STORED_MARKER
+        marker.unlink(missing_ok=True)
+        marker.write_text(key)
+
+        # Refresh store script (for loading scripts)
+        script = self.root / _STORE_SCRIPT
+        own_source = Path(__file__).read_bytes()
+        if not script.is_file() or script.read_bytes() != own_source:
+            script.write_bytes(own_source)
+
+        # Trim store
+        self.trim(int(os.getenv(MAX_SIZE_ENV_VAR, str(_DEFAULT_MAX_SIZE))) * 1024 * 1024, int(os.getenv(MAX_AGE_ENV_VAR, str(_DEFAULT_MAX_AGE))) * 86400)
+
+    def trim(self, max_size: int, max_age: int):
+        """
+        Trim store, evicting least recently used entries
+
+        :param max_size: max store size, in bytes
+        :param max_age: max entry age since last use, in seconds
+        """
+
+        # Sort entries by last use (most recent first)
+        entries: list[tuple[float, int, Path]] = []
+        for meta in self.root.glob(f"*/{_ENTRY_META}"):
+            entry = meta.parent
+            last_used = entry / _ENTRY_LAST_USED
+            entries.append((last_used.stat().st_mtime if last_used.is_file() else 0.0, int(json.loads(meta.read_text())["size"]), entry))
+        entries.sort(key=lambda e: e[0], reverse=True)
+
+        # Evict too old entries, then least recently used ones until size is OK
+        now = time.time()
+        total_size = 0
+        for last_used, size, entry in entries:
+            total_size += size
+            if (now - last_used > max_age) or (total_size > max_size):
+                _LOGGER.debug(f"Evict {entry.name} entry from venv store")
+                shutil.rmtree(entry, ignore_errors=True)
+                total_size -= size
+
+
+def main(args: list[str]) -> int:
+    """
+    Store command line entry point, for loading scripts (to be invoked with the python interpreter used to create the venv)
+
+    :param args: command line arguments (clone <backend> <venv folder> <lockfile>...)
+    :return: 0 if venv was cloned, 1 otherwise
+    """
+
+    root = store_root()
+    if root is None or len(args) < 4 or args[0] != "clone":
+        return 1
+    backend, venv, lock_files = args[1], Path(args[2]), [Path(a) for a in args[3:]]
+    if not all(f.is_file() for f in lock_files):
+        return 1
+    if VenvStore(root).clone(store_key(backend, lock_files, python_tag()), venv):
+        print(f"[INFO] {venv} cloned from shared venv store")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main(sys.argv[1:]))
@@ -1,3 +1,5 @@
+import functools
+import hashlib
 import logging
 import os
 import subprocess
@@ -14,6 +16,11 @@ LEVEL_CMD = logging.INFO + 1
 Logging level used to log executed commands (higher than INFO, to be able to filter them out if needed)
 """
 
+PROJECTS_STATE_FOLDER = ".buildenv_projects"
+"""
+Folder (in venv root) holding per-project buildenv state
+"""
+
 # Just register level name
 logging.addLevelName(LEVEL_CMD, "CMD")
 
@@ -36,6 +43,62 @@ def is_ci() -> bool:
     return os.getenv("CI") is not None
 
 
+def cache_dir() -> Path:
+    """
+    Get the host-wide buildenv cache folder.
+    Can be overridden by setting the **BUILDENV_CACHE_DIR** environment variable.
+
+    :return: Path to the cache folder (may not exist yet)
+    """
+    if os.getenv("BUILDENV_CACHE_DIR"):
+        return Path(os.environ["BUILDENV_CACHE_DIR"])
+    if is_windows():  # pragma: no cover -- for local tests on Linux
+        return Path(os.getenv("LOCALAPPDATA", str(Path.home() / "AppData" / "Local"))) / "buildenv" / "Cache"
+    return Path(os.getenv("XDG_CACHE_HOME", str(Path.home() / ".cache"))) / "buildenv"  # pragma: no cover -- tests always use BUILDENV_CACHE_DIR
+
+
+def project_state_folder(venv_root: Path, project_path: Path) -> Path:
+    """
+    Get the folder holding buildenv state specific to a project, in a venv
+    (a venv may be shared by several projects, e.g. for pipx/uvx backends)
+
+    :param venv_root: venv root folder
+    :param project_path: project root folder
+    :return: Path to the project state folder (may not exist yet)
+    """
+    return venv_root / PROJECTS_STATE_FOLDER / hashlib.sha256(str(project_path.resolve()).encode()).hexdigest()[:16]
+
+
+@functools.lru_cache
+def find_git_root(path: Path) -> Path | None:
+    """
+    Find git working tree root folder for provided path, walking up the file system.
+    Recognizes **.git** folders, **.git** files (worktrees, submodules) and **GIT_DIR**/**GIT_WORK_TREE** environment variables;
+    git is only invoked for unknown layouts.
+    Results are memoized for the whole process.
+
+    :param path: Path to start from
+    :return: Git root folder path, or None if not in a git working tree
+    """
+
+    # Explicit git folder: git uses provided work tree, or current folder
+    path = path.resolve()
+    if os.getenv("GIT_DIR"):
+        work_tree = Path(os.getenv("GIT_WORK_TREE", str(path))).resolve()
+        return work_tree if path.is_relative_to(work_tree) else None
+
+    # Walk up
+    for candidate in [path] + list(path.parents):
+        dot_git = candidate / ".git"
+        if (dot_git / "HEAD").is_file() or (dot_git.is_file() and dot_git.read_text(errors="ignore").startswith("gitdir:")):
+            return candidate
+        if dot_git.exists():
+            # Unknown layout: ask git
+            cp = run_subprocess(["git", "rev-parse", "--show-toplevel"], cwd=path, check=False)
+            return Path(cp.stdout.splitlines()[0].strip()) if cp.returncode == 0 and cp.stdout.strip() else None
+    return None
+
+
 def to_linux_path(path: Path) -> str:
     """
     Turn provided path to a Linux style path.
@@ -48,12 +111,13 @@ def to_linux_path(path: Path) -> str:
     return f"/{p.drive[0].lower()}/{p.as_posix()[3:]}" if len(p.drive) else p.as_posix()
 
 
-def contribute_path(env: dict[str, str], to_contribute: Path):
+def contribute_path(env: dict[str, str], to_contribute: Path, append: bool = False):
     """
     Contribute provided folder to PATH if not done yet
 
     :param env: environment map
     :param to_contribute: path to be added to PATH
+    :param append: add path at the end of PATH (instead of the beginning)
     """
 
     # Turn PATH to a resolved Path objects list
@@ -62,7 +126,7 @@ def contribute_path(env: dict[str, str], to_contribute: Path):
 
     # If not already in PATH, add it
     if resolved_contribution not in resolved_paths:
-        env["PATH"] = f"{resolved_contribution}{os.pathsep}{env['PATH']}"
+        env["PATH"] = f"{env['PATH']}{os.pathsep}{resolved_contribution}" if append else f"{resolved_contribution}{os.pathsep}{env['PATH']}"
 
 
 def run_subprocess(
@@ -104,33 +168,61 @@ def run_subprocess(
     )
 
     # Run process
+    log_subprocess_start(_logger, args, cwd, log_as_cmd)
+    cp = cast(subprocess.CompletedProcess[str], subprocess.run(**all_run_args))  # type: ignore
+
+    # Check result
+    check_subprocess_result(_logger, cp, check, verbose_option, error_msg)
+    return cp
+
+
+def log_subprocess_start(logger: logging.Logger, args: list[str], cwd: Path | None, log_as_cmd: bool):
+    """
+    Log subprocess start (see :func:`run_subprocess`)
+
+    :param logger: logger to use
+    :param args: subprocess commands and arguments
+    :param cwd: current working directory for subprocess
+    :param log_as_cmd: if True, log the command as a CMD level message
+    """
     if log_as_cmd:
-        _logger.log(LEVEL_CMD, " ".join(args))
+        logger.log(LEVEL_CMD, " ".join(args))
     else:
-        _logger.debug(f"Running command: {args} -- in folder {cwd}")
-    cp = cast(subprocess.CompletedProcess[str], subprocess.run(**all_run_args))  # type: ignore
+        logger.debug(f"Running command: {args} -- in folder {cwd}")
+
+
+def check_subprocess_result(logger: logging.Logger, cp: subprocess.CompletedProcess[str], check: bool, verbose: bool, error_msg: str | None):
+    """
+    Log subprocess output, and handle errors (see :func:`run_subprocess`)
+
+    :param logger: logger to use
+    :param cp: completed process instance
+    :param check: if True and subprocess return code is not 0, raise an exception
+    :param verbose: if True, subprocess output was not captured
+    :param error_msg: error message to be logged in case of subprocess failure
+    """
 
     # Log output of not verbose
-    if not verbose_option:
-        _logger.debug(f">> rc: {cp.returncode}")
-        _logger.debug(">> stdout:")
-        list(map(_logger.debug, cp.stdout.splitlines(keepends=False)))
-        _logger.debug(">> stderr:")
-        list(map(_logger.debug, cp.stderr.splitlines(keepends=False)))
+    if not verbose:
+        logger.debug(f">> rc: {cp.returncode}")
+        logger.debug(">> stdout:")
+        list(map(logger.debug, cp.stdout.splitlines(keepends=False)))
+        logger.debug(">> stderr:")
+        list(map(logger.debug, cp.stderr.splitlines(keepends=False)))
 
     # Subprocess failed?
     if cp.returncode != 0:
         if error_msg:
             # Just display a warning message
-            _logger.warning(error_msg)
+            logger.warning(error_msg)
         elif check:
             # Fatal
+            if verbose:
+                raise subprocess.CalledProcessError(cp.returncode, cp.args)
             raise RuntimeError(
                 f"command returned {cp.returncode}" + (f"\n{cp.stdout}" if len(cp.stdout) else "") + (f"\n{cp.stderr}" if len(cp.stderr) else "")
             )
 
-    return cp
-
 
 class StopHereException(Exception):
     """
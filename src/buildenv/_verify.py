@@ -0,0 +1,147 @@
+"""
+Build environment integrity verification, checking installed distributions files against their RECORD (sizes and hashes).
+
+Verification is incremental: sane files are remembered in a cache file (in the venv root folder), with their size, modification time and inode,
+so that they are not hashed again while unchanged. Files are hashed concurrently, and large ones through memory mapping.
+"""
+
+import base64
+import contextlib
+import hashlib
+import importlib.metadata
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Verified files cache file name (in venv root folder)
+_VERIFY_CACHE_FILE = ".buildenv_verify.json"
+
+# Files above this size are hashed through memory mapping
+_MMAP_THRESHOLD = 1024 * 1024
+
+
+@dataclass
+class VerifyReport:
+    """
+    Environment integrity verification report
+    """
+
+    distributions: int = 0
+    """Number of verified distributions"""
+
+    files: int = 0
+    """Number of verified files"""
+
+    rehashed: int = 0
+    """Number of files hashed during this verification (other ones are unchanged since last verification)"""
+
+    missing: list[dict[str, str]] = field(default_factory=list)
+    """Missing files (distribution name + file path)"""
+
+    modified: list[dict[str, str]] = field(default_factory=list)
+    """Modified files (distribution name + file path + modification reason: size or hash)"""
+
+    @property
+    def ok(self) -> bool:
+        """
+        State if the environment is sane (no missing or modified files)
+        """
+        return not self.missing and not self.modified
+
+    def to_json(self) -> str:
+        """
+        Serialize report to JSON
+
+        :return: JSON report
+        """
+        return json.dumps(
+            {"distributions": self.distributions, "files": self.files, "rehashed": self.rehashed, "missing": self.missing, "modified": self.modified}, indent=4
+        )
+
+
+def _file_hash(path: Path, algorithm: str, size: int) -> str:
+    # Hash file content (in RECORD format), memory mapping large files
+    h = hashlib.new(algorithm)
+    with path.open("rb") as f:
+        if size >= _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                h.update(m)
+        else:
+            h.update(f.read())
+    return f"{algorithm}=" + base64.urlsafe_b64encode(h.digest()).rstrip(b"=").decode()
+
+
+class EnvVerifier:
+    """
+    Installed distributions integrity verifier, checking files listed in distributions RECORD (sizes and hashes).
+    Verification is incremental: files which size, modification time and inode are unchanged since their last successful verification are not hashed again.
+
+    :param venv_root: venv root folder (where verified files cache is stored)
+    :param path: folders where to look for installed distributions (default: current **sys.path**)
+    """
+
+    def __init__(self, venv_root: Path, path: list[str] | None = None):
+        self._cache_path = venv_root / _VERIFY_CACHE_FILE
+        self._path = path
+        try:
+            self._cache: dict[str, list[int | str]] = json.loads(self._cache_path.read_text())
+        except (OSError, ValueError):
+            self._cache = {}
+
+    def _check(self, file: importlib.metadata.PackagePath, location: Path) -> tuple[str, str | None, bool, list[int | str] | None]:
+        # Check a single file: returns file path, problem (if any), rehash flag and cache entry
+        assert file.hash is not None
+        expected = f"{file.hash.mode}={file.hash.value}"
+        try:
+            st = location.stat()
+        except OSError:
+            return str(location), "missing", False, None
+        if file.size is not None and st.st_size != file.size:
+            return str(location), "size", False, None
+        entry: list[int | str] = [st.st_size, st.st_mtime_ns, st.st_ino, expected]
+        if self._cache.get(str(location)) == entry:
+            return str(location), None, False, entry
+        return str(location), None if _file_hash(location, file.hash.mode, st.st_size) == expected else "hash", True, entry
+
+    def verify(self, jobs: int | None = None) -> VerifyReport:
+        """
+        Verify installed distributions files, concurrently
+
+        :param jobs: max number of concurrent workers (default: see :class:`concurrent.futures.ThreadPoolExecutor`)
+        :return: verification report
+        """
+
+        # Collect hashed files of all distributions (each distribution once, even if found through several paths)
+        report = VerifyReport()
+        checks: list[tuple[str, importlib.metadata.PackagePath, Path]] = []
+        seen: set[tuple[str, str]] = set()
+        for dist in importlib.metadata.distributions(**({"path": self._path} if self._path is not None else {})):
+            dist_name = dist.metadata["Name"]
+            dist_id = (dist_name.lower(), os.path.normpath(str(dist.locate_file(""))))
+            if dist_id in seen:
+                continue
+            seen.add(dist_id)
+            report.distributions += 1
+            checks.extend((dist_name, f, Path(os.path.normpath(str(dist.locate_file(f))))) for f in (dist.files or []) if f.hash is not None)
+
+        # Check files (hashing mostly runs out of the GIL)
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(lambda c: self._check(c[1], c[2]), checks))
+
+        # Build report, and update cache with sane files
+        self._cache = {}
+        for (dist_name, file, _), (location, problem, rehashed, entry) in zip(checks, results, strict=True):
+            report.files += 1
+            report.rehashed += int(rehashed)
+            if problem == "missing":
+                report.missing.append({"distribution": dist_name, "path": str(file)})
+            elif problem is not None:
+                report.modified.append({"distribution": dist_name, "path": str(file), "reason": problem})
+            elif entry is not None:  # pragma: no branch
+                self._cache[location] = entry
+        with contextlib.suppress(OSError):
+            self._cache_path.write_text(json.dumps(self._cache))
+        return report
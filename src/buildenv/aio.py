@@ -0,0 +1,130 @@
+"""
+Asyncio helpers for **buildenv** extensions coroutine hooks (see :meth:`buildenv.extension.BuildEnvExtension.ainit`).
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import subprocess
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TypeVar
+
+from ._utils import LOGGER_NAME, check_subprocess_result, log_subprocess_start
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class _HookCallState:
+    """
+    State of an extension hook call (set by extensions scheduler)
+    """
+
+    inline: bool = False
+    """Call synchronous hooks inline (i.e. blocking the loop, when nothing else runs on it)"""
+
+    threads: list[threading.Thread] = field(default_factory=list)
+    """Threads started by this hook call (see :func:`to_thread`)"""
+
+
+_HOOK_CALL: contextvars.ContextVar[_HookCallState | None] = contextvars.ContextVar("buildenv_hook_call", default=None)
+
+
+async def run_subprocess(
+    args: list[str],
+    check: bool = True,
+    cwd: Path | None = None,
+    env: dict[str, str] | None = None,
+    verbose: bool | None = None,
+    logger: logging.Logger | None = None,
+    error_msg: str | None = None,
+    log_as_cmd: bool = False,
+) -> subprocess.CompletedProcess[str]:
+    """
+    Execute subprocess without blocking the asyncio loop, and logs output/error streams + error code.
+    Arguments and behavior are the same than the buildenv synchronous subprocess runner.
+
+    :param args: subprocess commands and arguments
+    :param check: if True and subprocess return code is not 0, raise an exception
+    :param cwd: current working directory for subprocess
+    :param env: environment variables map for subprocess
+    :param verbose: override verbose subprocess logging for this call (default: False)
+    :param logger: logger to use for this call (default: use root logger)
+    :param error_msg: error message to be logged in case of subprocess failure
+    :param log_as_cmd: if True, log the command as a CMD level message
+    :return: completed process instance
+    """
+
+    # Prepare logger
+    _logger = logger if logger else logging.getLogger(LOGGER_NAME)
+
+    # Run process (capturing output if not verbose)
+    verbose_option = verbose if verbose is not None else False
+    log_subprocess_start(_logger, args, cwd, log_as_cmd)
+    pipe = None if verbose_option else asyncio.subprocess.PIPE
+    process = await asyncio.create_subprocess_exec(*args, cwd=cwd, env=env, stdout=pipe, stderr=pipe)
+    stdout, stderr = await process.communicate()
+    cp = subprocess.CompletedProcess(
+        args,
+        process.returncode if process.returncode is not None else -1,
+        stdout=stdout.decode("utf-8", errors="ignore") if stdout is not None else None,
+        stderr=stderr.decode("utf-8", errors="ignore") if stderr is not None else None,
+    )
+
+    # Check result
+    check_subprocess_result(_logger, cp, check, verbose_option, error_msg)
+    return cp
+
+
+def _set_future(future: asyncio.Future[Any], result: Any, error: BaseException | None):
+    # Future may have been cancelled meanwhile (e.g. on timeout)
+    if not future.done():
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+async def to_thread(func: Callable[..., _T], *args: Any) -> _T:
+    """
+    Call a blocking function in a separated thread, without blocking the asyncio loop.
+    Unlike :func:`asyncio.to_thread`, the thread is a daemon one: if the call is cancelled (e.g. on timeout),
+    the still running function doesn't prevent the loop (nor the process) to terminate.
+
+    :param func: function to be called
+    :param args: function arguments
+    :return: function result
+    """
+
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[_T] = loop.create_future()
+    context = contextvars.copy_context()
+
+    def worker():
+        result, error = None, None
+        try:
+            result = context.run(func, *args)
+        except BaseException as e:
+            error = e
+        # Loop may be already closed: nobody waits for this result anymore
+        with contextlib.suppress(RuntimeError):
+            loop.call_soon_threadsafe(_set_future, future, result, error)
+
+    thread = threading.Thread(target=worker, name=f"buildenv-{getattr(func, '__name__', 'call')}", daemon=True)
+    state = _HOOK_CALL.get()
+    if state is not None:
+        state.threads.append(thread)
+    thread.start()
+    return await future
+
+
+async def _call_sync_hook(func: Callable[..., _T], *args: Any) -> _T:
+    # Call a synchronous extension hook: inline if allowed by the scheduler, in a separated thread otherwise
+    state = _HOOK_CALL.get()
+    if state is not None and state.inline:
+        return func(*args)
+    return await to_thread(func, *args)
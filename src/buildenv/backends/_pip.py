@@ -1,7 +1,11 @@
 import os
+import shutil
 from pathlib import Path
 
-from .backend import EnvBackendWithRequirements, MutableEnvBackend
+from .._installer import INSTALLER_ENV_VAR, UV_INSTALLER
+from .._seed import SeedsCache
+from .._utils import cache_dir
+from .backend import EnvBackendWithRequirements, MutableEnvBackend, pip_targeted_upgrade_args, upgrade_packages_args
 
 
 # Legacy pip-style backend
@@ -32,6 +36,18 @@ class LegacyPipBackend(EnvBackendWithRequirements, MutableEnvBackend):
         # Pip has pip, obviously
         return True
 
+    @property
+    def top_level_requirements(self) -> set[str]:
+        # Installer packages are explicitly installed by loading scripts
+        return super().top_level_requirements | {"pip", "setuptools", "wheel"}
+
+    def _publish_seed(self):
+        # Seed next venvs with this project venv pip
+        if os.name == "nt" or self._project_path is None or self.venv_root.resolve() != (self._project_path / self.venv_name).resolve():
+            return
+        if SeedsCache(cache_dir() / "seeds").publish(self.venv_root):
+            self._logger.debug("Published venv seed packages to seeds cache")
+
     @property
     def _pip_args(self) -> list[str]:
         return [arg for arg in os.getenv("BUILDENV_PIP_ARGS", "").split(" ") if arg]
@@ -49,10 +65,54 @@ class LegacyPipBackend(EnvBackendWithRequirements, MutableEnvBackend):
         # Systematically add pip args to pip subprocess
         return super().subprocess([str(self._venv_bin / self.command), "-m", "pip"] + args + self._pip_args, check, cwd, env, verbose, error_msg, log_as_cmd)
 
+    @property
+    def _pip_command(self) -> list[str]:
+        # Use venv pip
+        return [str(self._venv_bin / self.command), "-m", "pip"]
+
+    @property
+    def _uv(self) -> str | None:
+        # uv command, if accelerated installer mode is enabled and uv is available
+        return shutil.which("uv") if os.getenv(INSTALLER_ENV_VAR) == UV_INSTALLER else None
+
+    def _install(self, args: list[str], check: bool, upgrade: bool = False) -> int:
+        # Delegate to uv if enabled (venv layout stays the same, pip included), otherwise to pip
+        uv = self._uv
+        if uv is not None:
+            return (
+                super()
+                .subprocess(
+                    [uv, "pip", "install", "--python", str(self._venv_bin / self.command)]
+                    + args
+                    + (["--upgrade"] if upgrade else [])
+                    + self._install_args
+                    + self._pip_args,
+                    check,
+                    log_as_cmd=True,
+                )
+                .returncode
+            )
+        return self.subprocess(["install"] + args + (["--upgrade", "--upgrade-strategy=eager"] if upgrade else []) + self._install_args, check).returncode
+
     def _delegate_add_packages(self, packages: list[str]):
-        # Delegate to pip
-        self.subprocess(["install", *packages], check=True)
+        # Delegate to installer
+        self._install(packages, check=True)
+
+    def _delegate_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> int:
+        # Targeted upgrade: only upgrade listed packages, keeping requirements constraints (pip only upgrades dependencies if needed)
+        if packages:
+            if self._uv is not None:
+                return self._install(["-r", "requirements.txt"] + upgrade_packages_args(packages), check=False)
+            return self._install(pip_targeted_upgrade_args(packages), check=False)
+
+        # Delegate to installer
+        return self._install(["-r", "requirements.txt"], check=False, upgrade=full)
 
-    def _delegate_upgrade(self, full: bool = True, only_deps: bool = False) -> int:
-        # Delegate to pip
-        return self.subprocess(["install", "-r", "requirements.txt"] + (["--upgrade", "--upgrade-strategy=eager"] if full else []), check=False).returncode
+    def _resolve_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> dict[str, str | None]:
+        # Resolve with the same installer as for the actual upgrade
+        uv = self._uv
+        if uv is not None:
+            return self._resolve_with_uv(
+                [uv, "pip", "compile", "--python", str(self._venv_bin / self.command)] + self._pip_args, upgrade=full, packages=packages
+            )
+        return self._resolve_with_pip(self._pip_command, upgrade=full, extra_args=self._pip_args, packages=packages)
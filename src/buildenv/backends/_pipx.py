@@ -17,6 +17,11 @@ class PipXBackend(EnvBackendWithRequirements):
         # Pipx installed venv doesn't have pip
         return False
 
-    def _backend_upgrade_env(self) -> tuple[str, str] | None:
+    @property
+    def _targeted_upgrade(self) -> bool:
+        # pipx can only rebuild the whole environment
+        return False
+
+    def _backend_upgrade_env(self, packages: list[str] | None = None) -> tuple[str, str] | None:
         # Force "no cache" pipx option on upgrade
         return ("BUILDENV_PIPX_ARGS", "--no-cache")
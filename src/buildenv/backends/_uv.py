@@ -1,9 +1,16 @@
 import logging
 import os
+import re
+import sys
 from pathlib import Path
 
+from .._inventory import parse_requirement_name
+from .._renderers.renderer import RenderStatus
 from ..completion import CompletionCommand, EvalCompletionCommand
-from .backend import EnvBackend, EnvBackendWithRequirements, MutableEnvBackend
+from .backend import EnvBackend, EnvBackendWithRequirements, MutableEnvBackend, upgrade_packages_args
+
+# Lockfile change line, as reported by uv lock command
+_LOCK_CHANGE_PATTERN = re.compile(r"^(Add|Update|Remove) (\S+) (v.*)$")
 
 
 class _CommonUvImpl(EnvBackend):
@@ -41,6 +48,20 @@ class UvProjectBackend(_CommonUvImpl, MutableEnvBackend):
         assert self._project_path is not None, "Project path is not set"
         return self._project_path / "uv.lock"
 
+    @property
+    def top_level_requirements(self) -> set[str]:
+        # Add project itself, with its dependencies and dependency groups from pyproject file
+        try:
+            import tomllib
+        except ImportError as e:  # pragma: no cover -- Python 3.10
+            raise AssertionError("Reading pyproject.toml file requires Python 3.11 or higher") from e
+        pyproject = tomllib.loads((self.project_path / "pyproject.toml").read_text())
+        project = pyproject.get("project", {})
+        lines: list[str] = [project.get("name", ""), *project.get("dependencies", [])]
+        for group in pyproject.get("dependency-groups", {}).values():
+            lines.extend(r for r in group if isinstance(r, str))
+        return super().top_level_requirements | {name for name in map(parse_requirement_name, lines) if name is not None}
+
     @property
     def _extra_args(self) -> list[str]:
         # Get extra args from environment variable
@@ -63,18 +84,46 @@ class UvProjectBackend(_CommonUvImpl, MutableEnvBackend):
         # Delegate to uv; assuming uv project is already created, and all packages added through this interface are dev ones
         self.subprocess(["add", "--dev", *packages], check=True, cwd=self._project_path)
 
-    def _create_lockfile(self, log_level: int = logging.INFO):
+    def _create_lockfile(
+        self, log_level: int = logging.INFO, hashes: bool = False, find_links: list[Path] | None = None, dry_run: bool = False
+    ) -> dict[str, RenderStatus]:
+        # uv lockfile always includes artifacts hashes
+        if hashes:
+            self._logger.log(log_level, f"{self.lock_file.name} file is always hash-pinned by uv")
+
+        # Dry-run: just check if lockfile is up to date
+        old_content = self.lock_file.read_bytes() if self.lock_file.is_file() else None
+        if dry_run:
+            if old_content is None:
+                return {self.lock_file.name: "created"}
+            cp = self.subprocess(["lock", "--locked"], check=False, cwd=self._project_path, verbose=False)
+            return {self.lock_file.name: "unchanged" if cp.returncode == 0 else "changed"}
+
         # Force lockfile refresh
         self.subprocess(["lock"], check=False, cwd=self._project_path)
+        if old_content is None:
+            return {self.lock_file.name: "created"}
+        return {self.lock_file.name: "unchanged" if self.lock_file.is_file() and self.lock_file.read_bytes() == old_content else "changed"}
 
-    def _delegate_upgrade(self, full: bool = True, only_deps: bool = False) -> int:
-        # Force env synchronization
+    def _delegate_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> int:
+        # Force env synchronization (only re-resolving listed packages, if any), on current venv (may be a staging one)
         return self.subprocess(
-            ["sync"] + (["--upgrade"] if full else []) + (["--no-install-project"] if only_deps else []),
+            ["sync"] + (upgrade_packages_args(packages) if packages else ["--upgrade"] if full else []) + (["--no-install-project"] if only_deps else []),
             check=False,
             cwd=self._project_path,
+            env=dict(os.environ, UV_PROJECT_ENVIRONMENT=str(self.venv_root)),
         ).returncode
 
+    def _resolve_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> dict[str, str | None]:
+        # Dry-run lock: uv reports lockfile changes, as "Add <name> v<version>", "Update <name> v<old> -> v<new>" or "Remove <name> v<version>" lines
+        cp = self.subprocess(
+            ["lock", "--dry-run"] + (upgrade_packages_args(packages) if packages else ["--upgrade"] if full else []), cwd=self._project_path, verbose=False
+        )
+        out: dict[str, str | None] = {}
+        for m in filter(None, map(_LOCK_CHANGE_PATTERN.match, (cp.stdout + "\n" + cp.stderr).splitlines())):
+            out[m.group(2)] = None if m.group(1) == "Remove" else m.group(3).split("->")[-1].split(",")[-1].strip().removeprefix("v")
+        return out
+
 
 # UVX-style backend (immutable)
 class UvxBackend(_CommonUvImpl, EnvBackendWithRequirements):
@@ -84,6 +133,12 @@ class UvxBackend(_CommonUvImpl, EnvBackendWithRequirements):
     def name(self):
         return UvxBackend.NAME
 
-    def _backend_upgrade_env(self) -> tuple[str, str] | None:
-        # Force "refresh" uvx option on upgrade
-        return ("BUILDENV_UVX_ARGS", "--refresh")
+    def _backend_upgrade_env(self, packages: list[str] | None = None) -> tuple[str, str] | None:
+        # Force "refresh" uvx option on upgrade (only for listed packages, if any)
+        return ("BUILDENV_UVX_ARGS", " ".join(upgrade_packages_args(packages, "--refresh-package")) if packages else "--refresh")
+
+    def _resolve_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> dict[str, str | None]:
+        # Resolve with uv, refreshing cached index data (as for the actual upgrade)
+        python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+        refresh = upgrade_packages_args(packages, "--refresh-package") if packages else ["--refresh"]
+        return self._resolve_with_uv(["uv", "pip", "compile", "--python-version", python_version] + refresh, upgrade=True, packages=packages)
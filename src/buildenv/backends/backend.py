@@ -1,20 +1,42 @@
+import contextlib
+import functools
 import importlib.metadata
 import json
 import logging
 import os
+import re
 import shutil
 import subprocess
+import sys
+import tempfile
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import cast
 
 import psutil
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
 
+from .._artifacts import ArtifactsIndex, hash_artifacts, normalize_name, parse_artifact_name
+from .._budgets import HOOKS, ExtensionsBudgets, ExtensionsTimings
 from .._entry_points import parse_extensions
-from .._renderers.factory import Keywords, RendererFactory, RenderingAdapter
+from .._envlock import LOCK_SUFFIX, EnvLock
+from .._fingerprints import ExtensionsFingerprints, extension_fingerprint, extension_version
+from .._generations import GENERATIONS_ENV_VAR, GENERATIONS_SUFFIX, GenerationsStore, max_generations
+from .._index import SimpleIndex
+from .._inventory import PackagesInventory, parse_requirement_name
+from .._precompile import precompile
+from .._renderers.factory import Keywords, RendererFactory, RenderingAdapter, RenderStatus
+from .._renderers.git import GitIndexBatch
+from .._scheduler import check_errors, extensions_dependencies, schedule
 from .._shells.factory import EnvShell, ShellFactory
-from .._utils import LOGGER_NAME, contribute_path, is_ci, run_subprocess
+from .._staging import READY_MARKER, STAGING_SUFFIX, exchange_folders, staging_folder
+from .._store import STORED_MARKER, VenvStore, link_tree, python_tag, relocate_tree, store_key, store_root
+from .._utils import LOGGER_NAME, contribute_path, find_git_root, is_ci, project_state_folder, run_subprocess
+from .._verify import EnvVerifier
 from ..completion import ArgCompleteCompletionCommand, CompletionCommand
 from ..extension import BuildEnvExtension, BuildEnvInfo, BuildEnvProjectTemplate
 
@@ -32,6 +54,9 @@ class _InstalledFileDescriptor:
 # Editable suffix for version
 _EDITABLE_SUFFIX = " (editable)"
 
+# Pinned requirement line (as generated by uv pip compile)
+_PIN_PATTERN = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)==([^\s;\\]+)")
+
 LOCKFLAG_NAME = "buildenv.lock"
 """File name for the "flag" file, stating if the project is locked or not"""
 
@@ -39,6 +64,27 @@ LOCKFLAG_NAME = "buildenv.lock"
 _DEFAULT_VERSION = 2
 
 
+def upgrade_packages_args(packages: list[str], option: str = "--upgrade-package") -> list[str]:
+    """
+    Build uv targeted upgrade arguments
+
+    :param packages: packages to be upgraded
+    :param option: uv option to be repeated for each package
+    :return: arguments list
+    """
+    return [arg for package in packages for arg in (option, package)]
+
+
+def pip_targeted_upgrade_args(packages: list[str]) -> list[str]:
+    """
+    Build pip targeted upgrade arguments: listed packages are upgraded (dependencies only if needed), within requirements file constraints
+
+    :param packages: packages to be upgraded
+    :return: arguments list
+    """
+    return packages + ["-c", "requirements.txt", "--upgrade", "--upgrade-strategy=only-if-needed"]
+
+
 # Backend base implementation
 class EnvBackend(ABC):
     def __init__(self, venv_bin: Path, project_path: Path | None = None, verbose_subprocess: bool = True, shell_name: str = "bash"):
@@ -64,7 +110,7 @@ class EnvBackend(ABC):
         contribute_path(cast(dict[str, str], os.environ), self._venv_bin)
 
         # Prepare shell
-        self._shell = ShellFactory.create(shell_name, self._venv_bin, not self.has_pip(), self.name, self._extensions, self._completions)
+        self._shell = ShellFactory.create(shell_name, self._venv_bin, self._state_folder, not self.has_pip(), self.name, self._extensions, self._completions)
 
     def _setup_version(self):
         # Use default version (may be overridden)
@@ -219,6 +265,15 @@ class EnvBackend(ABC):
         """
         pass
 
+    @property
+    def top_level_requirements(self) -> set[str]:
+        """
+        Top-level requirements of this environment (normalized packages names)
+        """
+
+        # buildenv itself is always required
+        return {"buildenv"}
+
     def init(self, force: bool = False, skip_ext: list[str] | None = None, no_ext: bool = False, show_updates_from: Path | None = None) -> int:
         """
         Initialize the backend extensions
@@ -235,18 +290,54 @@ class EnvBackend(ABC):
             self.handle_updates(json.loads(show_updates_from.read_text()))
             show_updates_from.unlink()
 
+        # Share this environment with other projects, if enabled
+        self._publish_to_store()
+        self._publish_seed()
+
         # Handle ignored extensions
         ignored_extensions: set[str] = set(self._extensions.keys()) if no_ext else (set(skip_ext) if skip_ext else set())
 
-        # Iterate over backend extensions (filtering ignored ones)
-        for ext_name, extension in filter(lambda item: item[0] not in ignored_extensions, self._extensions.items()):
-            # Call extension init method
-            try:
-                extension.init(force)
-            except Exception as e:
-                raise AssertionError(f"Error occurred while calling {ext_name} extension init: {e}") from e
+        # Call backend extensions init methods (filtering ignored ones), concurrently when they don't depend on each other
+        # (skipping extensions which declared inputs are unchanged since last init)
+        extensions = {name: ext for name, ext in self._extensions.items() if name not in ignored_extensions}
+        fingerprints = ExtensionsFingerprints(self._state_folder)
+        timings = ExtensionsTimings(self._state_folder)
+        errors = schedule(
+            {name: functools.partial(self._init_extension, name, ext, force, fingerprints) for name, ext in extensions.items()},
+            extensions_dependencies(extensions),
+            "init",
+            timings=timings,
+        )
+        fingerprints.save()
+        timings.save()
+
+        # Report errors (in extensions order)
+        check_errors(errors, "Error occurred while calling {} extension init", "Errors occurred while calling extensions init")
         return 0
 
+    async def _init_extension(self, name: str, extension: BuildEnvExtension, force: bool, fingerprints: ExtensionsFingerprints):
+        """
+        Call extension init method, unless its declared inputs are unchanged since last successful init
+
+        :param name: extension name
+        :param extension: extension instance
+        :param force: force init
+        :param fingerprints: extensions fingerprints
+        """
+
+        # Up to date?
+        if not force and fingerprints.is_up_to_date(name, extension_fingerprint(extension, self._project_path)):
+            self._logger.debug(f"Skip {name} extension init (inputs unchanged)")
+            return
+
+        # Init, and remember inputs state on success
+        try:
+            await extension.ainit(force)
+        except Exception:
+            fingerprints.update(name, None)
+            raise
+        fingerprints.update(name, extension_fingerprint(extension, self._project_path))
+
     def shell(self, show_updates_from: Path | None = None, command: str | None = None) -> int:
         """
         Launch an interractive shell from the backend
@@ -297,8 +388,8 @@ class EnvBackend(ABC):
         :return: list of ignored patterns
         """
 
-        # Common list for all backends
-        return [f"{self.venv_name}/"] if self.venv_name else []
+        # Common list for all backends (venv, its staging copy, its generations and its lock)
+        return [f"{self.venv_name}{suffix}/" for suffix in ("", STAGING_SUFFIX, GENERATIONS_SUFFIX, LOCK_SUFFIX)] if self.venv_name else []
 
     # Inner files generation logic
     def _generate_files(
@@ -308,7 +399,8 @@ class EnvBackend(ABC):
         extra_keywords: Keywords | None = None,
         log_level: int = logging.INFO,
         skipped_files: set[Path] | None = None,
-    ):
+        dry_run: bool = False,
+    ) -> dict[str, RenderStatus]:
         # Prepare keywords
         all_keywords = {
             "packages": list(map(lambda x: x.split(":")[-1], packages if packages else [])),  # Remove "xxx:" prefix if any (for dependency groups)
@@ -317,31 +409,56 @@ class EnvBackend(ABC):
             "ignored_patterns": self._get_ignored_patterns(),
         } | (extra_keywords if extra_keywords else {})
 
-        # Iterate on these files
+        # Iterate on these files (executable ones being added to git index in one go)
         assert self._project_path is not None
-        for installed_file in descriptors:
-            # Use specified target, or deduce it from template name if not specified
-            if installed_file.target is not None:
-                project_target_file = installed_file.target
-            else:
-                project_target_file = self._project_path / f"{'.' if installed_file.leading_dot else ''}{installed_file.template.name.removesuffix('.jinja')}"
-            logged_name = (
-                str(project_target_file.relative_to(self._project_path)) if project_target_file.is_relative_to(self._project_path) else project_target_file.name
-            )
+        plan: dict[str, RenderStatus] = {}
+        with GitIndexBatch(self._project_path, self._logger) as git_index:
+            for installed_file in descriptors:
+                # Use specified target, or deduce it from template name if not specified
+                if installed_file.target is not None:
+                    project_target_file = installed_file.target
+                else:
+                    project_target_file = (
+                        self._project_path / f"{'.' if installed_file.leading_dot else ''}{installed_file.template.name.removesuffix('.jinja')}"
+                    )
+                logged_name = (
+                    str(project_target_file.relative_to(self._project_path))
+                    if project_target_file.is_relative_to(self._project_path)
+                    else project_target_file.name
+                )
 
-            # Skip file if generated by template
-            if skipped_files and project_target_file.relative_to(self._project_path) in skipped_files:
-                self._logger.log(logging.DEBUG, f"Skip {logged_name} generation (already generated by the selected template)")
-                continue
+                # Skip file if generated by template
+                if skipped_files and project_target_file.relative_to(self._project_path) in skipped_files:
+                    self._logger.log(logging.DEBUG, f"Skip {logged_name} generation (already generated by the selected template)")
+                    continue
 
-            # Generate target file only if not already present or not lazy
-            if (not installed_file.lazy) or (not project_target_file.is_file()):
-                self._logger.log(log_level, f"Generate {logged_name}")
-                RendererFactory.create(installed_file.template, self.name, project_path=self._project_path, logger=self._logger).render(
-                    project_target_file, keywords=all_keywords, executable=installed_file.executable
-                )
-            else:
-                self._logger.log(log_level, f"Skip {logged_name} generation (already exist in this project)")
+                # Generate target file only if not already present or not lazy (and only if content changes)
+                if (not installed_file.lazy) or (not project_target_file.is_file()):
+                    plan[logged_name] = RendererFactory.create(
+                        installed_file.template, self.name, project_path=self._project_path, logger=self._logger, git_index=git_index
+                    ).render(project_target_file, keywords=all_keywords, executable=installed_file.executable, dry_run=dry_run)
+                    if not dry_run:
+                        if plan[logged_name] != "unchanged":
+                            self._logger.log(log_level, f"Generate {logged_name}")
+                        else:
+                            self._logger.log(log_level, f"Skip {logged_name} generation (unchanged)")
+                else:
+                    plan[logged_name] = "unchanged"
+                    if not dry_run:
+                        self._logger.log(log_level, f"Skip {logged_name} generation (already exist in this project)")
+
+        return plan
+
+    def _print_plan(self, plan: dict[str, RenderStatus]):
+        """
+        Print files generation plan (dry-run mode)
+
+        :param plan: map of files status, indexed by file name
+        """
+
+        self._logger.info("Dry-run mode, no file written; files generation plan:")
+        for name, status in plan.items():
+            self._logger.info(f"  {status:<9} {name}")
 
     def install(
         self,
@@ -349,6 +466,7 @@ class EnvBackend(ABC):
         template: BuildEnvProjectTemplate | None = None,
         extra_templates: list[BuildEnvProjectTemplate] | None = None,
         clean_old_files: bool = True,
+        dry_run: bool = False,
     ) -> int:
         """
         Install loading scripts for the backend
@@ -357,6 +475,7 @@ class EnvBackend(ABC):
         :param template: template used to create a new project
         :param extra_templates: additional templates to generate files from
         :param clean_old_files: clean legacy buildenv files (python loader, config file)
+        :param dry_run: if True, only print files generation plan, without writing anything
         :return: command exit code
         """
 
@@ -364,7 +483,8 @@ class EnvBackend(ABC):
         assert self._project_path is not None, "Can't generate files without a project path"
 
         # Init git repository if not already done (to handle generated files commit)
-        self._git_init()
+        if not dry_run:
+            self._git_init()
 
         # Systematically add buildenv (unless already present) itself as a dependency to generated environments, to ensure smooth updates during development
         all_packages = packages if packages else []
@@ -373,7 +493,14 @@ class EnvBackend(ABC):
 
         # Delegate to base generation logic (skipping files already generated by the used templates, if any)
         skipped_files = set(t for tmp in ([template] if template else []) + (extra_templates if extra_templates else []) for t in tmp.generated_files)
-        self._generate_files(self._get_files_descriptors(), all_packages, skipped_files=skipped_files)
+        plan = self._generate_files(self._get_files_descriptors(), all_packages, skipped_files=skipped_files, dry_run=dry_run)
+
+        # Dry-run: just print the plan
+        if dry_run:
+            if template is not None:
+                self._logger.info(f"Files generation from {template.name} template is skipped in dry-run mode")
+            self._print_plan(plan)
+            return 0
 
         # Remove legacy files, if any
         if clean_old_files:
@@ -386,29 +513,28 @@ class EnvBackend(ABC):
                     self._logger.info(f"Remove legacy {legacy_item} folder")
                     shutil.rmtree(path_to_remove)
 
-        # Finally, ask template to generate its own files if any
+        # Finally, ask template to generate its own files if any (with batched git index update for executable files)
         if template is not None:
-            template.generate_project_files(
-                RenderingAdapter(self._project_path, self.name),
-                all_packages,
-                extra_templates if extra_templates else [],
-            )
+            with GitIndexBatch(self._project_path, self._logger) as git_index:
+                template.generate_project_files(
+                    RenderingAdapter(self._project_path, self.name, self._project_path, self._logger, git_index),
+                    all_packages,
+                    extra_templates if extra_templates else [],
+                )
 
         # Everything went well
         return 0
 
     def _git_init(self):
         # Check current git folder (if any)
-        git_path = None
-        cp = run_subprocess(["git", "rev-parse", "--show-toplevel"], cwd=self._project_path, check=False, logger=self._logger)
-        if cp.returncode == 0:
-            git_path = Path(cp.stdout.splitlines()[0].strip())
+        assert self._project_path is not None
+        git_path = find_git_root(self._project_path)
 
         # Git path is not the same as project path, we need to init a new git repository
-        assert self._project_path is not None
         if (git_path is None) or (not git_path.samefile(self._project_path)):
             self._logger.info("Initialize a new git repository for this project...")
             run_subprocess(["git", "init"], cwd=self._project_path, logger=self._logger, error_msg="Failed to initialize git repository for this project")
+            find_git_root.cache_clear()
 
     def add_packages(self, packages: list[str]):
         """
@@ -420,8 +546,16 @@ class EnvBackend(ABC):
         # Check if mutable
         assert self.is_mutable(), f"{self.name} backend is not mutable, can't add packages"
 
-        # Delegate to backend implementation
-        self._delegate_add_packages(packages)
+        # Delegate to backend implementation (waiting for other buildenv processes working on this environment)
+        with self._env_lock:
+            self._delegate_add_packages(packages)
+            self._precompile()
+
+    def _precompile(self):
+        """
+        Precompile installed packages bytecode, if enabled (see **BUILDENV_PRECOMPILE** environment variable)
+        """
+        precompile(self.venv_root, logger=self._logger)
 
     def _delegate_add_packages(self, packages: list[str]) -> None:  # pragma: no cover
         """
@@ -432,28 +566,148 @@ class EnvBackend(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def _create_lockfile(self, log_level: int = logging.INFO) -> None:  # pragma: no cover
+    def _create_lockfile(
+        self, log_level: int = logging.INFO, hashes: bool = False, find_links: list[Path] | None = None, dry_run: bool = False
+    ) -> dict[str, RenderStatus]:  # pragma: no cover
         """
         Delegate lockfile creation
 
         :param log_level: logging level to use for file generation
+        :param hashes: if True, pin locked packages with their artifacts hashes
+        :param find_links: additional folders where to look for packages artifacts (when hashes are required)
+        :param dry_run: if True, only compute lockfile status, without writing it
+        :return: lockfile status, indexed by file name
         """
         raise NotImplementedError
 
-    def lock(self, log_level: int = logging.INFO) -> int:
+    @property
+    def wheelhouse(self) -> Path | None:
+        """
+        Wheelhouse folder from which locked packages are installed offline, if any (None otherwise)
+        """
+
+        # Wheelhouse path is stored in the lock flag file
+        assert self._project_path is not None, "Project path is not set"
+        lockflag = self._project_path / LOCKFLAG_NAME
+        wheelhouse = lockflag.read_text().strip() if lockflag.is_file() else ""
+        return (self._project_path / wheelhouse) if wheelhouse else None
+
+    @property
+    def _install_args(self) -> list[str]:
+        """
+        Extra arguments for packages install commands (to install exclusively from wheelhouse, if any)
+        """
+        wheelhouse = self.wheelhouse
+        return ["--no-index", "--find-links", str(wheelhouse)] if wheelhouse is not None else []
+
+    @property
+    def _pip_command(self) -> list[str]:
+        """
+        Command used to invoke pip for wheelhouse operations (matching this environment python version)
+        """
+        python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+        return ["uvx", "--python", python_version, "pip"] if shutil.which("uvx") else ["pipx", "run", "--python", python_version, "pip"]
+
+    def _collect_wheelhouse(self, wheelhouse: Path, packages: dict[str, str]):
+        """
+        Collect wheels for all provided packages in the wheelhouse folder (sdists are built to wheels in parallel)
+
+        :param wheelhouse: wheelhouse folder
+        :param packages: map of packages versions to be collected (indexed by package name)
+        """
+
+        # Download all pinned distributions
+        pins = {(normalize_name(name), version) for name, version in packages.items() if not version.endswith(_EDITABLE_SUFFIX)}
+        self._logger.info(f"Collect {len(pins)} packages in {wheelhouse.name} folder...")
+        wheelhouse.mkdir(parents=True, exist_ok=True)
+        python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+        run_subprocess(
+            self._pip_command
+            + ["download", "--no-deps", "--python-version", python_version, "--dest", str(wheelhouse)]
+            + sorted(f"{name}=={version}" for name, version in pins),
+            verbose=self._verbose_subprocess,
+            logger=self._logger,
+            log_as_cmd=self._verbose_subprocess,
+        )
+
+        # Remove artifacts which are not pinned anymore
+        sdists: list[Path] = []
+        for artifact in wheelhouse.iterdir():
+            parsed = parse_artifact_name(artifact.name)
+            if parsed is None:
+                continue
+            if parsed not in pins:
+                self._logger.debug(f"Remove outdated {artifact.name} artifact")
+                artifact.unlink()
+            elif not artifact.name.endswith(".whl"):
+                sdists.append(artifact)
+
+        # Build sdists to wheels, in parallel
+        def build_wheel(sdist: Path) -> int:
+            rc = run_subprocess(
+                self._pip_command + ["wheel", "--no-deps", "--wheel-dir", str(wheelhouse), str(sdist)], check=False, logger=self._logger
+            ).returncode
+            if rc == 0:
+                sdist.unlink()
+            return rc
+
+        if sdists:
+            self._logger.info(f"Build {len(sdists)} wheels from sdists...")
+            with ThreadPoolExecutor() as pool:
+                failed = [sdist.name for sdist, rc in zip(sdists, pool.map(build_wheel, sdists), strict=True) if rc != 0]
+            assert not failed, f"Failed to build wheels from these sdists: {', '.join(sorted(failed))}"
+
+    def lock(
+        self,
+        log_level: int = logging.INFO,
+        hashes: bool = False,
+        find_links: list[Path] | None = None,
+        wheelhouse: Path | None = None,
+        dry_run: bool = False,
+    ) -> int:
         """
         Create a lockfile for this environment, so that next time the environment is loaded, it will be restored to this state
 
         :param log_level: logging level to use for file generation
+        :param hashes: if True, pin locked packages with their artifacts hashes
+        :param find_links: additional folders where to look for packages artifacts (when hashes are required)
+        :param wheelhouse: if specified, collect wheels for all locked packages in this folder, and install them from there (offline) from now on
+        :param dry_run: if True, only print lock files generation plan, without writing anything
         :return: command exit code
         """
 
-        # Delegate to backend implementation
-        self._create_lockfile(log_level)
-
-        # Create the lock flag file
-        assert self._project_path is not None, "Project path is not set"
-        (self._project_path / LOCKFLAG_NAME).touch()
+        # Other buildenv processes may work on this environment: wait for them
+        with self._env_lock:
+            # Collect wheels if required
+            assert self._project_path is not None, "Project path is not set"
+            all_find_links = list(find_links) if find_links else []
+            if wheelhouse is not None:
+                assert self.use_requirements, f"Wheelhouse mode is not supported by {self.name} backend"
+                wheelhouse = (self._project_path / wheelhouse).resolve()
+                if dry_run:
+                    self._logger.info(f"Wheels collection in {wheelhouse} is skipped in dry-run mode")
+                else:
+                    self._collect_wheelhouse(wheelhouse, self.installed_packages)
+                all_find_links.insert(0, wheelhouse)
+
+            # Delegate to backend implementation
+            plan = self._create_lockfile(log_level, hashes, all_find_links, dry_run)
+
+            # Create the lock flag file (holding wheelhouse path, if any), only if content changes
+            lockflag = self._project_path / LOCKFLAG_NAME
+            lockflag_content = ""
+            if wheelhouse is not None:
+                lockflag_content = wheelhouse.relative_to(self._project_path).as_posix() if wheelhouse.is_relative_to(self._project_path) else str(wheelhouse)
+            if not lockflag.is_file():
+                plan[LOCKFLAG_NAME] = "created"
+            elif lockflag.read_text() != lockflag_content:
+                plan[LOCKFLAG_NAME] = "changed"
+            else:
+                plan[LOCKFLAG_NAME] = "unchanged"
+            if dry_run:
+                self._print_plan(plan)
+            elif plan[LOCKFLAG_NAME] != "unchanged":
+                lockflag.write_text(lockflag_content)
 
         return 0
 
@@ -472,18 +726,29 @@ class EnvBackend(ABC):
         :return: command exit code
         """
 
-        # Delegate to backend implementation
-        self._remove_lockfile()
+        # Other buildenv processes may work on this environment: wait for them
+        with self._env_lock:
+            # Delegate to backend implementation
+            self._remove_lockfile()
 
-        # Remove the lock flag file
-        assert self._project_path is not None, "Project path is not set"
-        lockflag = self._project_path / LOCKFLAG_NAME
-        if lockflag.is_file():  # pragma: no branch
-            lockflag.unlink()
+            # Remove the lock flag file
+            assert self._project_path is not None, "Project path is not set"
+            lockflag = self._project_path / LOCKFLAG_NAME
+            if lockflag.is_file():  # pragma: no branch
+                lockflag.unlink()
 
         return 0
 
-    def upgrade(self, full: bool = True, only_deps: bool = False, print_updates: bool = True) -> int:
+    def upgrade(
+        self,
+        full: bool = True,
+        only_deps: bool = False,
+        print_updates: bool = True,
+        dry_run: bool = False,
+        packages: list[str] | None = None,
+        blue_green: bool = False,
+        prepare: bool = False,
+    ) -> int:
         """
         Upgrade all packages in this environment to their latest version.
         Also dumps upgraded versions to the console.
@@ -491,28 +756,236 @@ class EnvBackend(ABC):
         :param full: if True, check for updates from remote repositories (may be slow); if False, ignore already installed packages
         :param only_deps: if True, upgrade only dependencies (not current project)
         :param print_updates: if True, print updates after upgrade
+        :param dry_run: if True, only resolve packages versions and print updates that would be done, without modifying the environment
+        :param packages: if set, only upgrade these packages (and their dependencies, if required) instead of all packages
+        :param blue_green: if True, upgrade a staging copy of the environment, then swap it in atomically once validated
+        :param prepare: if True, only prepare the upgraded staging environment (to be swapped in by a next blue/green upgrade)
         :return: command exit code
         """
 
+        # Targeted upgrade supported?
+        if packages and not self._targeted_upgrade:
+            self._logger.warning(f"{self.name} backend doesn't support targeted upgrades; all packages will be upgraded")
+            packages = None
+
         # Remember old packages
         old_packages = self.installed_packages
 
-        # Delegate to backend implementation
-        rc = self._delegate_upgrade(full, only_deps)
+        # Dry-run: print updates from resolved versions
+        if dry_run:
+            new_packages = dict(old_packages)
+            names = {canonicalize_name(name): name for name in old_packages}
+            for name, version in self._resolve_upgrade(full, only_deps, packages).items():
+                name = names.get(canonicalize_name(name), name)
+                if version is not None:
+                    new_packages[name] = version
+                elif name in new_packages:  # pragma: no branch
+                    del new_packages[name]
+            self.print_updates(old_packages, new_packages=new_packages)
+            return 0
+
+        # Other buildenv processes may work on this environment: wait for them, and reuse their upgrade (if any)
+        with self._env_lock as env_lock:
+            if env_lock.waited and self.installed_packages != old_packages:
+                self._logger.info("Environment was upgraded by another buildenv process meanwhile")
+                self.print_updates(old_packages)
+                return 0
+
+            # Remember old lock files, if environment generations are kept
+            generations = self._generations_store
+            old_locks = self._lock_contents() if generations is not None else {}
+
+            if blue_green or prepare:
+                # Blue/green: upgrade in staging environment, then swap it in
+                rc = self._stage_upgrade(old_packages, full, only_deps, packages)
+                if rc != 0 or prepare:
+                    return rc
+                self._swap_staging(old_packages, old_locks)
+            else:
+                # Snapshot live environment (kept as a new generation if upgrade changes it), then delegate to backend implementation
+                snapshot = generations.snapshot() if generations is not None else None
+                rc = self._delegate_upgrade(full, only_deps, packages)
+                if generations is not None and snapshot is not None:
+                    if rc == 0 and self.installed_packages != old_packages:
+                        generations.add(snapshot, old_packages, old_locks)
+                    else:
+                        shutil.rmtree(snapshot, ignore_errors=True)
+
+            # If mutable and upgrade succeeded, precompile and print updates
+            if rc == 0 and self.is_mutable():
+                self._precompile()
+                self.handle_updates(old_packages, print_updates)
+
+            return rc
+
+    def _stage_upgrade(self, old_packages: dict[str, str], full: bool, only_deps: bool, packages: list[str] | None) -> int:
+        """
+        Upgrade packages in a staging environment (cloned from the live one), and validate it.
+        A staging environment already prepared from the same live packages and upgrade arguments is reused as is.
+        Live lock files are left unchanged: lock files updated by the upgrade are kept in the ready marker, to be installed on swap.
+
+        :param old_packages: map of live installed packages versions (indexed by package name)
+        :param full: if True, check for updates from remote repositories
+        :param only_deps: if True, upgrade only dependencies (not current project)
+        :param packages: if set, only upgrade these packages
+        :return: upgrade exit code
+        """
+
+        # Only for mutable backends with a project venv
+        assert self.is_mutable() and self.venv_name, f"{self.name} backend doesn't support blue/green upgrades"
+        live = self.venv_root.absolute()
+        staging = staging_folder(live)
+
+        # Already prepared (from same live packages, and with same upgrade arguments)?
+        ready = staging / READY_MARKER
+        args = {"full": full, "only_deps": only_deps, "packages": sorted(packages) if packages else None}
+        with contextlib.suppress(OSError, ValueError, KeyError):
+            prepared = json.loads(ready.read_text())
+            if prepared["packages"] == old_packages and prepared["args"] == args:
+                self._logger.info(f"Reuse upgraded environment prepared in {staging.name} folder")
+                return 0
+
+        # Clone live environment
+        self._logger.info(f"Prepare upgraded environment in {staging.name} folder...")
+        shutil.rmtree(staging, ignore_errors=True)
+        link_tree(live, staging, live, staging)
+        (staging / STORED_MARKER).unlink(missing_ok=True)
+
+        # Upgrade and validate it (restoring live lock files, which may be updated by the backend)
+        live_bin = self._venv_bin
+        live_locks = self._lock_contents()
+        self._venv_bin = staging / live_bin.name
+        try:
+            rc = self._delegate_upgrade(full, only_deps, packages)
+            staged_locks = self._lock_contents()
+            if rc == 0:
+                rc = self._validate_venv()
+        finally:
+            self._venv_bin = live_bin
+            self._restore_locks(live_locks)
+        if rc != 0:
+            self._logger.error("Upgrade failed in staging environment; live environment is left unchanged")
+            shutil.rmtree(staging, ignore_errors=True)
+            return rc
+
+        # Relocate to live folder, and flag as ready
+        relocate_tree(staging, staging, live)
+        ready.write_text(json.dumps({"packages": old_packages, "args": args, "locks": staged_locks}))
+        return 0
+
+    def _validate_venv(self) -> int:
+        """
+        Validate an upgraded environment: buildenv must still be importable, and installed packages dependencies must be consistent (if pip is available)
+
+        :return: validation exit code
+        """
+        python = str(self._venv_bin / "python")
+        env = {k: v for k, v in os.environ.items() if k != "PYTHONPATH"}  # Validate venv content only
+        for args in [[python, "-c", "import buildenv"]] + ([[python, "-m", "pip", "check"]] if self.has_pip() else []):
+            rc = run_subprocess(args, check=False, env=env, logger=self._logger, log_as_cmd=self._verbose_subprocess).returncode
+            if rc != 0:
+                return rc
+        return 0
 
-        # If mutable and upgrade succeeded, print updates
-        if rc == 0 and self.is_mutable():
-            self.handle_updates(old_packages, print_updates)
+    def _swap_staging(self, old_packages: dict[str, str], old_locks: dict[str, str | None]):
+        """
+        Swap prepared staging environment in, atomically; previous live environment is kept as a new generation (if enabled)
 
-        return rc
+        :param old_packages: map of previous live installed packages versions (indexed by package name)
+        :param old_locks: map of previous lock files contents (indexed by file name)
+        """
+        live = self.venv_root.absolute()
+        staging = staging_folder(live)
+        ready = staging / READY_MARKER
+        staged_locks = json.loads(ready.read_text())["locks"]
+        exchange_folders(live, staging)
+        (live / READY_MARKER).unlink()
+        self._restore_locks(staged_locks)
+        generations = self._generations_store
+        if generations is not None:
+            generations.add(staging, old_packages, old_locks)
+        else:
+            shutil.rmtree(staging, ignore_errors=True)
+        self._logger.info("Upgraded environment swapped in")
+
+    @property
+    def _state_folder(self) -> Path:
+        """
+        Folder holding buildenv state specific to this project (e.g. extensions fingerprints and timings), in venv
+        (current folder stands for the project if its path is not set)
+        """
+        return project_state_folder(self.venv_root, self._project_path or Path.cwd())
+
+    @property
+    def _env_lock(self) -> EnvLock:
+        """
+        Advisory lock on this environment, shared with loader scripts and other buildenv processes working on the same project
+        (next to the venv, or in project folder for backends without a project venv)
+        """
+        return EnvLock(self.venv_root.absolute() if self.venv_name else self.project_path / ".buildenv", self._logger)
+
+    @property
+    def _generations_store(self) -> GenerationsStore | None:
+        """
+        Environment generations store, if generations are kept for this backend (None otherwise)
+        """
+        return GenerationsStore(self.venv_root.absolute()) if self.is_mutable() and self.venv_name and max_generations() > 0 else None
+
+    def _kept_generations(self) -> GenerationsStore:
+        """
+        Get environment generations store, for generations related commands
+
+        :return: generations store
+        """
+        generations = self._generations_store
+        assert self.is_mutable() and self.venv_name, f"{self.name} backend doesn't support environment generations"
+        assert generations is not None, f"Environment generations are disabled (set {GENERATIONS_ENV_VAR} environment variable to keep some)"
+        return generations
+
+    def _lock_contents(self) -> dict[str, str | None]:
+        """
+        Get lock files contents, to be kept with an environment generation
+
+        :return: map of lock files contents (indexed by file name; None if file doesn't exist)
+        """
+        return {p.name: p.read_text() if p.is_file() else None for p in (self.lock_file, self.project_path / LOCKFLAG_NAME)}
+
+    def _restore_locks(self, locks: dict[str, str | None]):
+        """
+        Restore lock files contents (only for changed ones)
+
+        :param locks: map of lock files contents (indexed by file name; None if file shall not exist)
+        """
+        for name, content in locks.items():
+            path = self.project_path / name
+            if content is None:
+                path.unlink(missing_ok=True)
+            elif not path.is_file() or path.read_text() != content:
+                path.write_text(content)
+
+    @property
+    def _targeted_upgrade(self) -> bool:
+        """
+        States if this backend is able to upgrade only some packages
+        """
+        return True
 
     @abstractmethod
-    def _delegate_upgrade(self, full: bool = True, only_deps: bool = False) -> int:  # pragma: no cover
+    def _delegate_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> int:  # pragma: no cover
         """
         Delegate packages upgrade to the backend implementation
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def _resolve_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> dict[str, str | None]:  # pragma: no cover
+        """
+        Delegate upgrade resolution to the backend implementation, without modifying the environment
+
+        :return: map of packages versions resolved by the upgrade (indexed by package name; None for removed packages); other installed packages are unchanged
+        """
+        raise NotImplementedError
+
     def handle_updates(self, old_packages: dict[str, str], print_updates: bool = True):
         """
         Handle packages updates from previous versions
@@ -525,18 +998,20 @@ class EnvBackend(ABC):
         if print_updates:  # pragma: no branch
             self.print_updates(old_packages)
 
-    def print_updates(self, old_packages: dict[str, str], ignored_packages: set[str] | None = None):
+    def print_updates(self, old_packages: dict[str, str], ignored_packages: set[str] | None = None, new_packages: dict[str, str] | None = None):
         """
         Pretty print packages updates to stdout
 
         :param old_packages: map of old installed packages versions (indexed by package name)
         :param ignored_packages: set of package names to ignore in updates printing
+        :param new_packages: map of new packages versions (indexed by package name), if updates are not done yet (default: installed packages)
         """
 
         # Locate changes and print them (if any)
+        preview = new_packages is not None
         all_ignored_packages: set[str] = ignored_packages if ignored_packages else set()
         old_packages_names = set(old_packages.keys()) - all_ignored_packages
-        new_packages = self.installed_packages
+        new_packages = new_packages if new_packages is not None else self.installed_packages
         new_packages_names = set(new_packages.keys()) - all_ignored_packages
         changes: dict[str, str] = {}
 
@@ -556,10 +1031,10 @@ class EnvBackend(ABC):
         }:
             changes[updated_package] = f"updated (from {old_packages[updated_package]} to {new_packages[updated_package]})"
         if changes:
-            self._logger.info("Some packages were updated:")
+            self._logger.info("Some packages would be updated:" if preview else "Some packages were updated:")
             self._print_packages(changes)
         else:
-            self._logger.debug("All packages are already up to date.")
+            self._logger.log(logging.INFO if preview else logging.DEBUG, "All packages are already up to date.")
 
     @property
     def installed_packages(self) -> dict[str, str]:
@@ -586,55 +1061,310 @@ class EnvBackend(ABC):
                 out[pkg.metadata["Name"]] = f"{pkg.version}{_EDITABLE_SUFFIX if is_editable else ''}"
         return out
 
-    def _print_packages(self, packages: dict[str, str]):
+    def _print_table(self, headers: tuple[str, ...], rows: list[tuple[str, ...]]):
         """
-        Pretty print packages list to stdout
+        Pretty print a table to stdout
 
-        :param packages: map of installed packages versions (indexed by package name)
+        :param headers: columns headers
+        :param rows: table rows (printed in provided order)
         """
 
         # Prepare formatting
-        biggest_name_length = max((len(name) for name in list(packages.keys()) + ["Package"]), default=0)
-        biggest_version_length = max((len(version) for version in list(packages.values()) + ["Version"]), default=0)
+        widths = [max(len(cell) for cell in column) for column in zip(headers, *rows, strict=True)]
+
+        def print_row(row: tuple[str, ...]):
+            self._logger.info(" ".join(cell.ljust(width) for cell, width in zip(row[:-1], widths, strict=False)) + f" {row[-1]}")
 
-        def print_package(name: str, version: str):
-            self._logger.info(f"{name.ljust(biggest_name_length)} {version}")
+        # Pretty print header + rows
+        print_row(headers)
+        self._logger.info(" ".join("-" * width for width in widths))
+        for row in rows:
+            print_row(row)
+
+    def _print_packages(self, packages: dict[str, str]):
+        """
+        Pretty print packages list to stdout
 
-        # Pretty print header
-        print_package("Package", "Version")
-        self._logger.info(f"{'-' * biggest_name_length} {'-' * biggest_version_length}")
+        :param packages: map of installed packages versions (indexed by package name)
+        """
 
         # Pretty print name+version (sorted by name)
-        for name, version in sorted(packages.items(), key=lambda item: item[0].lower()):
-            print_package(name, version)
+        self._print_table(("Package", "Version"), sorted(packages.items(), key=lambda item: item[0].lower()))
 
-    def list(self) -> int:
+    def _get_packages_hashes(self, packages: dict[str, str], find_links: list[Path] | None = None) -> dict[str, list[str]]:
         """
-        List installed packages in this environment and print them to stdout
+        Get sha256 hashes of artifacts for provided packages, fetched from the package index, and computed for artifacts found in provided folders
 
-        :return: command exit code
+        :param packages: map of packages versions (indexed by package name)
+        :param find_links: additional folders where to look for packages artifacts
+        :return: map of sorted artifacts hashes lists (indexed by package name)
         """
 
-        # Pretty print installed packages
-        self._print_packages(self.installed_packages)
+        # Hashes of the files published on the package index
+        out: dict[str, set[str]] = {name: set(hashes) for name, hashes in SimpleIndex().files_hashes(packages).items()}
 
-        return 0
+        # Add hashes of local artifacts (folders are walked only once; local pip/uv caches are not considered, as they hold locally built wheels)
+        if find_links:
+            index = ArtifactsIndex(find_links)
+            artifacts = {name: index.find(name, version) for name, version in packages.items()}
+            digests = hash_artifacts([a for found in artifacts.values() for a in found])
+            for name, found in artifacts.items():
+                out.setdefault(name, set()).update(digests[a] for a in found)
+
+        # All packages must have at least one hash
+        missing = sorted((name for name in packages if not out.get(name)), key=str.lower)
+        assert not missing, (
+            f"Can't find any artifact to hash for these packages: {', '.join(missing)} "
+            + "(not found on package index; use --find-links or --wheelhouse options to provide them)"
+        )
+        return {name: sorted(out[name]) for name in packages}
 
-    def dump(self, output_file: Path, log_level: int = logging.INFO):
+    def dump(
+        self, output_file: Path, log_level: int = logging.INFO, hashes: bool = False, find_links: list[Path] | None = None, dry_run: bool = False
+    ) -> dict[str, RenderStatus]:
         """
         Dump installed packages in this environment to a requirements-like file
 
         :param output_file: path to the output requirements file
         :param log_level: logging level to use for file generation
+        :param hashes: if True, pin dumped packages with their artifacts hashes
+        :param find_links: additional folders where to look for packages artifacts (when hashes are required)
+        :param dry_run: if True, only compute output file status, without writing it
+        :return: output file status, indexed by file name
         """
 
+        # Prepare keywords
+        packages = self.installed_packages
+        keywords: Keywords = {"installed_packages": packages}
+        if hashes:
+            # Editable packages can't be hash-pinned
+            for name in [name for name, version in packages.items() if version.endswith(_EDITABLE_SUFFIX)]:
+                self._logger.warning(f"Editable package {name} can't be hash-pinned, skipping it in {output_file.name}")
+                del packages[name]
+            keywords["hashes"] = self._get_packages_hashes(packages, find_links)
+
         # Just dump installed packages to the specified file
-        self._generate_files(
+        return self._generate_files(
             [_InstalledFileDescriptor(template=Path("backends/common/requirements.lock.jinja"), target=output_file)],
-            extra_keywords={"installed_packages": self.installed_packages},
+            extra_keywords=keywords,
             log_level=log_level,
+            dry_run=dry_run,
         )
 
+    def _publish_to_store(self):
+        """
+        Publish project venv to the shared venv store (if enabled, and if the project venv is built from a lockfile)
+        """
+
+        # Only for project venvs, built from an existing lockfile
+        root = store_root()
+        if root is None or self._project_path is None or not self.venv_name:
+            return
+        if self.venv_root.resolve() != (self._project_path / self.venv_name).resolve() or not self.lock_file.is_file():
+            return
+
+        # Already published?
+        key = store_key(self.name, [self.lock_file], python_tag(self.venv_root))
+        marker = self.venv_root / STORED_MARKER
+        if marker.is_file() and marker.read_text() == key:
+            return
+
+        # Publish
+        self._logger.info(f"Publishing {self.venv_name} to shared venv store...")
+        VenvStore(root).publish(key, self.venv_root, self.name)
+
+    def _publish_seed(self) -> None:  # NOQA: B027
+        """
+        Publish installer packages of this environment to the host-wide venv seeds cache, for faster venvs creation
+        """
+
+        # Default implementation: nothing to do
+        pass
+
+    def extensions(self, timings: bool = False) -> int:
+        """
+        List loaded extensions and print them to stdout
+
+        :param timings: print extensions hooks timings history and time budgets instead
+        :return: command exit code
+        """
+
+        # Simple extensions list
+        if not timings:
+            self._print_table(("Extension", "Provided by"), [(name, extension_version(ext)) for name, ext in self._extensions.items()])
+            return 0
+
+        # Timings statistics, for each extension hook (in extensions order)
+        history = ExtensionsTimings(self._state_folder)
+        budgets = ExtensionsBudgets()
+        rows: list[tuple[str, ...]] = []
+        for name in self._extensions:
+            for label in filter(lambda label: label in history.history(name), HOOKS.values()):
+                durations = history.history(name)[label]
+                rows.append(
+                    (
+                        name,
+                        label,
+                        str(len(durations)),
+                        f"{durations[-1]:.3f}s",
+                        f"{sum(durations) / len(durations):.3f}s",
+                        f"{max(durations):.3f}s",
+                        str(budgets.get(name, label)),
+                    )
+                )
+        if rows:
+            self._print_table(("Extension", "Hook", "Calls", "Last", "Mean", "Max", "Budget (soft/hard)"), rows)
+        else:
+            self._logger.info("No extensions timings recorded yet")
+        return 0
+
+    def verify(self, output: Path | None = None) -> int:
+        """
+        Verify installed packages files integrity (against their RECORD sizes and hashes), and print a JSON report to stdout
+
+        :param output: path to the JSON report file (instead of printing it to stdout)
+        :return: command exit code (1 if some files are missing or modified)
+        """
+
+        # Verify (incrementally)
+        report = EnvVerifier(self.venv_root).verify()
+
+        # Output report
+        if output is not None:
+            output.write_text(report.to_json() + "\n")
+            self._logger.log(
+                logging.INFO if report.ok else logging.WARNING,
+                f"Verified {report.files} files of {report.distributions} packages ({report.rehashed} rehashed): "
+                + f"{len(report.missing)} missing, {len(report.modified)} modified",
+            )
+        else:
+            print(report.to_json())
+        return 0 if report.ok else 1
+
+    def why(self, package: str) -> int:
+        """
+        Print why a package is installed in this environment, as a tree of its dependent packages (up to top-level requirements)
+
+        :param package: package name
+        :return: command exit code
+        """
+
+        inventory = PackagesInventory(self.venv_root)
+        name = canonicalize_name(inventory.get(package).name)
+        for line in inventory.format_tree([name], reverse=True, top_level=self.top_level_requirements):
+            print(line)
+        return 0
+
+    def tree(self, unused: bool = False) -> int:
+        """
+        Print installed packages dependencies tree, from top-level requirements
+
+        :param unused: print instead installed packages which are not reachable from top-level requirements
+        :return: command exit code
+        """
+
+        inventory = PackagesInventory(self.venv_root)
+        top_level = self.top_level_requirements
+        if unused:
+            reachable = inventory.reachable(top_level)
+            packages = {p.name: p.version for n, p in inventory.packages.items() if n not in reachable}
+            if packages:
+                self._print_packages(packages)
+            else:
+                self._logger.info("All installed packages are reachable from top-level requirements")
+            return 0
+        for line in inventory.format_tree(sorted(n for n in top_level if n in inventory.packages)):
+            print(line)
+        return 0
+
+    def outdated(self) -> int:
+        """
+        Print installed packages for which a newer version is available on the package index, with their latest compatible and latest versions
+
+        :return: command exit code
+        """
+
+        # Query index for all installed packages (except editable ones)
+        installed = {name: version for name, version in self.installed_packages.items() if not version.endswith(_EDITABLE_SUFFIX)}
+        available = SimpleIndex().latest_versions(installed)
+
+        # Keep outdated packages
+        rows: list[tuple[str, str, str, str]] = []
+        for name, versions in available.items():
+            try:
+                current = Version(installed[name])
+            except InvalidVersion:
+                continue
+            if any(v is not None and v > current for v in (versions.latest, versions.latest_compatible)):
+                rows.append((name, installed[name], str(versions.latest_compatible or "-"), str(versions.latest or "-")))
+
+        # Pretty print them (sorted by name)
+        if rows:
+            self._print_table(("Package", "Version", "Latest compatible", "Latest"), sorted(rows, key=lambda row: row[0].lower()))
+        else:
+            self._logger.info("All packages are up to date")
+        return 0
+
+    def rollback(self, generation: int | None = None) -> int:
+        """
+        Roll back environment to a previous generation, swapping it in atomically; current environment is kept as a new generation
+
+        :param generation: generation number (default: latest one)
+        :return: command exit code
+        """
+
+        # Only for mutable backends with a project venv
+        generations = self._kept_generations()
+
+        # Other buildenv processes may work on this environment: wait for them
+        with self._env_lock:
+            # Swap generation venv in, and keep current one as a new generation
+            target = generations.get(generation)
+            old_packages = self.installed_packages
+            old_locks = self._lock_contents()
+            exchange_folders(self.venv_root.absolute(), target.venv)
+            previous = target.venv.rename(generations.root / f"rollback-{os.getpid()}")
+            generations.remove(target)
+            generations.add(previous, old_packages, old_locks)
+
+            # Restore lock files
+            self._restore_locks(target.locks)
+
+            # Print updates
+            self._logger.info(f"Rolled back to environment generation {target.id}")
+            self.print_updates(old_packages)
+        return 0
+
+    def generations(self) -> int:
+        """
+        List kept environment generations, with packages updates that a rollback to each of them would do
+
+        :return: command exit code
+        """
+
+        generations = self._kept_generations()
+        kept = generations.list()
+        if not kept:
+            self._logger.info("No previous environment generation is kept")
+            return 0
+        current_packages = self.installed_packages
+        for generation in kept:
+            self._logger.info(f"Generation {generation.id}, from {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(generation.created))}:")
+            self.print_updates(current_packages, new_packages=generation.packages)
+        return 0
+
+    def list(self) -> int:
+        """
+        List installed packages in this environment and print them to stdout
+
+        :return: command exit code
+        """
+
+        # Pretty print installed packages
+        self._print_packages(self.installed_packages)
+
+        return 0
+
 
 class EnvBackendWithRequirements(EnvBackend):
     @property
@@ -651,18 +1381,32 @@ class EnvBackendWithRequirements(EnvBackend):
             _InstalledFileDescriptor(Path("backends/common/requirements.txt.jinja"), lazy=True),
         ]
 
-    def _create_lockfile(self, log_level: int = logging.INFO):
+    @property
+    def top_level_requirements(self) -> set[str]:
+        # Add packages from requirements file
+        requirements = self.project_path / "requirements.txt"
+        lines = requirements.read_text().splitlines() if requirements.is_file() else []
+        return super().top_level_requirements | {name for name in map(parse_requirement_name, lines) if name is not None}
+
+    @property
+    def _lock_has_hashes(self) -> bool:
+        # Check if existing lockfile is hash-pinned
+        return self.lock_file.is_file() and "--hash=" in self.lock_file.read_text()
+
+    def _create_lockfile(self, log_level: int = logging.INFO, hashes: bool = False, find_links: list[Path] | None = None, dry_run: bool = False):
         # Use the dump method
-        self.dump(self.lock_file, log_level)
+        return self.dump(self.lock_file, log_level, hashes, find_links, dry_run)
 
     def _remove_lockfile(self):
         # Just remove the lock file if it exists
         if self.lock_file.is_file():  # pragma: no branch
             self.lock_file.unlink()
 
-    def _backend_upgrade_env(self) -> tuple[str, str] | None:
+    def _backend_upgrade_env(self, packages: list[str] | None = None) -> tuple[str, str] | None:
         """
         Get backend upgrade environment var name + arg, if any
+
+        :param packages: packages to be upgraded (all if None)
         """
 
         # Not implemented by default
@@ -675,9 +1419,13 @@ class EnvBackendWithRequirements(EnvBackend):
         # Refresh lockfile if it exists
         if self.lock_file.is_file():
             self._logger.info(f"Refresh {self.lock_file.name} file...")
-            self.lock()
+            try:
+                self.lock(hashes=self._lock_has_hashes, wheelhouse=self.wheelhouse)
+            except AssertionError as e:
+                # Environment is already upgraded at this point: don't fail, and keep previous lockfile
+                self._logger.warning(f"Failed to refresh {self.lock_file.name} file (previous one is kept): {e}")
 
-    def _delegate_upgrade(self, full: bool = True, only_deps: bool = False) -> int:
+    def _delegate_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> int:
         # Project path is mandatory
         assert self._project_path is not None, "Project path is not set"
 
@@ -686,7 +1434,7 @@ class EnvBackendWithRequirements(EnvBackend):
 
         # Force "refresh" option for backend
         env = dict(os.environ)
-        backend_env = self._backend_upgrade_env()
+        backend_env = self._backend_upgrade_env(packages)
         if backend_env is not None:  # pragma: no branch
             env_name, env_arg = backend_env
             env[env_name] = env.get(env_name, "") + f" {env_arg}"
@@ -706,6 +1454,67 @@ class EnvBackendWithRequirements(EnvBackend):
             psutil.Process(os.getppid()).kill()
         return rc
 
+    def _resolve_with_pip(
+        self, pip_command: list[str], upgrade: bool, extra_args: list[str] | None = None, packages: list[str] | None = None
+    ) -> dict[str, str | None]:
+        """
+        Resolve requirements file with pip, without installing anything
+
+        :param pip_command: command used to invoke pip
+        :param upgrade: if True, resolve latest versions (eagerly, as for upgrade); otherwise, keep already installed packages
+        :param extra_args: extra pip arguments
+        :param packages: if set, only resolve latest versions of these packages (and their dependencies, if required) instead of requirements file
+        :return: map of packages versions that would be installed (indexed by package name)
+        """
+
+        # Dry-run install, with a JSON installation report
+        assert self._project_path is not None, "Project path is not set"
+        with tempfile.TemporaryDirectory() as tmp:
+            report = Path(tmp) / "report.json"
+            run_subprocess(
+                pip_command
+                + ["install", "--dry-run", "--quiet", "--report", str(report)]
+                + (pip_targeted_upgrade_args(packages) if packages else ["-r", "requirements.txt"])
+                + (["--upgrade", "--upgrade-strategy=eager"] if upgrade and not packages else [])
+                + self._install_args
+                + (extra_args or []),
+                cwd=self._project_path,
+                logger=self._logger,
+                log_as_cmd=self._verbose_subprocess,
+            )
+            return {item["metadata"]["name"]: item["metadata"]["version"] for item in json.loads(report.read_text()).get("install", [])}
+
+    def _resolve_with_uv(self, uv_command: list[str], upgrade: bool, packages: list[str] | None = None) -> dict[str, str | None]:
+        """
+        Resolve requirements file with uv pip compile command, without installing anything
+
+        :param uv_command: command used to invoke uv pip compile (with target python option)
+        :param upgrade: if True, resolve latest versions; otherwise, installed packages versions are preferred
+        :param packages: if set, only resolve latest versions of these packages (installed versions are preferred for other ones)
+        :return: map of resolved packages versions (indexed by package name)
+        """
+
+        # Compile to a temporary output file, initialized with installed versions (used as preferences when not upgrading)
+        assert self._project_path is not None, "Project path is not set"
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "requirements.txt"
+            output.write_text("".join(f"{name}=={version}\n" for name, version in self.installed_packages.items() if not version.endswith(_EDITABLE_SUFFIX)))
+            run_subprocess(
+                uv_command
+                + ["requirements.txt", "--output-file", str(output), "--quiet", "--no-header", "--no-annotate"]
+                + (upgrade_packages_args(packages) if packages else ["--upgrade"] if upgrade else [])
+                + self._install_args,
+                cwd=self._project_path,
+                logger=self._logger,
+                log_as_cmd=self._verbose_subprocess,
+            )
+            pins = (_PIN_PATTERN.match(line) for line in output.read_text().splitlines())
+            return {m.group(1): m.group(2) for m in pins if m is not None}
+
+    def _resolve_upgrade(self, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> dict[str, str | None]:
+        # Environment is rebuilt from latest versions
+        return self._resolve_with_pip(self._pip_command, upgrade=True, packages=packages)
+
 
 class MutableEnvBackend(EnvBackend):
     def is_mutable(self) -> bool:
@@ -1,10 +1,11 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from jinja2 import Environment
 from typing_extensions import Self
 
+from .aio import _call_sync_hook
 from .completion import CompletionCommand
 
 
@@ -24,6 +25,62 @@ class BuildEnvInfo:
     """Name of the buildenv backend in use, if any (None otherwise)"""
 
 
+@dataclass
+class BuildEnvInputs:
+    """
+    Inputs declaration for an extension init method.
+
+    When an extension declares its inputs, buildenv computes a fingerprint of them after each successful init, and skips next init calls
+    as long as this fingerprint is unchanged (unless init is forced). The fingerprint also includes the extension distribution version,
+    so that an extension update systematically triggers a new init call.
+    """
+
+    files: list[str] = field(default_factory=list)
+    """Glob patterns of input files (relative to project root; files are compared on their size and modification time)"""
+
+    env_vars: list[str] = field(default_factory=list)
+    """Names of input environment variables"""
+
+    packages: list[str] = field(default_factory=list)
+    """Names of input packages (compared on their installed version)"""
+
+
+@dataclass
+class BuildEnvEnvironment:
+    """
+    Environment contribution of an extension, merged by buildenv in the environment of the launched shells and commands
+    (without requiring any activation script to be sourced).
+    """
+
+    variables: dict[str, str] = field(default_factory=dict)
+    """Environment variables to be set"""
+
+    path_prepend: list[Path] = field(default_factory=list)
+    """Folders to be added at the beginning of PATH (in provided order)"""
+
+    path_append: list[Path] = field(default_factory=list)
+    """Folders to be added at the end of PATH (in provided order)"""
+
+
+@dataclass
+class BuildEnvRenderItem:
+    """
+    Rendering request for a single file, used for batch rendering (see :meth:`BuildEnvRenderer.render_many`)
+    """
+
+    template: str
+    """Template file to render (relative to rendering environment)"""
+
+    executable: bool = False
+    """States if target file as to be set as executable"""
+
+    keywords: dict[str, str] | None = None
+    """Map of keywords provided to template"""
+
+    sub_path: Path | str | None = None
+    """Sub-path for the target file within the project"""
+
+
 class BuildEnvRenderer(ABC):
     """
     Rendering interface for buildenv extensions
@@ -44,6 +101,18 @@ class BuildEnvRenderer(ABC):
         """
         pass
 
+    def render_many(self, environment: Environment, items: list[BuildEnvRenderItem]):
+        """
+        Render a batch of extension files from templates.
+
+        The default implementation renders items one by one; buildenv implementation renders them concurrently, and streams generated content to disk.
+
+        :param environment: Jinja2 environment to use for rendering (shared by all items)
+        :param items: Files to be rendered
+        """
+        for item in items:
+            self.render(environment, item.template, item.executable, item.keywords, item.sub_path)
+
 
 class BuildEnvEntryPoint:
     """
@@ -64,6 +133,33 @@ class BuildEnvExtension(BuildEnvEntryPoint):
     :param info: BuildEnvInfo object holding information about the build environment
     """
 
+    @property
+    def before(self) -> set[str]:
+        """
+        Names of extensions which init method must be called after this extension one (unknown names are ignored).
+
+        Extensions without any relationship may be initialized concurrently, in separated threads.
+        """
+        return set()
+
+    @property
+    def after(self) -> set[str]:
+        """
+        Names of extensions which init method must be called before this extension one (unknown names are ignored).
+
+        Extensions without any relationship may be initialized concurrently, in separated threads.
+        """
+        return set()
+
+    @property
+    def inputs(self) -> BuildEnvInputs | None:
+        """
+        Declared inputs for this extension init method (see :class:`BuildEnvInputs`).
+
+        Default implementation returns None, meaning that init method is always called.
+        """
+        return None
+
     def init(self, force: bool) -> None:  # pragma: no cover
         """
         Method called by buildenv backend when initializing environment.
@@ -77,6 +173,17 @@ class BuildEnvExtension(BuildEnvEntryPoint):
         """
         raise NotImplementedError("Extension must implement init method")
 
+    async def ainit(self, force: bool) -> None:
+        """
+        Coroutine variant of :meth:`init`, awaited by buildenv backend on an asyncio loop shared with other extensions.
+
+        Extensions performing many I/O operations may override this method (instead of :meth:`init`), and use helpers from :mod:`buildenv.aio` module.
+        The default implementation calls :meth:`init` in a separated thread (or inline, when extensions hooks are run serially without hard time budget).
+
+        :param force: Tells the extension if the **--force** argument was used on the **buildenv init** command line.
+        """
+        await _call_sync_hook(self.init, force)
+
     def get_completion_commands(self) -> list[CompletionCommand]:
         """
         Method called by buildenv backend to get the list of commands to be completed.
@@ -89,6 +196,39 @@ class BuildEnvExtension(BuildEnvEntryPoint):
         # Default implementation: no command to be completed
         return []
 
+    async def aget_completion_commands(self) -> list[CompletionCommand]:
+        """
+        Coroutine variant of :meth:`get_completion_commands`, awaited by buildenv backend on an asyncio loop shared with other extensions.
+
+        The default implementation calls :meth:`get_completion_commands` in a separated thread (or inline, see :meth:`ainit`).
+
+        :return: List of commands to be completed
+        """
+        return await _call_sync_hook(self.get_completion_commands)
+
+    def get_environment(self) -> BuildEnvEnvironment | None:
+        """
+        Method called by buildenv backend when preparing the environment of a shell or command.
+
+        The extension can use this method to contribute environment variables and PATH folders as data (see :class:`BuildEnvEnvironment`),
+        instead of rendering activation scripts for each shell.
+
+        :return: Environment contribution, or None if the extension doesn't contribute to the environment
+        """
+
+        # Default implementation: no contribution
+        return None
+
+    async def aget_environment(self) -> BuildEnvEnvironment | None:
+        """
+        Coroutine variant of :meth:`get_environment`, awaited by buildenv backend on an asyncio loop shared with other extensions.
+
+        The default implementation calls :meth:`get_environment` in a separated thread (or inline, see :meth:`ainit`).
+
+        :return: Environment contribution, or None if the extension doesn't contribute to the environment
+        """
+        return await _call_sync_hook(self.get_environment)
+
     def generate_activation_scripts(self, renderer: BuildEnvRenderer):  # NOQA: B027
         """
         Method called by buildenv backend when generating activation scripts.
@@ -102,6 +242,16 @@ class BuildEnvExtension(BuildEnvEntryPoint):
         # Default implementation: do nothing
         pass
 
+    async def agenerate_activation_scripts(self, renderer: BuildEnvRenderer):
+        """
+        Coroutine variant of :meth:`generate_activation_scripts`, awaited by buildenv backend on an asyncio loop shared with other extensions.
+
+        The default implementation calls :meth:`generate_activation_scripts` in a separated thread (or inline, see :meth:`ainit`).
+
+        :param renderer: Rendering interface to use for generating activation scripts
+        """
+        await _call_sync_hook(self.generate_activation_scripts, renderer)
+
 
 class BuildEnvProjectTemplate(BuildEnvEntryPoint):
     """
@@ -14,6 +14,7 @@ from pytest_multilog import TestHelper
 
 import buildenv._shells.cmd as cmd_module
 import buildenv._shells.shell as buildenv_shell
+import buildenv.backends.backend as backend_module
 from buildenv.__main__ import buildenv
 from buildenv._shells.factory import BashShell, ShellFactory
 from buildenv._utils import is_windows, run_subprocess, to_linux_path
@@ -34,6 +35,13 @@ class PreservedEnvHelper(TestHelper):
         os.environ.clear()
         os.environ.update(preserved_env)
 
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, preserved_env: None) -> Path:
+        # Isolate buildenv cache folder in test folder
+        cache = self.test_folder / "cache"
+        os.environ["BUILDENV_CACHE_DIR"] = str(cache)
+        return cache
+
 
 class WithTmpDir(PreservedEnvHelper):
     @pytest.fixture
@@ -72,15 +80,8 @@ class WithVenv(WithTmpDir):
 
     @pytest.fixture
     def fake_git_parent(self, monkeypatch: pytest.MonkeyPatch, project: Path):
-        real_subprocess = subprocess.run
-
-        def fake_run(args: list[str], *posargs: list[Any], **kwargs: dict[str, str]):  # type: ignore
-            if args[:2] == ["git", "rev-parse"]:
-                return subprocess.CompletedProcess[str](args, 0, stdout=str(project), stderr="")
-            return real_subprocess(args, *posargs, **kwargs)  # type: ignore
-
-        # Fake git response for parent git directory detection
-        monkeypatch.setattr(subprocess, "run", fake_run)
+        # Fake parent git directory detection
+        monkeypatch.setattr(backend_module, "find_git_root", lambda path: project)
 
 
 class WithProject(PreservedEnvHelper):
@@ -144,6 +145,24 @@ class WithProject(PreservedEnvHelper):
         for f in existing_files:
             assert (project / f).stat().st_size == 0
 
+    def test_cli_install_dry_run(self, project: Path, backend: EnvBackend, fake_git_parent: None):
+        # Dry-run install: nothing is written
+        rc = buildenv(["install", "--backend", backend.name, "--project", str(project), "--no-template", "--dry-run"])
+        assert rc == 0
+        assert not (project / "buildenv.sh").is_file()
+        self.check_logs("  created   buildenv.sh")
+
+        # Install twice: unchanged files are not written again
+        backend.install(packages=["sample_package"])
+        script_mtime = (project / "buildenv.sh").stat().st_mtime_ns
+        backend.install(packages=["sample_package"])
+        assert (project / "buildenv.sh").stat().st_mtime_ns == script_mtime
+        self.check_logs("Skip buildenv.sh generation (unchanged)")
+
+        # Dry-run install again: everything is unchanged
+        backend.install(packages=["sample_package"], dry_run=True)
+        self.check_logs(["  unchanged buildenv.sh", "  unchanged buildenv.cmd"])
+
     def test_lock(self, project: Path, backend: EnvBackend):
         # Test locking from API
         lockfile = backend.lock_file
@@ -215,6 +234,11 @@ class WithProject(PreservedEnvHelper):
         rc = buildenv(["list"])
         assert rc == 0
 
+    def test_cli_extensions(self, project: Path):
+        # Test listing extensions timings through shell (CLI)
+        rc = buildenv(["extensions", "--timings"])
+        assert rc == 0
+
 
 class WithToolsProject(WithProject):
     @pytest.fixture(autouse=True)
@@ -589,7 +613,7 @@ class WithFunctionalBash(WithFunctionalShell):
     @pytest.fixture
     def bash(self) -> Generator[str, Any, None]:
         # Use shall factory to detect bash path
-        shell = ShellFactory.create("bash", self.test_folder, False, "fake", {}, [])
+        shell = ShellFactory.create("bash", self.test_folder, self.test_folder, False, "fake", {}, [])
         assert isinstance(shell, BashShell), f"Expected bash shell, got {type(shell)}"
         yield shell._shell_path  # type: ignore
 
@@ -0,0 +1,141 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from jinja2 import Environment, FileSystemLoader
+
+import buildenv
+import buildenv._envlock
+from buildenv._envlock import EnvLock, lock_folder
+from buildenv.backends._pip import LegacyPipBackend
+from buildenv.backends.backend import EnvBackend
+from buildenv.backends.factory import EnvBackendFactory
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestEnvLock(PreservedEnvHelper):
+    @pytest.fixture
+    def owner(self, monkeypatch: pytest.MonkeyPatch) -> Generator[subprocess.Popen[bytes]]:
+        # Another live process, owning a lock
+        monkeypatch.setattr(buildenv._envlock, "_POLL_DELAY", 0.05)
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        yield process
+        process.kill()
+        process.wait()
+
+    def hold(self, owner: subprocess.Popen[bytes], delay: float | None = None, on_release=None) -> threading.Thread | None:
+        # Take lock on behalf of owner process, and release it after a delay (if any)
+        folder = lock_folder(self.test_folder / "venv")
+        folder.mkdir()
+        (folder / "owner").write_text(str(owner.pid))
+        if delay is None:
+            return None
+
+        def release():
+            time.sleep(delay)
+            if on_release is not None:
+                on_release()
+            (folder / "owner").unlink()
+            folder.rmdir()
+
+        thread = threading.Thread(target=release, daemon=True)
+        thread.start()
+        return thread
+
+    def test_reentrant(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.delenv("BUILDENV_LOCK_OWNER", raising=False)
+        folder = lock_folder(self.test_folder / "venv")
+
+        # Nested locks in the same process
+        with EnvLock(self.test_folder / "venv") as lock:
+            assert folder.is_dir()
+            assert (folder / "owner").read_text() == str(os.getpid())
+            assert os.environ["BUILDENV_LOCK_OWNER"] == str(os.getpid())
+            with EnvLock(self.test_folder / "venv") as nested:
+                assert not nested.waited
+            assert folder.is_dir()
+        assert not lock.waited
+        assert not folder.exists()
+        assert "BUILDENV_LOCK_OWNER" not in os.environ
+
+    def test_parent_owner(self, owner: subprocess.Popen[bytes], monkeypatch: pytest.MonkeyPatch):
+        # Lock held by a parent process: no wait
+        self.hold(owner)
+        monkeypatch.setenv("BUILDENV_LOCK_OWNER", str(owner.pid))
+        with EnvLock(self.test_folder / "venv") as lock:
+            assert not lock.waited
+        assert lock_folder(self.test_folder / "venv").is_dir()
+
+    def test_wait(self, owner: subprocess.Popen[bytes]):
+        # Lock held by another process: wait for it
+        thread = self.hold(owner, 0.5)
+        assert thread is not None
+        with EnvLock(self.test_folder / "venv") as lock:
+            assert lock.waited
+            assert not thread.is_alive()
+        self.check_logs(f"Waiting for another buildenv process (pid {owner.pid}) working on this environment...")
+
+    def test_stale(self, monkeypatch: pytest.MonkeyPatch):
+        # Owner process is gone
+        folder = lock_folder(self.test_folder / "venv")
+        folder.mkdir()
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        (folder / "owner").write_text(str(process.pid))
+        with EnvLock(self.test_folder / "venv") as lock:
+            assert not lock.waited
+            assert (folder / "owner").read_text() == str(os.getpid())
+        self.check_logs(f"Take over stale venv.mutex lock (owner process {process.pid} is gone)")
+
+        # Unknown owner, and too old lock
+        monkeypatch.setenv("BUILDENV_LOCK_TIMEOUT", "60")
+        folder.mkdir()
+        os.utime(folder, (time.time() - 120, time.time() - 120))
+        with EnvLock(self.test_folder / "venv"):
+            pass
+        self.check_logs("Take over stale venv.mutex lock (older than 60s)")
+        assert not folder.exists()
+
+    def test_backend_upgrade(self, owner: subprocess.Popen[bytes], monkeypatch: pytest.MonkeyPatch):
+        # Fake pip project (in test folder), with installed packages versions read from venv content
+        (self.test_folder / "venv" / "bin").mkdir(parents=True)
+        (self.test_folder / "venv" / "version").write_text("1.0")
+        monkeypatch.setattr(EnvBackendFactory, "_ENV_BIN", self.test_folder / "venv" / "bin")
+        monkeypatch.setattr(LegacyPipBackend, "installed_packages", property(lambda s: {"foo": (s.venv_root / "version").read_text()}))
+        monkeypatch.setattr(LegacyPipBackend, "_delegate_upgrade", lambda *_: pytest.fail("Upgrade from other process should be reused"))
+        backend: EnvBackend = EnvBackendFactory.create("pip", self.test_folder, verbose_subprocess=False)
+
+        # Other process upgrades environment meanwhile
+        self.hold(owner, 0.5, lambda: (self.test_folder / "venv" / "version").write_text("2.0"))
+        assert backend.upgrade() == 0
+        self.check_logs(["Environment was upgraded by another buildenv process meanwhile", "foo     updated (from 1.0 to 2.0)"])
+
+    def test_loader_exit_trap(self):
+        # Loader lock fragment: lock is released on exit, and a previously set exit trap is still run
+        fragment = Path(buildenv.__file__).parent / "_templates" / "backends" / "fragments" / "lock.sh.jinja"
+        script = f"trap 'echo previous trap' EXIT\n. '{fragment.as_posix()}'\n_lock_env venv\necho \"owner $(cat venv.mutex/owner)\"\n"
+        result = subprocess.run(["bash", "-c", script], cwd=self.test_folder, capture_output=True, text=True, check=True)
+        assert result.stdout.splitlines()[0].startswith("owner ")
+        assert result.stdout.splitlines()[1:] == ["previous trap"]
+        assert not lock_folder(self.test_folder / "venv").exists()
+
+    def test_loader_fast_path(self, owner: subprocess.Popen[bytes]):
+        # Pip loader: lock held by another process is ignored when venv is already built
+        templates = Path(buildenv.__file__).parent / "_templates"
+        loader = Environment(loader=FileSystemLoader(templates)).get_template("backends/pip/buildenv.sh.jinja").render(comment="# ", command="true")
+        (self.test_folder / "buildenv.sh").write_text(loader)
+        (self.test_folder / "venv" / "bin").mkdir(parents=True)
+        (self.test_folder / "venv" / "bin" / "buildenv").write_text("#!/bin/sh\necho delegated $*\n")
+        (self.test_folder / "venv" / "bin" / "buildenv").chmod(0o755)
+        (self.test_folder / "venv" / ".ok").touch()
+        self.hold(owner)
+        result = subprocess.run(["bash", "buildenv.sh", "shell"], cwd=self.test_folder, capture_output=True, text=True, check=True, timeout=10)
+        assert "delegated shell" in result.stdout
+        assert "Waiting for another buildenv process" not in result.stdout
+        assert lock_folder(self.test_folder / "venv").is_dir()
@@ -1,18 +1,30 @@
+import asyncio
 import importlib.metadata
+import json
+import os
+import re
+import sys
+import threading
+import time
 from pathlib import Path
 
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 from jinja2 import Environment, FileSystemLoader
 
+import buildenv._fingerprints as fingerprints_module
 from buildenv.__main__ import buildenv
+from buildenv._scheduler import default_jobs
+from buildenv._utils import project_state_folder
+from buildenv.aio import run_subprocess
 from buildenv.backends._uv import EnvBackend
 from buildenv.backends.factory import EnvBackendFactory
-from buildenv.extension import BuildEnvExtension, BuildEnvRenderer
-from tests.commons2 import TEMPLATES, FakeBash, WithToolsProject, WithUvVenv
+from buildenv.completion import CompletionCommand, EvalCompletionCommand
+from buildenv.extension import BuildEnvEnvironment, BuildEnvExtension, BuildEnvInputs, BuildEnvRenderer
+from tests.commons2 import TEMPLATES, FakeBash, WithToolsProject, WithUvVenv, WithVenv
 
 
-class TestExtension(FakeBash):
+class TestExtension(WithVenv, FakeBash):
     def test_extension_bad_class(self, monkeypatch: MonkeyPatch):
         # Fake extension class
         class FakeExtension:
@@ -97,6 +109,32 @@ class TestExtension(FakeBash):
             b = EnvBackendFactory.create("uvx", self.test_folder)
             b.run("foo")
 
+    def test_extension_get_environment_failed(self, monkeypatch: MonkeyPatch):
+        # Fake extension class
+        class FakeExtension(BuildEnvExtension):
+            def init(self, force: bool):
+                # Nothing to fo
+                pass
+
+            def get_environment(self):
+                # Something went bad
+                raise RuntimeError("some environment error")
+
+        # Fake entry point class
+        class FakeEntryPoint:
+            name = "foo"
+
+            def load(self):
+                return FakeExtension
+
+        # Patch entry points iteration
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda group, **kwargs: [FakeEntryPoint()] if group == "buildenv_extension" else [])  # type: ignore
+
+        # Prepare backend to trigger extension loading
+        with pytest.raises(AssertionError, match="Error occurred while getting foo extension environment: some environment error"):
+            b = EnvBackendFactory.create("uvx", self.test_folder)
+            b.run("foo")
+
     def test_extension_generate_activation_scripts_failed(self, monkeypatch: MonkeyPatch):
         # Fake extension class
         class FakeExtension(BuildEnvExtension):
@@ -218,3 +256,322 @@ class TestExtensionGeneration(WithUvVenv, WithToolsProject, FakeBash):
         # Check that the script was not generated
         generated_script = tmp_dir / "activate" / "some_script.sh"
         assert not generated_script.is_file()
+
+
+class TestExtensionScheduler(WithVenv, FakeBash):
+    def patch_extensions(self, monkeypatch: MonkeyPatch, extensions: dict[str, type[BuildEnvExtension]]):
+        # Fake entry point class
+        class FakeEntryPoint:
+            def __init__(self, name: str, ext_class: type[BuildEnvExtension]):
+                self.name = name
+                self.ext_class = ext_class
+
+            def load(self):
+                return self.ext_class
+
+        # Patch entry points iteration
+        points = [FakeEntryPoint(name, ext_class) for name, ext_class in extensions.items()]
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda group, **kwargs: points if group == "buildenv_extension" else [])  # type: ignore
+
+    def make_extension(self, calls: list[str], before: set[str] | None = None, after: set[str] | None = None, barrier: threading.Barrier | None = None):
+        # Fake extension class, remembering init calls
+        class FakeExtension(BuildEnvExtension):
+            @property
+            def before(self) -> set[str]:
+                return before if before else set()
+
+            @property
+            def after(self) -> set[str]:
+                return after if after else set()
+
+            def init(self, force: bool):
+                if barrier is not None:
+                    # Wait for concurrent extension
+                    barrier.wait()
+                calls.append(str(after))
+
+        return FakeExtension
+
+    def test_order(self, monkeypatch: MonkeyPatch):
+        # Extensions declared in reverse order of their dependencies (+ two independent ones waiting for each other)
+        calls: list[str] = []
+        barrier = threading.Barrier(2, timeout=5)
+        self.patch_extensions(
+            monkeypatch,
+            {
+                "a": self.make_extension(calls, after={"b", "unknown"}),
+                "b": self.make_extension(calls, after={"c"}),
+                "c": self.make_extension(calls, before={"b"}),
+                "d": self.make_extension(calls, barrier=barrier),
+                "e": self.make_extension(calls, barrier=barrier),
+            },
+        )
+
+        # All inits are called (concurrently), respecting order
+        os.environ["BUILDENV_INIT_JOBS"] = "4"
+        EnvBackendFactory.create("uvx", self.test_folder).init()
+        assert calls.index("None") < calls.index("{'c'}") < calls.index(str({"b", "unknown"}))
+        assert len(calls) == 5
+        self.check_logs("a extension init took")
+
+    def test_errors(self, monkeypatch: MonkeyPatch):
+        # Failing extensions
+        def failing(message: str, after: set[str] | None = None):
+            class FailingExtension(BuildEnvExtension):
+                @property
+                def after(self) -> set[str]:
+                    return after if after else set()
+
+                def init(self, force: bool):
+                    raise RuntimeError(message)
+
+            return FailingExtension
+
+        calls: list[str] = []
+        self.patch_extensions(monkeypatch, {"z": failing("z error"), "a": failing("a error"), "b": self.make_extension(calls, after={"a"})})
+
+        # Errors are reported in extensions order, and dependent extensions are skipped
+        os.environ["BUILDENV_INIT_JOBS"] = "4"
+        with pytest.raises(AssertionError, match="Errors occurred while calling extensions init:\n- z: z error\n- a: a error$"):
+            EnvBackendFactory.create("uvx", self.test_folder).init()
+        assert calls == []
+        self.check_logs("Skip b extension init, as a extension(s) init failed")
+
+    def test_serial(self, monkeypatch: MonkeyPatch):
+        # Serial run (by default)
+        calls: list[str] = []
+        self.patch_extensions(monkeypatch, {"a": self.make_extension(calls, after={"b"}), "b": self.make_extension(calls)})
+        os.environ.pop("BUILDENV_INIT_JOBS", None)
+        assert default_jobs() == 1
+        EnvBackendFactory.create("uvx", self.test_folder).init()
+        assert calls == ["None", "{'b'}"]
+
+        # Synchronous hooks are called inline when run serially (in a separated thread when run concurrently)
+        threads: list[threading.Thread] = []
+
+        class ThreadExtension(BuildEnvExtension):
+            def init(self, force: bool):
+                threads.append(threading.current_thread())
+
+        self.patch_extensions(monkeypatch, {"t": ThreadExtension})
+        EnvBackendFactory.create("uvx", self.test_folder).init()
+        os.environ["BUILDENV_INIT_JOBS"] = "4"
+        EnvBackendFactory.create("uvx", self.test_folder).init()
+        assert threads[0] is threading.current_thread()
+        assert threads[1] is not threading.current_thread()
+
+    def test_cycle(self, monkeypatch: MonkeyPatch):
+        # Dependencies cycle
+        calls: list[str] = []
+        self.patch_extensions(
+            monkeypatch,
+            {
+                "a": self.make_extension(calls, after={"b"}),
+                "b": self.make_extension(calls, after={"c"}),
+                "c": self.make_extension(calls, before={"b"}, after={"a"}),
+            },
+        )
+        with pytest.raises(AssertionError, match="Dependencies cycle detected between extensions: a -> c -> b -> a"):
+            EnvBackendFactory.create("uvx", self.test_folder).init()
+        assert calls == []
+
+    def test_budgets(self, fake_venv: Path, monkeypatch: MonkeyPatch):
+        # Slow extensions
+        def sleeping(duration: float):
+            class SleepingExtension(BuildEnvExtension):
+                def init(self, force: bool):
+                    time.sleep(duration)
+
+            return SleepingExtension
+
+        self.patch_extensions(monkeypatch, {"a": sleeping(0.05), "b": sleeping(5), "c": sleeping(0)})
+
+        # Soft budget for all extensions, hard one for b
+        os.environ["BUILDENV_EXT_BUDGETS"] = "init=0.01, b.init=:0.2"
+        backend = EnvBackendFactory.create("uvx", self.test_folder)
+        start = time.perf_counter()
+        with pytest.raises(
+            AssertionError,
+            match=r"Error occurred while calling b extension init: exceeded its hard time budget \(0.2s\), but its synchronous code can't be stopped and is still",
+        ):
+            backend.init()
+        assert time.perf_counter() - start < 4
+        self.check_logs(re.compile(r"a extension init took [0-9.]+s, exceeding its soft time budget \(0.01s\)"))
+
+        # Timings history is recorded in venv, for this project
+        history = json.loads((project_state_folder(fake_venv, self.test_folder) / ".buildenv_timings.json").read_text())
+        assert sorted(history.keys()) == ["a", "b", "c"]
+        assert history["a"]["init"][0] >= 0.05
+
+        # Timings report
+        assert backend.extensions(timings=True) == 0
+        self.check_logs(re.compile(r"a +init +1 +[0-9.]+s +[0-9.]+s +[0-9.]+s +0.01s/-"))
+        self.check_logs(re.compile(r"b +init +1 +[0-9.]+s +[0-9.]+s +[0-9.]+s +-/0.2s"))
+
+        # Coroutine hooks are aborted
+        class AsyncSleepingExtension(BuildEnvExtension):
+            async def ainit(self, force: bool):
+                await asyncio.sleep(5)
+
+        self.patch_extensions(monkeypatch, {"d": AsyncSleepingExtension})
+        os.environ["BUILDENV_EXT_BUDGETS"] = "init=:0.2"
+        with pytest.raises(AssertionError, match=r"Error occurred while calling d extension init: aborted, as it exceeded its hard time budget \(0.2s\)$"):
+            EnvBackendFactory.create("uvx", self.test_folder).init()
+
+        # Not shared with other projects using the same venv
+        other_project = self.test_folder / "other"
+        other_project.mkdir()
+        assert EnvBackendFactory.create("uvx", other_project).extensions(timings=True) == 0
+        self.check_logs("No extensions timings recorded yet")
+
+    def test_budgets_invalid(self, monkeypatch: MonkeyPatch):
+        calls: list[str] = []
+        self.patch_extensions(monkeypatch, {"a": self.make_extension(calls)})
+        for spec in ["foo=1", "init", "init=-1", "init=foo", "init=2:1"]:
+            os.environ["BUILDENV_EXT_BUDGETS"] = spec
+            with pytest.raises(AssertionError, match="BUILDENV_EXT_BUDGETS entry"):
+                EnvBackendFactory.create("uvx", self.test_folder).init()
+        assert calls == []
+
+    def test_extensions_list(self, monkeypatch: MonkeyPatch):
+        # Simple list, and empty timings report
+        calls: list[str] = []
+        self.patch_extensions(monkeypatch, {"a": self.make_extension(calls)})
+        backend = EnvBackendFactory.create("uvx", self.test_folder)
+        assert backend.extensions() == 0
+        self.check_logs(re.compile(r"a +tests==\?"))
+        assert backend.extensions(timings=True) == 0
+        self.check_logs("No extensions timings recorded yet")
+
+
+class TestExtensionInputs(WithVenv, FakeBash):
+    @pytest.fixture
+    def init_calls(self, monkeypatch: MonkeyPatch) -> list[bool]:
+        calls: list[bool] = []
+
+        # Fake extension class, declaring its inputs
+        class FakeExtension(BuildEnvExtension):
+            @property
+            def inputs(self) -> BuildEnvInputs | None:
+                return BuildEnvInputs(files=["*.cfg"], env_vars=["FOO_INPUT"], packages=["jinja2", "unknown-package"])
+
+            def init(self, force: bool):
+                calls.append(force)
+
+        # Fake entry point class
+        class FakeEntryPoint:
+            name = "foo"
+
+            def load(self):
+                return FakeExtension
+
+        # Patch entry points iteration
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda group, **kwargs: [FakeEntryPoint()] if group == "buildenv_extension" else [])  # type: ignore
+        return calls
+
+    def test_inputs(self, fake_venv: Path, init_calls: list[bool], monkeypatch: MonkeyPatch):
+        backend = EnvBackendFactory.detect(fake_venv)
+
+        # First init, then skipped one
+        backend.init()
+        backend.init()
+        assert init_calls == [False]
+        self.check_logs("Skip foo extension init (inputs unchanged)")
+
+        # Input file change
+        (fake_venv / "foo.cfg").write_text("some config")
+        backend.init()
+        assert init_calls == [False, False]
+
+        # Input env var change
+        os.environ["FOO_INPUT"] = "bar"
+        backend.init()
+        backend.init()
+        assert init_calls == [False, False, False]
+
+        # Forced init
+        backend.init(force=True)
+        assert init_calls == [False, False, False, True]
+
+        # Extension update
+        monkeypatch.setattr(fingerprints_module, "extension_version", lambda ext: "foo==2.0")
+        backend.init()
+        assert init_calls == [False, False, False, True, False]
+
+        # Other project sharing the same venv: fingerprints are not shared
+        other_project = self.test_folder / "other"
+        other_project.mkdir()
+        EnvBackendFactory.detect(other_project).init()
+        assert init_calls == [False, False, False, True, False, False]
+        backend.init()
+        assert init_calls == [False, False, False, True, False, False]
+
+
+class TestExtensionAsync(WithUvVenv, WithToolsProject, FakeBash):
+    @pytest.fixture
+    def outputs(self) -> list[str]:
+        return []
+
+    @pytest.fixture
+    def backend(self, project: Path, outputs: list[str], monkeypatch: MonkeyPatch) -> EnvBackend:
+        # Fake extension class, with coroutine hooks only
+        class FakeExtension(BuildEnvExtension):
+            async def ainit(self, force: bool):
+                cp = await run_subprocess([sys.executable, "-c", "print('hello from async init')"])
+                outputs.append(cp.stdout.strip())
+
+            async def aget_completion_commands(self) -> list[CompletionCommand]:
+                return [EvalCompletionCommand("foo-completion")]
+
+            async def agenerate_activation_scripts(self, renderer: BuildEnvRenderer):
+                renderer.render(Environment(loader=FileSystemLoader(TEMPLATES)), "some_script.sh.jinja")
+
+            async def aget_environment(self) -> BuildEnvEnvironment | None:
+                return BuildEnvEnvironment(variables={"FOO_VAR": "foo"}, path_prepend=[project / "first", project / "second"], path_append=[project / "last"])
+
+        # Other extension, with synchronous environment hook
+        class OtherExtension(BuildEnvExtension):
+            def init(self, force: bool):
+                pass
+
+            def get_environment(self) -> BuildEnvEnvironment | None:
+                return BuildEnvEnvironment(variables={"FOO_VAR": "bar", "OTHER_VAR": "other"}, path_prepend=[project / "first"])
+
+        # Fake entry point class
+        class FakeEntryPoint:
+            def __init__(self, name: str, ext_class: type[BuildEnvExtension]):
+                self.name = name
+                self.ext_class = ext_class
+
+            def load(self):
+                return self.ext_class
+
+        # Patch entry points iteration
+        points = [FakeEntryPoint("foo", FakeExtension), FakeEntryPoint("other", OtherExtension)]
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda group, **kwargs: points if group == "buildenv_extension" else [])  # type: ignore
+
+        return EnvBackendFactory.detect(project)
+
+    def get_extra_expected_files(self) -> list[str]:
+        # Add expected files to the list
+        return ["activate/some_script.sh"]
+
+    def test_async_hooks(self, backend: EnvBackend, outputs: list[str], tmp_dir: Path, patch_run_process: None):
+        # Run command to init extension and generate activation scripts
+        backend.run("echo Hello")
+
+        # Check that async hooks were awaited
+        assert outputs == ["hello from async init"]
+        assert (tmp_dir / "activate" / "some_script.sh").is_file()
+        assert "foo-completion" in (tmp_dir / "activate" / "completion.sh").read_text()
+
+    def test_environment(self, backend: EnvBackend, project: Path, tmp_dir: Path):
+        # Extensions environment contributions are merged in extensions order
+        env = backend.shell_instance.get_env(tmp_dir)
+        assert env["FOO_VAR"] == "bar"
+        assert env["OTHER_VAR"] == "other"
+        paths = env["PATH"].split(os.pathsep)
+        assert paths[0] == str((tmp_dir / "bin").resolve())
+        assert paths[1:3] == [str((project / "first").resolve()), str((project / "second").resolve())]
+        assert paths[-1] == str((project / "last").resolve())
+        self.check_logs("other extension overrides FOO_VAR environment variable")
@@ -0,0 +1,99 @@
+import pytest
+
+from buildenv._generations import GenerationsStore
+from buildenv._staging import staging_folder
+from buildenv.backends._pip import LegacyPipBackend
+from buildenv.backends.backend import EnvBackend
+from buildenv.backends.factory import EnvBackendFactory
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestGenerations(PreservedEnvHelper):
+    @pytest.fixture
+    def backend(self, monkeypatch: pytest.MonkeyPatch) -> EnvBackend:
+        # Fake pip project, with a fake venv and some installed packages (versions read from venv content), and enabled generations
+        monkeypatch.setenv("BUILDENV_GENERATIONS", "3")
+        project = self.test_folder / "project"
+        (project / "venv" / "bin").mkdir(parents=True)
+        (project / "venv" / "version").write_text("1.0")
+        monkeypatch.setattr(EnvBackendFactory, "_ENV_BIN", project / "venv" / "bin")
+        monkeypatch.setattr(LegacyPipBackend, "installed_packages", property(lambda s: {"foo": (s.venv_root / "version").read_text()}))
+        monkeypatch.setattr(
+            LegacyPipBackend,
+            "handle_updates",
+            lambda s, old, print_updates=True: (s.project_path / "requirements.lock").write_text(f"foo=={s.installed_packages['foo']}\n"),
+        )
+
+        def fake_upgrade(self: EnvBackend, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> int:
+            # Fake upgrade in current venv: bump version (as a new file)
+            version = self.venv_root / "version"
+            new_version = f"{int(float(version.read_text())) + 1}.0"
+            version.unlink()
+            version.write_text(new_version)
+            return 0
+
+        monkeypatch.setattr(LegacyPipBackend, "_delegate_upgrade", fake_upgrade)
+        (project / "requirements.lock").write_text("foo==1.0\n")
+        return EnvBackendFactory.create("pip", project, verbose_subprocess=False)
+
+    def test_rollback(self, backend: EnvBackend):
+        live = backend.venv_root
+        store = GenerationsStore(live.absolute())
+
+        # Nothing to roll back yet
+        assert backend.generations() == 0
+        self.check_logs("No previous environment generation is kept")
+        with pytest.raises(AssertionError, match="No previous environment generation is kept"):
+            backend.rollback()
+
+        # Upgrade twice: previous environments are kept
+        assert backend.upgrade() == 0
+        assert backend.upgrade() == 0
+        assert (live / "version").read_text() == "3.0"
+        assert [g.id for g in store.list()] == [2, 1]
+        assert store.get(1).packages == {"foo": "1.0"}
+        assert store.get(2).locks["requirements.lock"] == "foo==2.0\n"
+
+        # List generations, with changes
+        assert backend.generations() == 0
+        self.check_logs(["Generation 2, from ", "foo     updated (from 3.0 to 2.0)", "Generation 1, from ", "foo     updated (from 3.0 to 1.0)"])
+
+        # Roll back to first generation: current environment is kept
+        assert backend.rollback(1) == 0
+        self.check_logs(["Rolled back to environment generation 1", "foo     updated (from 3.0 to 1.0)"])
+        assert (live / "version").read_text() == "1.0"
+        assert (backend.project_path / "requirements.lock").read_text() == "foo==1.0\n"
+        assert {g.id: g.packages["foo"] for g in store.list()} == {3: "3.0", 2: "2.0"}
+
+        # Roll forward to latest generation
+        assert backend.rollback() == 0
+        assert (live / "version").read_text() == "3.0"
+        assert (backend.project_path / "requirements.lock").read_text() == "foo==3.0\n"
+        with pytest.raises(AssertionError, match="Unknown environment generation: 1 \\(kept ones: 4, 2\\)"):
+            backend.rollback(1)
+
+    def test_blue_green(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        # Blue/green upgrade (without validation): previous live environment is kept as is
+        monkeypatch.setattr(LegacyPipBackend, "_validate_venv", lambda _: 0)
+        assert backend.upgrade(blue_green=True) == 0
+        store = GenerationsStore(backend.venv_root.absolute())
+        assert (store.get(1).venv / "version").read_text() == "1.0"
+        assert (backend.venv_root / "version").read_text() == "2.0"
+        assert not staging_folder(backend.venv_root).exists()
+
+    def test_settings(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        store = GenerationsStore(backend.venv_root.absolute())
+
+        # Limited number of generations
+        monkeypatch.setenv("BUILDENV_GENERATIONS", "2")
+        for _ in range(3):
+            assert backend.upgrade() == 0
+        assert [g.id for g in store.list()] == [3, 2]
+
+        # Disabled generations (by default)
+        monkeypatch.delenv("BUILDENV_GENERATIONS")
+        assert backend.upgrade() == 0
+        assert [g.id for g in store.list()] == [3, 2]
+        with pytest.raises(AssertionError, match="Environment generations are disabled \\(set BUILDENV_GENERATIONS environment variable to keep some\\)"):
+            backend.generations()
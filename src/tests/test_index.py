@@ -0,0 +1,166 @@
+import json
+import threading
+import urllib.parse
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+
+from buildenv._index import IndexFile, PackageVersions, SimpleIndex, latest_versions, parse_project_page
+from buildenv.backends.factory import EnvBackendFactory
+
+from .commons2 import PreservedEnvHelper
+
+# Fake project page (JSON API)
+FOO_PAGE = {
+    "files": [
+        {"filename": "foo-1.0-py3-none-any.whl"},
+        {"filename": "foo-1.1.tar.gz", "requires-python": ">=3.8"},
+        {"filename": "foo-2.0-cp27-cp27m-win32.whl"},
+        {"filename": "foo-3.0-py3-none-any.whl", "requires-python": ">=99"},
+        {"filename": "foo-4.0-py3-none-any.whl", "yanked": "broken"},
+        {"filename": "foo-5.0a1-py3-none-any.whl"},
+        {"filename": "foo.exe"},
+    ]
+}
+
+
+class _IndexHandler(BaseHTTPRequestHandler):
+    # Simple index server, with ETag support
+    requests: list[str] = []
+
+    def do_GET(self):
+        # (absolute URLs are received when acting as a proxy)
+        _IndexHandler.requests.append(self.path)
+        if urllib.parse.urlsplit(self.path).path != "/simple/foo/":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+        else:
+            body = json.dumps(FOO_PAGE).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.pypi.simple.v1+json")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object):
+        pass
+
+
+class TestIndex(PreservedEnvHelper):
+    @pytest.fixture
+    def server(self, monkeypatch: pytest.MonkeyPatch) -> Generator[str]:
+        # Local index server (reached without proxy)
+        for var in ("HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY", "http_proxy", "https_proxy", "no_proxy"):
+            monkeypatch.delenv(var, raising=False)
+        _IndexHandler.requests = []
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _IndexHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_address[1]}/simple"
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture
+    def mirror(self) -> Path:
+        # Local index mirror (HTML page, and raw files)
+        mirror = self.test_folder / "mirror"
+        (mirror / "foo").mkdir(parents=True)
+        (mirror / "foo" / "index.html").write_text(
+            '<html><body><a href="../../files/foo-1.0.tar.gz#sha256=00">foo-1.0.tar.gz</a>'
+            + '<a href="foo-2.0.tar.gz" data-requires-python="&gt;=99">foo-2.0.tar.gz</a></body></html>'
+        )
+        (mirror / "bar").mkdir()
+        (mirror / "bar" / "bar-1.2-py3-none-any.whl").touch()
+        return mirror
+
+    def test_parse(self):
+        # Both page formats
+        assert parse_project_page(json.dumps(FOO_PAGE), "application/vnd.pypi.simple.v1+json")[4] == IndexFile("foo-4.0-py3-none-any.whl", None, True)
+        assert parse_project_page('<a href="x/foo-1.0.tar.gz" data-requires-python="&lt;4" data-yanked="">foo</a><a>nothing</a>') == [
+            IndexFile("foo-1.0.tar.gz", "<4", True)
+        ]
+
+        # Latest versions, ignoring yanked files
+        files = parse_project_page(json.dumps(FOO_PAGE))
+        assert latest_versions(files) == PackageVersions(Version("3.0"), Version("1.1"))
+        assert latest_versions(files, prereleases=True) == PackageVersions(Version("5.0a1"), Version("5.0a1"))
+        assert latest_versions([]) == PackageVersions()
+
+        # Files hashes
+        assert parse_project_page('<a href="x/foo-1.0.tar.gz#sha256=abc">foo</a><a href="foo-1.1.tar.gz#md5=def">foo</a>') == [
+            IndexFile("foo-1.0.tar.gz", sha256="abc"),
+            IndexFile("foo-1.1.tar.gz"),
+        ]
+        assert parse_project_page('{"files": [{"filename": "foo-1.0.tar.gz", "hashes": {"sha256": "abc"}}]}') == [IndexFile("foo-1.0.tar.gz", sha256="abc")]
+
+    def test_local_mirror(self, mirror: Path):
+        # Folder path, or file URL
+        for url in (str(mirror), mirror.as_uri()):
+            assert SimpleIndex(url).latest_versions({"foo": "1.0", "Bar": "1.0", "unknown": "1.0"}) == {
+                "foo": PackageVersions(Version("2.0"), Version("1.0")),
+                "Bar": PackageVersions(Version("1.2"), Version("1.2")),
+                "unknown": PackageVersions(),
+            }
+
+    def test_files_hashes(self, mirror: Path):
+        # Hashes of locked versions files (files without hashes are ignored)
+        assert SimpleIndex(str(mirror)).files_hashes({"foo": "1.0", "Bar": "1.2", "unknown": "1.0"}) == {"foo": ["00"], "Bar": [], "unknown": []}
+
+    def test_remote(self, server: str):
+        # First query
+        cache = self.test_folder / "cache"
+        expected = {"foo": PackageVersions(Version("3.0"), Version("1.1")), "bar": PackageVersions()}
+        assert SimpleIndex(server, cache, ttl=600).latest_versions({"foo": "1.0", "bar": "1.0"}) == expected
+        assert sorted(_IndexHandler.requests) == ["/simple/bar/", "/simple/foo/"]
+
+        # Fresh cache: no query
+        assert SimpleIndex(server, cache, ttl=600).latest_versions({"foo": "1.0"}) == {"foo": expected["foo"]}
+        assert len(_IndexHandler.requests) == 2
+
+        # Expired cache: revalidated
+        assert SimpleIndex(server, cache, ttl=0).latest_versions({"foo": "1.0"}) == {"foo": expected["foo"]}
+        assert len(_IndexHandler.requests) == 3
+
+    def test_proxy(self, server: str, monkeypatch: pytest.MonkeyPatch):
+        # Query through proxy (local server acting as a proxy)
+        monkeypatch.setenv("http_proxy", server.removesuffix("/simple"))
+        expected = {"foo": PackageVersions(Version("3.0"), Version("1.1"))}
+        assert SimpleIndex("http://index.invalid/simple", self.test_folder / "cache").latest_versions({"foo": "1.0"}) == expected
+        assert _IndexHandler.requests == ["http://index.invalid/simple/foo/"]
+
+        # Bypassed proxy
+        monkeypatch.setenv("http_proxy", "http://127.0.0.1:1")
+        monkeypatch.setenv("no_proxy", "127.0.0.1")
+        assert SimpleIndex(server, self.test_folder / "cache2").latest_versions({"foo": "1.0"}) == expected
+        assert _IndexHandler.requests[1] == "/simple/foo/"
+
+    def test_remote_error(self):
+        # Unreachable index: package is ignored
+        assert SimpleIndex("http://127.0.0.1:1/simple", self.test_folder / "cache").latest_versions({"foo": "1.0"}) == {}
+        self.check_logs("Failed to query package index for foo")
+
+    def test_backend_outdated(self, mirror: Path, monkeypatch: pytest.MonkeyPatch):
+        # Fake pip project, with some installed packages
+        project = self.test_folder / "project"
+        (project / "venv" / "bin").mkdir(parents=True)
+        monkeypatch.setattr(EnvBackendFactory, "_ENV_BIN", project / "venv" / "bin")
+        monkeypatch.setenv("BUILDENV_INDEX_URL", str(mirror))
+        backend = EnvBackendFactory.create("pip", project, verbose_subprocess=False)
+
+        # Outdated packages
+        monkeypatch.setattr(type(backend), "installed_packages", property(lambda _: {"foo": "1.0", "bar": "1.0", "baz": "1.0 (editable)"}))
+        assert backend.outdated() == 0
+        self.check_logs(["Package Version Latest compatible Latest", "bar     1.0     1.2               1.2", "foo     1.0     1.0               2.0"])
+
+        # Up to date
+        monkeypatch.setattr(type(backend), "installed_packages", property(lambda _: {"bar": "1.2"}))
+        assert backend.outdated() == 0
+        self.check_logs("All packages are up to date")
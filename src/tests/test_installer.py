@@ -0,0 +1,138 @@
+import hashlib
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import buildenv._installer
+from buildenv._installer import find_wheels, is_compatible, main, parse_lockfile
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestInstaller(PreservedEnvHelper):
+    def make_wheel(self, folder: Path) -> Path:
+        # Tiny pure python wheel, with a module, a console script, a data script and a data file
+        folder.mkdir(parents=True, exist_ok=True)
+        wheel = folder / "foo_bar-1.0-py3-none-any.whl"
+        with zipfile.ZipFile(wheel, "w") as zf:
+            zf.writestr("foo_bar/__init__.py", "def main():\n    print('Hello from foo')\n")
+            zf.writestr("foo_bar-1.0.dist-info/METADATA", "Metadata-Version: 2.1\nName: foo-bar\nVersion: 1.0\n")
+            zf.writestr("foo_bar-1.0.dist-info/WHEEL", "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n")
+            zf.writestr("foo_bar-1.0.dist-info/entry_points.txt", "[console_scripts]\nfoo = foo_bar:main\n")
+            zf.writestr("foo_bar-1.0.dist-info/RECORD", "")
+            zf.writestr("foo_bar-1.0.data/scripts/bar", "#!python\nprint('Hello from bar')\n")
+            zf.writestr("foo_bar-1.0.data/data/share/foo/readme.txt", "Foo data\n")
+        return wheel
+
+    def make_lock(self, wheel: Path, digest: str | None = None) -> Path:
+        # Hash-pinned lockfile
+        lock = self.test_folder / "requirements.lock"
+        digest = digest if digest is not None else hashlib.sha256(wheel.read_bytes()).hexdigest()
+        lock.write_text(f"# Locked\nfoo-bar==1.0 \\\n    --hash=sha256:{digest}\n")
+        return lock
+
+    def test_parse_lockfile(self):
+        # Hash-pinned lock
+        lock = self.test_folder / "requirements.lock"
+        lock.write_text("Foo_Bar==1.0 --hash=sha256:abc --hash=sha256:def\n\n# Comment\nother==2.0 --hash=sha256:123\n")
+        assert parse_lockfile(lock) == {"foo-bar": ("1.0", {"abc", "def"}), "other": ("2.0", {"123"})}
+
+        # Not hash-pinned lock
+        lock.write_text("foo==1.0\n")
+        assert parse_lockfile(lock) is None
+
+    def test_is_compatible(self):
+        # Some wheel tags
+        cp = f"cp{sys.version_info.major}{sys.version_info.minor}"
+        assert is_compatible("foo-1.0-py3-none-any.whl")
+        assert is_compatible("foo-1.0-1-py2.py3-none-any.whl")
+        assert not is_compatible("foo-1.0-py2-none-any.whl")
+        assert not is_compatible("foo-1.0-cp20-cp20-any.whl")
+        assert not is_compatible(f"foo-1.0-{cp}-{cp}-win_amd64.whl")
+        assert not is_compatible("invalid.whl")
+
+    def test_linux_platform_tags(self, monkeypatch: pytest.MonkeyPatch):
+        # Linux wheels are selected depending on libc version
+        cp = f"cp{sys.version_info.major}{sys.version_info.minor}"
+        monkeypatch.setattr(buildenv._installer.sysconfig, "get_platform", lambda: "linux-x86_64")
+
+        def check(glibc: tuple[int, int] | None, musl: tuple[int, int] | None, tags: dict[str, bool]):
+            buildenv._installer._platform_tags.cache_clear()
+            monkeypatch.setattr(buildenv._installer, "_glibc_version", lambda: glibc)
+            monkeypatch.setattr(buildenv._installer, "_musl_version", lambda arch: musl)
+            for tag, expected in tags.items():
+                assert is_compatible(f"foo-1.0-{cp}-{cp}-{tag}.whl") == expected, tag
+
+        try:
+            check(
+                (2, 28),
+                None,
+                {
+                    "linux_x86_64": True,
+                    "manylinux_2_17_x86_64.manylinux2014_x86_64": True,
+                    "manylinux2014_x86_64": True,
+                    "manylinux1_x86_64": True,
+                    "manylinux_2_28_x86_64": True,
+                    "manylinux_2_34_x86_64": False,
+                    "manylinux_2_17_aarch64": False,
+                    "musllinux_1_1_x86_64": False,
+                },
+            )
+            check((2, 12), None, {"manylinux2010_x86_64": True, "manylinux2014_x86_64": False, "manylinux_2_17_x86_64": False})
+            check(None, (1, 2), {"musllinux_1_1_x86_64": True, "musllinux_1_2_x86_64": True, "musllinux_1_3_x86_64": False, "manylinux_2_17_x86_64": False})
+            check(None, None, {"linux_x86_64": True, "manylinux_2_17_x86_64": False, "musllinux_1_1_x86_64": False})
+        finally:
+            buildenv._installer._platform_tags.cache_clear()
+
+    def test_install(self):
+        # Real venv without pip
+        venv = self.test_folder / "venv"
+        subprocess.run([sys.executable, "-m", "venv", "--without-pip", str(venv)], check=True)
+        wheel = self.make_wheel(self.test_folder / "wheelhouse")
+        lock = self.make_lock(wheel)
+
+        # Install with venv python
+        cp = subprocess.run(
+            [str(venv / "bin" / "python"), buildenv._installer.__file__, str(venv), str(lock), str(wheel.parent)], capture_output=True, text=True, check=False
+        )
+        assert cp.returncode == 0, cp.stdout
+        assert "Installed 1 packages with built-in installer" in cp.stdout
+
+        # Check installed package
+        dist_info = next(venv.glob("lib/python*/site-packages/foo_bar-1.0.dist-info"))
+        assert (dist_info / "INSTALLER").read_text() == "buildenv\n"
+        records = (dist_info / "RECORD").read_text()
+        assert "foo_bar/__init__.py,sha256=" in records
+        assert "../../../bin/foo,sha256=" in records
+        assert "../../../share/foo/readme.txt,sha256=" in records
+        assert (venv / "share" / "foo" / "readme.txt").read_text() == "Foo data\n"
+        assert subprocess.run([str(venv / "bin" / "foo")], capture_output=True, text=True, check=True).stdout == "Hello from foo\n"
+        assert subprocess.run([str(venv / "bin" / "bar")], capture_output=True, text=True, check=True).stdout == "Hello from bar\n"
+        version = subprocess.run(
+            [str(venv / "bin" / "python"), "-c", "import importlib.metadata as m; print(m.version('foo-bar'))"], capture_output=True, text=True, check=True
+        )
+        assert version.stdout == "1.0\n"
+
+    def test_install_failures(self):
+        # Bad arguments
+        assert main([]) == 1
+
+        # Not hash-pinned lock
+        wheel = self.make_wheel(self.test_folder / "wheelhouse")
+        venv = self.test_folder / "venv"
+        lock = self.test_folder / "requirements.lock"
+        lock.write_text("foo-bar==1.0\n")
+        assert main([str(venv), str(lock), str(wheel.parent)]) == 1
+
+        # Hash mismatch
+        lock = self.make_lock(wheel, digest="0" * 64)
+        assert main([str(venv), str(lock), str(wheel.parent)]) == 1
+        assert not list(venv.glob("**/foo_bar-1.0.dist-info"))
+
+        # Missing wheel
+        wheel.unlink()
+        with pytest.raises(AssertionError, match="Can't find any compatible wheel for these locked packages: foo-bar"):
+            find_wheels({"foo-bar": ("1.0", {"0" * 64})}, [wheel.parent])
@@ -0,0 +1,103 @@
+import functools
+from pathlib import Path
+
+import pytest
+
+import buildenv.backends.backend as backend_module
+from buildenv._inventory import PackagesInventory, parse_requirement_name
+from buildenv.backends.factory import EnvBackendFactory
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestInventory(PreservedEnvHelper):
+    @pytest.fixture
+    def site_packages(self) -> Path:
+        # Fake installed distributions
+        site_packages = self.test_folder / "site-packages"
+        for name, requires in {
+            "Foo_App": ["bar>=1", "Baz[x]", 'old; python_version < "3"'],
+            "bar": [],
+            "baz": ['extra-x; extra == "x"', 'extra-y; extra == "y"'],
+            "extra-x": [],
+            "extra-y": [],
+            "old": [],
+            "unused": ["bar"],
+        }.items():
+            dist_info = site_packages / f"{name}-1.0.dist-info"
+            dist_info.mkdir(parents=True)
+            (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n" + "".join(f"Requires-Dist: {r}\n" for r in requires))
+        return site_packages
+
+    @pytest.fixture
+    def inventory(self, site_packages: Path) -> functools.partial[PackagesInventory]:
+        venv = self.test_folder / "venv"
+        venv.mkdir()
+        return functools.partial(PackagesInventory, venv, [str(site_packages)])
+
+    def test_parse_requirement_name(self):
+        assert parse_requirement_name("Foo_Bar[x]>=1.0 ; python_version > '3' # comment") == "foo-bar"
+        assert parse_requirement_name("# comment") is None
+        assert parse_requirement_name("-r other.txt") is None
+        assert parse_requirement_name("./some/path") is None
+
+    def test_graph(self, inventory: functools.partial[PackagesInventory]):
+        # Dependencies (with markers evaluation and requested extras)
+        inv = inventory()
+        assert inv.get("foo-app").requires == ["bar", "baz"]
+        assert inv.get("baz").requires == ["extra-x"]
+        assert inv.get("bar").required_by == ["foo-app", "unused"]
+        assert inv.get("old").required_by == []
+        with pytest.raises(AssertionError, match="Package missing is not installed"):
+            inv.get("missing")
+
+        # Reachable packages
+        assert inv.reachable({"foo-app", "not-installed"}) == {"foo-app", "bar", "baz", "extra-x"}
+
+        # Trees
+        assert inv.format_tree(["foo-app", "unused", "baz"]) == [
+            "Foo_App 1.0",
+            "├── bar 1.0",
+            "└── baz 1.0",
+            "    └── extra-x 1.0",
+            "unused 1.0",
+            "└── bar 1.0",
+            "baz 1.0 (*)",
+        ]
+        assert inv.format_tree(["extra-x"], reverse=True, top_level={"foo-app"}) == ["extra-x 1.0", "└── baz 1.0", "    └── Foo_App 1.0 (top-level)"]
+
+    def test_persisted(self, inventory: functools.partial[PackagesInventory], site_packages: Path, monkeypatch: pytest.MonkeyPatch):
+        # Build once
+        assert "bar" in inventory().packages
+
+        # Reloaded from cache while distributions are unchanged
+        with monkeypatch.context() as m:
+            m.setattr(PackagesInventory, "_build", lambda self: {})
+            assert "bar" in inventory().packages
+
+        # Rebuilt on change
+        (site_packages / "new-1.0.dist-info").mkdir()
+        (site_packages / "new-1.0.dist-info" / "METADATA").write_text("Metadata-Version: 2.1\nName: new\nVersion: 1.0\n")
+        assert "new" in inventory().packages
+
+    def test_backend_commands(self, site_packages: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]):
+        # Fake pip project, with fake distributions
+        project = self.test_folder / "project"
+        (project / "venv" / "bin").mkdir(parents=True)
+        (project / "requirements.txt").write_text("foo-app\n")
+        monkeypatch.setattr(EnvBackendFactory, "_ENV_BIN", project / "venv" / "bin")
+        monkeypatch.setattr(backend_module, "PackagesInventory", functools.partial(PackagesInventory, path=[str(site_packages)]))
+        backend = EnvBackendFactory.create("pip", project, verbose_subprocess=False)
+        assert {"buildenv", "pip", "foo-app"} <= backend.top_level_requirements
+
+        # Why
+        assert backend.why("Bar") == 0
+        assert capsys.readouterr().out == "bar 1.0\n├── Foo_App 1.0 (top-level)\n└── unused 1.0\n"
+
+        # Tree
+        assert backend.tree() == 0
+        assert capsys.readouterr().out.startswith("Foo_App 1.0\n├── bar 1.0\n")
+
+        # Unused packages
+        assert backend.tree(unused=True) == 0
+        self.check_logs(["extra-y 1.0", "old     1.0", "unused  1.0"])
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import buildenv._artifacts as artifacts_module
+from buildenv.__main__ import buildenv
+from buildenv._artifacts import parse_artifact_name
+from buildenv.backends.factory import EnvBackend, EnvBackendFactory
+
+from .commons2 import WithVenv
+
+
+class TestLockHashes(WithVenv):
+    @pytest.fixture
+    def backend(self, fake_venv: Path, monkeypatch: pytest.MonkeyPatch) -> EnvBackend:
+        # Fake installed packages, and local (empty) package index
+        (self.test_folder / "index").mkdir()
+        monkeypatch.setenv("BUILDENV_INDEX_URL", str(self.test_folder / "index"))
+        monkeypatch.setattr(EnvBackend, "installed_packages", property(lambda self: {"Foo.Bar": "1.0", "baz": "2.0 (editable)"}))  # type: ignore
+        return EnvBackendFactory.detect(fake_venv, verbose_subprocess=False)
+
+    @pytest.fixture
+    def wheelhouse(self) -> Path:
+        # Fake artifacts folder
+        wheelhouse = self.test_folder / "wheelhouse"
+        wheelhouse.mkdir()
+        (wheelhouse / "foo_bar-1.0-py3-none-any.whl").write_bytes(b"some wheel")
+        (wheelhouse / "foo.bar-1.0.tar.gz").write_bytes(b"some sdist")
+        (wheelhouse / "foo_bar-2.0-py3-none-any.whl").write_bytes(b"other version")
+        (wheelhouse / "README.txt").write_text("not an artifact")
+        return wheelhouse
+
+    def test_parse_artifact_name(self):
+        assert parse_artifact_name("Foo_Bar-1.0-1-py3-none-any.whl") == ("foo-bar", "1.0")
+        assert parse_artifact_name("foo.bar-1.0.zip") == ("foo-bar", "1.0")
+        assert parse_artifact_name("foo-1.0.whl") is None
+        assert parse_artifact_name("foo.tar.gz") is None
+        assert parse_artifact_name("foo-1.0.txt") is None
+
+    def test_lock_hashes(self, backend: EnvBackend, wheelhouse: Path):
+        # Lock with hashes
+        rc = backend.lock(hashes=True, find_links=[wheelhouse])
+        assert rc == 0
+
+        # Check lockfile content
+        expected_hashes = sorted(hashlib.sha256(content).hexdigest() for content in (b"some wheel", b"some sdist"))
+        content = backend.lock_file.read_text()
+        assert f"Foo.Bar==1.0 \\\n    --hash=sha256:{expected_hashes[0]} \\\n    --hash=sha256:{expected_hashes[1]}\n" in content
+        assert "baz" not in content
+        self.check_logs("Editable package baz can't be hash-pinned")
+
+    def test_lock_hashes_cache(self, backend: EnvBackend, wheelhouse: Path, monkeypatch: pytest.MonkeyPatch):
+        # First lock to populate cache
+        backend.lock(hashes=True, find_links=[wheelhouse])
+        content = backend.lock_file.read_text()
+
+        # Second lock: nothing should be hashed again
+        def fail_hash(path: Path) -> str:
+            raise AssertionError(f"Unexpected hash computation for {path}")
+
+        monkeypatch.setattr(artifacts_module, "_sha256", fail_hash)
+        backend.lock(hashes=True, find_links=[wheelhouse])
+        assert backend.lock_file.read_text() == content
+
+    def test_lock_hashes_missing(self, backend: EnvBackend):
+        # Lock with hashes, without any artifact
+        with pytest.raises(AssertionError, match="Can't find any artifact to hash for these packages: Foo.Bar \\(not found on package index; use --find-links"):
+            backend.lock(hashes=True, find_links=[self.test_folder])
+
+    def index_page(self, files: list[tuple[str, str]]):
+        # Fake project page on local index
+        (self.test_folder / "index" / "foo-bar").mkdir(exist_ok=True)
+        (self.test_folder / "index" / "foo-bar" / "index.json").write_text(json.dumps({"files": [{"filename": f, "hashes": {"sha256": h}} for f, h in files]}))
+
+    def test_lock_hashes_index(self, backend: EnvBackend, wheelhouse: Path):
+        # Lock with hashes, from package index (all files of the locked version)
+        self.index_page([("foo_bar-1.0-py3-none-any.whl", "aa"), ("foo.bar-1.0.tar.gz", "bb"), ("foo_bar-2.0-py3-none-any.whl", "cc")])
+        assert backend.lock(hashes=True) == 0
+        assert "Foo.Bar==1.0 \\\n    --hash=sha256:aa \\\n    --hash=sha256:bb\n" in backend.lock_file.read_text()
+
+        # Local artifacts hashes are added to index ones
+        assert backend.lock(hashes=True, find_links=[wheelhouse]) == 0
+        content = backend.lock_file.read_text()
+        assert "--hash=sha256:aa \\\n    --hash=sha256:bb \\\n" in content
+        assert f"--hash=sha256:{hashlib.sha256(b'some wheel').hexdigest()}" in content
+
+    def test_lock_refresh_hashes_missing(self, backend: EnvBackend, wheelhouse: Path):
+        # Lock with hashes, then refresh without any artifact: previous lockfile is kept
+        backend.lock(hashes=True, find_links=[wheelhouse])
+        content = backend.lock_file.read_text()
+        backend.handle_updates(backend.installed_packages, print_updates=False)
+        assert backend.lock_file.read_text() == content
+        self.check_logs("Failed to refresh requirements.lock file (previous one is kept): Can't find any artifact to hash for these packages: Foo.Bar")
+
+    def test_lock_refresh_hashes(self, backend: EnvBackend, wheelhouse: Path, monkeypatch: pytest.MonkeyPatch):
+        # Lock with hashes, then refresh (hashes fetched from index; locally built wheels in pip cache are ignored)
+        backend.lock(hashes=True, find_links=[wheelhouse])
+        self.index_page([("foo_bar-1.0-py3-none-any.whl", "aa")])
+        (wheelhouse / "wheels").mkdir()
+        (wheelhouse / "foo_bar-1.0-py3-none-any.whl").rename(wheelhouse / "wheels" / "foo_bar-1.0-py3-none-any.whl")
+        monkeypatch.setenv("PIP_CACHE_DIR", str(wheelhouse))
+        backend.handle_updates(backend.installed_packages, print_updates=False)
+        assert "Foo.Bar==1.0 \\\n    --hash=sha256:aa\n" in backend.lock_file.read_text()
+
+    def test_lock_dry_run(self, fake_venv: Path, backend: EnvBackend):
+        # Dry-run lock: nothing is written
+        rc = buildenv(["lock", "--dry-run", "-p", str(fake_venv)])
+        assert rc == 0
+        assert not backend.lock_file.is_file()
+        assert not (fake_venv / "buildenv.lock").is_file()
+        self.check_logs(["  created   requirements.lock", "  created   buildenv.lock"])
+
+        # Lock twice: unchanged files are not written again
+        backend.lock()
+        lock_mtime = backend.lock_file.stat().st_mtime_ns
+        flag_mtime = (fake_venv / "buildenv.lock").stat().st_mtime_ns
+        backend.lock()
+        assert backend.lock_file.stat().st_mtime_ns == lock_mtime
+        assert (fake_venv / "buildenv.lock").stat().st_mtime_ns == flag_mtime
+
+        # Dry-run lock again: everything is unchanged, unless wheelhouse mode is requested
+        backend.lock(dry_run=True)
+        self.check_logs(["  unchanged requirements.lock", "  unchanged buildenv.lock"])
+        backend.lock(wheelhouse=Path("wheelhouse"), dry_run=True)
+        self.check_logs(["Wheels collection in", "  changed   buildenv.lock"])
+        assert (fake_venv / "buildenv.lock").read_text() == ""
+
+    def test_cli_lock_hashes(self, fake_venv: Path, backend: EnvBackend, wheelhouse: Path):
+        # Lock with hashes from CLI
+        rc = buildenv(["lock", "--hashes", "--find-links", str(wheelhouse), "-p", str(fake_venv)])
+        assert rc == 0
+        assert "--hash=sha256:" in backend.lock_file.read_text()
+
+
+class TestLockWheelhouse(WithVenv):
+    @pytest.fixture
+    def backend(self, fake_venv: Path, monkeypatch: pytest.MonkeyPatch) -> EnvBackend:
+        # Fake installed packages
+        monkeypatch.setattr(EnvBackend, "installed_packages", property(lambda self: {"Foo.Bar": "1.0", "baz": "2.0 (editable)"}))  # type: ignore
+        return EnvBackendFactory.detect(fake_venv, verbose_subprocess=False)
+
+    @pytest.fixture
+    def pip_calls(self, monkeypatch: pytest.MonkeyPatch) -> list[list[str]]:
+        # Fake pip download/wheel commands
+        calls: list[list[str]] = []
+
+        def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+            calls.append(args)
+            if "download" in args:
+                (Path(args[args.index("--dest") + 1]) / "foo.bar-1.0.tar.gz").write_bytes(b"some sdist")
+            elif "wheel" in args:
+                (Path(args[args.index("--wheel-dir") + 1]) / "foo_bar-1.0-py3-none-any.whl").write_bytes(b"some wheel")
+            return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+        monkeypatch.setattr(subprocess, "run", fake_run)
+        return calls
+
+    def test_lock_wheelhouse(self, backend: EnvBackend, fake_venv: Path, pip_calls: list[list[str]]):
+        # Prepare outdated wheelhouse content
+        wheelhouse = fake_venv / "wheelhouse"
+        wheelhouse.mkdir()
+        (wheelhouse / "foo_bar-0.9-py3-none-any.whl").write_bytes(b"outdated")
+
+        # Lock with wheelhouse
+        rc = backend.lock(hashes=True, wheelhouse=Path("wheelhouse"))
+        assert rc == 0
+
+        # Check collected wheels and lock files
+        assert sorted(p.name for p in wheelhouse.iterdir()) == ["foo_bar-1.0-py3-none-any.whl"]
+        assert (fake_venv / "buildenv.lock").read_text() == "wheelhouse"
+        assert backend.wheelhouse == wheelhouse
+        assert f"--hash=sha256:{hashlib.sha256(b'some wheel').hexdigest()}\n" in backend.lock_file.read_text()
+        assert pip_calls[0][-5:] == ["--python-version", f"{sys.version_info.major}.{sys.version_info.minor}", "--dest", str(wheelhouse), "foo-bar==1.0"]
+
+        # Packages are now installed offline from wheelhouse
+        backend.add_packages(["Foo.Bar"])
+        assert pip_calls[-1][-3:] == ["--no-index", "--find-links", str(wheelhouse)]
+
+        # Unlock: back to online mode
+        backend.unlock()
+        assert backend.wheelhouse is None
+
+    def test_lock_wheelhouse_build_error(self, backend: EnvBackend, fake_venv: Path, monkeypatch: pytest.MonkeyPatch):
+        # Fake pip download/wheel commands
+        def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+            if "download" in args:
+                (Path(args[args.index("--dest") + 1]) / "foo.bar-1.0.tar.gz").write_bytes(b"some sdist")
+            return subprocess.CompletedProcess(args, 1 if "wheel" in args else 0, stdout="", stderr="")
+
+        monkeypatch.setattr(subprocess, "run", fake_run)
+
+        # Lock with wheelhouse
+        with pytest.raises(AssertionError, match="Failed to build wheels from these sdists: foo.bar-1.0.tar.gz"):
+            backend.lock(wheelhouse=Path("wheelhouse"))
+
+    def test_lock_wheelhouse_unsupported(self):
+        # Wheelhouse mode is not supported by uv backend
+        with pytest.raises(AssertionError, match="Wheelhouse mode is not supported by uv backend"):
+            EnvBackendFactory.create("uv", self.test_folder).lock(wheelhouse=Path("wheelhouse"))
@@ -1,4 +1,6 @@
+import json
 import os
+import shutil
 import subprocess
 from collections.abc import Generator
 from pathlib import Path
@@ -6,6 +8,7 @@ from typing import Any
 
 import pytest
 
+import buildenv.backends.backend
 from buildenv._shells.bash import BashShell
 from buildenv._shells.cmd import CmdShell
 from buildenv.backends import EnvBackend, EnvBackendFactory
@@ -51,14 +54,114 @@ class TestPipBash(WithPip, WithBash):
             install_cmd_args.extend(args)
             return subprocess.CompletedProcess[str](args, 0, stdout="", stderr="")
 
-        # Mock subprocess.run to simulate package installation
+        # Mock subprocess.run to simulate package installation (+ precompilation step)
         monkeypatch.setattr(subprocess, "run", fake_run)
+        precompiled: list[Path] = []
+        monkeypatch.setattr(buildenv.backends.backend, "precompile", lambda venv, **kwargs: precompiled.append(venv))
 
         # Add packages
         backend.add_packages(["requests"])
 
         # Check command arguments
         assert install_cmd_args == [str(backend._venv_bin / "python"), "-m", "pip", "install", "requests"]  # pyright: ignore[reportPrivateUsage]
+        assert precompiled == [backend.venv_root]
+
+    def test_uv_installer(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        install_cmds: list[list[str]] = []
+
+        def fake_run(args: list[str], **kwargs: dict[str, str]):
+            # Remember command arguments
+            install_cmds.append(args)
+            return subprocess.CompletedProcess[str](args, 0, stdout="", stderr="")
+
+        # Mock subprocess.run + uv availability, and enable accelerated installer mode
+        monkeypatch.setattr(subprocess, "run", fake_run)
+        monkeypatch.setattr(shutil, "which", lambda cmd: f"/fake/{cmd}")
+        monkeypatch.setenv("BUILDENV_INSTALLER", "uv")
+        monkeypatch.setenv("BUILDENV_PIP_ARGS", "--foo")
+
+        # Add packages + upgrade are delegated to uv
+        backend.add_packages(["requests"])
+        assert backend._delegate_upgrade() == 0  # pyright: ignore[reportPrivateUsage]
+        python = str(backend._venv_bin / "python")  # pyright: ignore[reportPrivateUsage]
+        assert install_cmds == [
+            ["/fake/uv", "pip", "install", "--python", python, "requests", "--foo"],
+            ["/fake/uv", "pip", "install", "--python", python, "-r", "requirements.txt", "--upgrade", "--foo"],
+        ]
+
+        # Fallback to pip when uv is not available
+        install_cmds.clear()
+        monkeypatch.setattr(shutil, "which", lambda cmd: None)
+        backend.add_packages(["requests"])
+        assert install_cmds == [[python, "-m", "pip", "install", "requests", "--foo"]]
+        assert backend.has_pip()
+
+    def test_targeted_upgrade(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        cmds: list[list[str]] = []
+
+        def fake_run(args: list[str], **kwargs: dict[str, str]):
+            # Remember command arguments
+            cmds.append(args)
+            return subprocess.CompletedProcess[str](args, 0, stdout="", stderr="")
+
+        # Mock subprocess.run
+        monkeypatch.setattr(subprocess, "run", fake_run)
+
+        # Only listed packages are upgraded by pip (within requirements constraints)...
+        python = str(backend._venv_bin / "python")  # pyright: ignore[reportPrivateUsage]
+        assert backend._delegate_upgrade(packages=["foo", "bar"]) == 0  # pyright: ignore[reportPrivateUsage]
+        assert cmds == [[python, "-m", "pip", "install", "foo", "bar", "-c", "requirements.txt", "--upgrade", "--upgrade-strategy=only-if-needed"]]
+
+        # ... or by uv in accelerated installer mode
+        cmds.clear()
+        monkeypatch.setattr(shutil, "which", lambda cmd: f"/fake/{cmd}")
+        monkeypatch.setenv("BUILDENV_INSTALLER", "uv")
+        assert backend._delegate_upgrade(packages=["foo"]) == 0  # pyright: ignore[reportPrivateUsage]
+        assert cmds == [["/fake/uv", "pip", "install", "--python", python, "-r", "requirements.txt", "--upgrade-package", "foo"]]
+
+    def test_upgrade_dry_run(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        cmds: list[list[str]] = []
+
+        def fake_run(args: list[str], **kwargs: dict[str, str]):
+            # Remember command arguments, and fake resolution output
+            cmds.append(args)
+            if "--report" in args:
+                report = {"install": [{"metadata": {"name": "Foo", "version": "2.0"}}, {"metadata": {"name": "bar", "version": "1.0"}}]}
+                Path(args[args.index("--report") + 1]).write_text(json.dumps(report))
+            else:
+                output = Path(args[args.index("--output-file") + 1])
+                assert output.read_text() == "foo==1.0\n"
+                output.write_text("-e file:///project\nfoo==3.0 ; python_version >= '3.10'\n")
+            return subprocess.CompletedProcess[str](args, 0, stdout="", stderr="")
+
+        # Mock subprocess.run + installed packages
+        monkeypatch.setattr(subprocess, "run", fake_run)
+        monkeypatch.setattr(LegacyPipBackend, "installed_packages", property(lambda _: {"foo": "1.0", "project": "0.1 (editable)"}))
+
+        # Dry-run upgrade is resolved with pip
+        assert backend.upgrade(dry_run=True) == 0
+        python = str(backend._venv_bin / "python")  # pyright: ignore[reportPrivateUsage]
+        assert cmds[0][:7] == [python, "-m", "pip", "install", "--dry-run", "--quiet", "--report"]
+        assert cmds[0][8:] == ["-r", "requirements.txt", "--upgrade", "--upgrade-strategy=eager"]
+        self.check_logs(["Some packages would be updated:", "bar     added (1.0)", "foo     updated (from 1.0 to 2.0)"])
+
+        # Targeted dry-run upgrade
+        cmds.clear()
+        assert backend.upgrade(dry_run=True, packages=["foo"]) == 0
+        assert cmds[0][8:] == ["foo", "-c", "requirements.txt", "--upgrade", "--upgrade-strategy=only-if-needed"]
+
+        # ... or with uv in accelerated installer mode
+        cmds.clear()
+        monkeypatch.setattr(shutil, "which", lambda cmd: f"/fake/{cmd}")
+        monkeypatch.setenv("BUILDENV_INSTALLER", "uv")
+        assert backend.upgrade(dry_run=True) == 0
+        assert cmds[0][:6] == ["/fake/uv", "pip", "compile", "--python", python, "requirements.txt"]
+        self.check_logs("foo     updated (from 1.0 to 3.0)")
+
+        # Targeted dry-run upgrade
+        cmds.clear()
+        assert backend.upgrade(dry_run=True, packages=["foo"]) == 0
+        assert cmds[0][-2:] == ["--upgrade-package", "foo"]
 
 
 class TestPipCmd(WithPip, WithCmd):
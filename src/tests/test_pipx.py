@@ -1,14 +1,18 @@
+import os
+import subprocess
 from collections.abc import Generator
 from pathlib import Path
 from typing import Any
 
 import pytest
+from jinja2 import Environment, FileSystemLoader
 
+import buildenv
 from buildenv._shells.bash import BashShell
 from buildenv._shells.cmd import CmdShell
 from buildenv.backends import EnvBackend, EnvBackendFactory
 from buildenv.backends._pipx import PipXBackend
-from tests.commons2 import WithBash, WithCmd, WithFunctionalBash, WithFunctionalCmd, WithPipxVenv, WithToolsProject
+from tests.commons2 import PreservedEnvHelper, WithBash, WithCmd, WithFunctionalBash, WithFunctionalCmd, WithPipxVenv, WithToolsProject
 
 
 class WithPipx(WithPipxVenv, WithToolsProject):
@@ -26,6 +30,22 @@ class TestPipxBash(WithPipx, WithBash):
         assert isinstance(backend, PipXBackend)
         assert isinstance(backend.shell_instance, BashShell)
 
+    def test_targeted_upgrade(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        env: dict[str, str] = {}
+
+        def fake_run(args: list[str], **kwargs: Any):
+            # Remember command environment
+            env.update(kwargs.get("env") or {})
+            return subprocess.CompletedProcess[str](args, 0, stdout="", stderr="")
+
+        # Mock subprocess.run
+        monkeypatch.setattr(subprocess, "run", fake_run)
+
+        # Targeted upgrade is not supported: falls back to full upgrade
+        assert backend.upgrade(packages=["foo"]) == 0
+        self.check_logs("pipx backend doesn't support targeted upgrades; all packages will be upgraded")
+        assert "--no-cache" in env["BUILDENV_PIPX_ARGS"]
+
 
 class TestPipxCmd(WithPipx, WithCmd):
     def test_pipx_backend(self, backend: EnvBackend):
@@ -46,3 +66,23 @@ class TestFunctionalPipxBash(WithFunctionalBash):
 class TestFunctionalPipxCmd(WithFunctionalCmd):
     def test_real_life(self, cmd: str):
         self.run_real_life_version("pipx", [cmd, "/c"], "buildenv.cmd", PIPX_UPDATED_ENV | {"PIPX_HOME": str(self.test_folder / ".pipx")})
+
+
+class TestPipxLoader(PreservedEnvHelper):
+    def test_wheelhouse_path(self):
+        # Render loader, with a fake pipx command (printing its pip arguments)
+        templates = Path(buildenv.__file__).parent / "_templates"
+        loader = Environment(loader=FileSystemLoader(templates)).get_template("backends/pipx/buildenv.sh.jinja").render(comment="# ", command="true")
+        (self.test_folder / "buildenv.sh").write_text(loader)
+        fake_bin = self.test_folder / "bin"
+        fake_bin.mkdir()
+        (fake_bin / "pipx").write_text('#!/bin/sh\necho "pip-args: $5"\n')
+        (fake_bin / "pipx").chmod(0o755)
+        env = dict(os.environ, PATH=f"{fake_bin}{os.pathsep}{os.environ['PATH']}")
+        (self.test_folder / "requirements.lock").write_text("foo==1.0\n")
+
+        # Wheelhouse in project (relative path), and outside of it (absolute path)
+        for content, expected in [("wheels", f"{self.test_folder}/wheels"), ("/some/wheels", "/some/wheels")]:
+            (self.test_folder / "buildenv.lock").write_text(content)
+            result = subprocess.run(["bash", "buildenv.sh"], cwd=self.test_folder, env=env, capture_output=True, text=True, check=True)
+            assert f"pip-args: --no-index --find-links {expected} -r {self.test_folder}/requirements.lock" in result.stdout
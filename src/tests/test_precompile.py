@@ -0,0 +1,81 @@
+import importlib.util
+import subprocess
+import sysconfig
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from buildenv._precompile import main, precompile, precompile_mode
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestPrecompile(PreservedEnvHelper):
+    @pytest.fixture
+    def venv(self) -> Path:
+        # Fake venv, with a package in site-packages
+        venv = self.test_folder / "venv"
+        site_packages = Path(sysconfig.get_paths(vars={"base": str(venv), "platbase": str(venv)})["purelib"])
+        (site_packages / "foo").mkdir(parents=True)
+        (site_packages / "foo" / "__init__.py").write_text("X = 1\n")
+        return venv
+
+    def pyc(self, venv: Path) -> Path:
+        return Path(importlib.util.cache_from_source(str(next(venv.glob("**/foo/__init__.py")))))
+
+    def test_mode(self, monkeypatch: pytest.MonkeyPatch):
+        # Default + configured modes
+        monkeypatch.delenv("BUILDENV_PRECOMPILE", raising=False)
+        assert precompile_mode() == "off"
+        monkeypatch.setenv("BUILDENV_PRECOMPILE", "Eager")
+        assert precompile_mode() == "eager"
+        monkeypatch.setenv("BUILDENV_PRECOMPILE", "foo")
+        with pytest.raises(AssertionError, match="Invalid BUILDENV_PRECOMPILE value \\(expected one of off/lazy/eager\\): foo"):
+            precompile_mode()
+
+    def test_off(self, venv: Path):
+        # Nothing compiled
+        assert precompile(venv, "off")
+        assert not self.pyc(venv).exists()
+
+    def test_eager(self, venv: Path):
+        # Compile
+        assert precompile(venv, "eager")
+        pyc = self.pyc(venv)
+        assert pyc.is_file()
+        self.check_logs("Precompiled installed packages in ")
+
+        # Already valid .pyc files are not recompiled
+        mtime = pyc.stat().st_mtime_ns
+        assert precompile(venv, "eager")
+        assert pyc.stat().st_mtime_ns == mtime
+
+        # Files with syntax errors are reported
+        (pyc.parent.parent / "bar.py").write_text("def (:\n")
+        assert not precompile(venv, "eager")
+
+    def test_lazy(self, venv: Path, monkeypatch: pytest.MonkeyPatch):
+        popen_args: list[Any] = []
+
+        # Fake background process
+        monkeypatch.setattr(subprocess, "Popen", lambda args, **kwargs: popen_args.append((args, kwargs)))
+        assert precompile(venv, "lazy")
+        assert not self.pyc(venv).exists()
+        args, kwargs = popen_args[0]
+        assert args[1:] == ["-m", "buildenv._precompile", str(venv)]
+        assert kwargs["env"]["BUILDENV_PRECOMPILE"] == "eager"
+        assert kwargs["start_new_session"]
+
+    def test_main(self, venv: Path, monkeypatch: pytest.MonkeyPatch):
+        # Bad arguments
+        assert main([]) == 1
+
+        # Invalid mode
+        monkeypatch.setenv("BUILDENV_PRECOMPILE", "foo")
+        assert main([str(venv)]) == 1
+
+        # Eager
+        monkeypatch.setenv("BUILDENV_PRECOMPILE", "eager")
+        assert main([str(venv)]) == 0
+        assert self.pyc(venv).is_file()
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import os
+import subprocess
+import sys
+import sysconfig
+from pathlib import Path
+
+import pytest
+
+from buildenv._seed import SeedsCache, main, seed_key
+from buildenv._verify import EnvVerifier
+from buildenv.backends.factory import EnvBackendFactory
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestSeed(PreservedEnvHelper):
+    def site_packages(self, venv: Path) -> Path:
+        return Path(sysconfig.get_paths(scheme="posix_prefix", vars={"base": str(venv), "platbase": str(venv)})["purelib"])
+
+    def make_venv(self, venv: Path) -> Path:
+        # Fake venv with pip installed
+        site_packages = self.site_packages(venv)
+        (site_packages / "pip").mkdir(parents=True)
+        (site_packages / "pip" / "__init__.py").write_text("__version__ = '1.0'\n")
+        (site_packages / "pip-1.0.dist-info").mkdir()
+        (site_packages / "pip-1.0.dist-info" / "METADATA").write_text("Name: pip\nVersion: 1.0\n")
+        (venv / "bin").mkdir()
+        (venv / "bin" / "pip").write_text(f"#!{venv}/bin/python\nimport pip\n")
+        script = (venv / "bin" / "pip").read_bytes()
+        digest = base64.urlsafe_b64encode(hashlib.sha256(script).digest()).rstrip(b"=").decode()
+        (site_packages / "pip-1.0.dist-info" / "RECORD").write_text(
+            f"pip/__init__.py,,\npip-1.0.dist-info/METADATA,,\npip-1.0.dist-info/RECORD,,\n../../../bin/pip,sha256={digest},{len(script)}\n"
+        )
+        return venv
+
+    def test_publish_create(self):
+        # Publish seed
+        seeds = SeedsCache(self.test_folder / "seeds")
+        assert seeds.publish(self.make_venv(self.test_folder / "src"))
+        assert seeds.has(seed_key())
+        assert (seeds.root / "seed.py").is_file()
+        assert (seeds.root / seed_key() / "scripts" / "pip").read_text() == "#!python\nimport pip\n"
+
+        # Only once
+        assert not seeds.publish(self.test_folder / "src")
+
+        # Create venv from seed
+        seed_record = (seeds.root / seed_key() / "site-packages" / "pip-1.0.dist-info" / "RECORD").read_text()
+        venv = self.test_folder / "venv"
+        assert seeds.create(venv)
+        assert (venv / "pyvenv.cfg").is_file()
+        site_packages = self.site_packages(venv.resolve())
+        assert (site_packages / "pip" / "__init__.py").read_text() == "__version__ = '1.0'\n"
+        assert (site_packages / "pip-1.0.dist-info" / "RECORD").is_file()
+        assert (venv / "bin" / "pip").read_text() == f"#!{venv.resolve()}/bin/{Path(sys.executable).name}\nimport pip\n"
+        assert os.access(venv / "bin" / "pip", os.X_OK)
+
+        # Generated scripts are verified as sane (while seed RECORD is left untouched)
+        report = EnvVerifier(venv, [str(site_packages)]).verify()
+        assert report.ok and report.files == 1
+        assert (seeds.root / seed_key() / "site-packages" / "pip-1.0.dist-info" / "RECORD").read_text() == seed_record
+
+    def test_no_seed(self):
+        # Nothing to publish without pip
+        seeds = SeedsCache(self.test_folder / "seeds")
+        assert not seeds.publish(self.test_folder / "empty")
+        assert not seeds.has(seed_key())
+
+        # Can't create without seed
+        assert not seeds.create(self.test_folder / "venv")
+        assert not (self.test_folder / "venv").exists()
+
+        # Command line usage
+        assert main([]) == 1
+        assert main(["create", str(self.test_folder / "venv")]) == 1
+
+    def test_cli(self):
+        # Create venv through copied seed module
+        seeds = SeedsCache(self.test_folder / "seeds")
+        seeds.publish(self.make_venv(self.test_folder / "src"))
+        venv = self.test_folder / "venv"
+        cp = subprocess.run([sys.executable, str(seeds.root / "seed.py"), "create", str(venv)], capture_output=True, text=True, check=True)
+        assert cp.stdout == f"[INFO] {venv} created from seeds cache\n"
+        assert (self.site_packages(venv.resolve()) / "pip" / "__init__.py").is_file()
+
+    def test_backend_publish(self, monkeypatch: pytest.MonkeyPatch):
+        # Fake pip project, running from its own venv
+        project = self.test_folder / "project"
+        venv = self.make_venv(project / "venv")
+        monkeypatch.setattr(EnvBackendFactory, "_ENV_BIN", venv / "bin")
+        backend = EnvBackendFactory.create("pip", project, verbose_subprocess=False)
+
+        # Init publishes seed in cache
+        backend.init()
+        assert SeedsCache(Path(os.environ["BUILDENV_CACHE_DIR"]) / "seeds").has(seed_key())
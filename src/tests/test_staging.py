@@ -0,0 +1,98 @@
+import shutil
+import sysconfig
+import venv
+from pathlib import Path
+
+import pytest
+
+import buildenv._staging
+from buildenv._staging import READY_MARKER, exchange_folders, staging_folder
+from buildenv.backends._pip import LegacyPipBackend
+from buildenv.backends.backend import EnvBackend
+from buildenv.backends.factory import EnvBackendFactory
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestStaging(PreservedEnvHelper):
+    @pytest.mark.parametrize("atomic", [True, False])
+    def test_exchange(self, atomic: bool, monkeypatch: pytest.MonkeyPatch):
+        # Two folders to be exchanged (atomically, or not)
+        if not atomic:
+            monkeypatch.setattr(buildenv._staging, "_renameat2_exchange", lambda a, b: False)
+        a, b = self.test_folder / "a", self.test_folder / "b"
+        for folder in (a, b):
+            folder.mkdir()
+            (folder / "name").write_text(folder.name)
+        exchange_folders(a, b)
+        assert (a / "name").read_text() == "b"
+        assert (b / "name").read_text() == "a"
+        assert sorted(p.name for p in self.test_folder.iterdir() if p.name in ("a", "b") or p.name.startswith("a.")) == ["a", "b"]
+
+    @pytest.fixture
+    def backend(self, monkeypatch: pytest.MonkeyPatch) -> EnvBackend:
+        # Real venv (without pip, but with a fake buildenv package) for a fake pip project
+        project = self.test_folder / "project"
+        live = project / "venv"
+        venv.EnvBuilder(symlinks=True).create(live)
+        site_packages = Path(sysconfig.get_paths(scheme="posix_prefix", vars={"base": str(live), "platbase": str(live)})["purelib"])
+        (site_packages / "buildenv").mkdir()
+        (site_packages / "buildenv" / "__init__.py").touch()
+        monkeypatch.setattr(EnvBackendFactory, "_ENV_BIN", live / "bin")
+        monkeypatch.setattr(LegacyPipBackend, "has_pip", lambda _: False)
+        monkeypatch.setattr(LegacyPipBackend, "installed_packages", property(lambda _: {"foo": "1.0"}))
+        return EnvBackendFactory.create("pip", project, verbose_subprocess=False)
+
+    def test_blue_green(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        upgrades: list[list[str] | None] = []
+
+        def fake_upgrade(self: EnvBackend, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> int:
+            # Fake upgrade in current venv: new file + new script + updated lock file
+            upgrades.append(packages)
+            (self.venv_root / "upgraded").touch()
+            (self.venv_root / "bin" / "tool").write_text(f"#!{self.venv_root}/bin/python\n")
+            (self.project_path / "buildenv.lock").write_text("upgraded")
+            return 0
+
+        monkeypatch.setattr(LegacyPipBackend, "_delegate_upgrade", fake_upgrade)
+        live = backend.venv_root
+        staging = staging_folder(live)
+
+        # Prepare a targeted upgrade, then a full one (targeted one is not reused)
+        assert backend.upgrade(prepare=True, packages=["foo"]) == 0
+        assert backend.upgrade(prepare=True) == 0
+        assert upgrades == [["foo"], None]
+
+        # Prepared environment: live lock file is unchanged
+        assert (staging / READY_MARKER).is_file()
+        assert not (backend.project_path / "buildenv.lock").exists()
+        assert (staging / "upgraded").is_file()
+        assert not (live / "upgraded").exists()
+        assert (staging / "bin" / "tool").read_text() == f"#!{live.absolute()}/bin/python\n"
+        assert str(staging) not in (staging / "pyvenv.cfg").read_text()
+
+        # Swap prepared environment in
+        monkeypatch.setattr(LegacyPipBackend, "_delegate_upgrade", lambda *_: pytest.fail("Prepared environment should be reused"))
+        assert backend.upgrade(blue_green=True) == 0
+        self.check_logs(["Reuse upgraded environment prepared in venv.staging folder", "Upgraded environment swapped in"])
+        assert (live / "upgraded").is_file()
+        assert (backend.project_path / "buildenv.lock").read_text() == "upgraded"
+        assert not (live / READY_MARKER).exists()
+        assert not staging.exists()
+
+    def test_blue_green_failure(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        def broken_upgrade(self: EnvBackend, full: bool = True, only_deps: bool = False, packages: list[str] | None = None) -> int:
+            # Upgrade breaks buildenv
+            for package in self.venv_root.glob("lib/python*/site-packages/buildenv"):
+                shutil.rmtree(package)
+            (self.project_path / "buildenv.lock").write_text("upgraded")
+            return 0
+
+        monkeypatch.setattr(LegacyPipBackend, "_delegate_upgrade", broken_upgrade)
+
+        # Validation fails: live environment is unchanged
+        assert backend.upgrade(blue_green=True) != 0
+        self.check_logs("Upgrade failed in staging environment; live environment is left unchanged")
+        assert list(backend.venv_root.glob("lib/python*/site-packages/buildenv/__init__.py"))
+        assert not (backend.project_path / "buildenv.lock").exists()
+        assert not staging_folder(backend.venv_root).exists()
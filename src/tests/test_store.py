@@ -0,0 +1,171 @@
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from buildenv._store import STORED_MARKER, VenvStore, link_tree, main, python_tag, relocate_tree, store_key
+from buildenv._verify import EnvVerifier
+from buildenv.backends.factory import EnvBackendFactory
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestStore(PreservedEnvHelper):
+    @pytest.fixture
+    def store(self) -> Path:
+        # Store root folder, enabled through environment
+        store = self.test_folder / "store"
+        store.mkdir()
+        os.environ["BUILDENV_STORE"] = str(store)
+        return store
+
+    def make_venv(self, project: Path) -> Path:
+        # Fake project venv, with some absolute paths
+        venv = project / "venv"
+        (venv / "bin").mkdir(parents=True)
+        (venv / "lib").mkdir()
+        (venv / "pyvenv.cfg").write_text(f"home = /usr/bin\ncommand = /usr/bin/python3 -m venv {venv}\n")
+        (venv / "bin" / "buildenv").write_text(f"#!{venv}/bin/python\nimport buildenv\n")
+        (venv / "bin" / "buildenv").chmod(0o755)
+        (venv / "bin" / "python").symlink_to("/usr/bin/python3")
+        (venv / "bin" / "self").symlink_to(venv / "bin" / "buildenv")
+        (venv / "lib" / "module.py").write_text(f"# {venv} is not fixed up here\n")
+        (venv / "lib" / "project.pth").write_text(f"{project}/src\n")
+        dist_info = venv / "lib" / "python3" / "site-packages" / "buildenv-1.0.dist-info"
+        dist_info.mkdir(parents=True)
+        (dist_info / "METADATA").write_text("Name: buildenv\nVersion: 1.0\n")
+        script = (venv / "bin" / "buildenv").read_bytes()
+        digest = base64.urlsafe_b64encode(hashlib.sha256(script).digest()).rstrip(b"=").decode()
+        (dist_info / "RECORD").write_text(f"../../../bin/buildenv,sha256={digest},{len(script)}\nbuildenv-1.0.dist-info/RECORD,,\n")
+        (project / "requirements.lock").write_text("foo==1.0\n")
+        return venv
+
+    def test_link_tree(self):
+        # Clone a venv with fix-up
+        src = self.make_venv(self.test_folder / "src")
+        dst_project = self.test_folder / "dst"
+        size = link_tree(src, dst_project / "venv", src.parent, dst_project)
+        dst = dst_project / "venv"
+
+        # Check fixed up files
+        assert size > 0
+        assert (dst / "pyvenv.cfg").read_text().endswith(f"-m venv {dst}\n")
+        assert (dst / "bin" / "buildenv").read_text().startswith(f"#!{dst}/bin/python\n")
+        assert os.access(dst / "bin" / "buildenv", os.X_OK)
+        assert (dst / "lib" / "project.pth").read_text() == f"{dst_project}/src\n"
+        assert os.readlink(dst / "bin" / "python") == "/usr/bin/python3"
+        assert os.readlink(dst / "bin" / "self") == str(dst / "bin" / "buildenv")
+
+        # Other files are linked (or copied) as is
+        assert (dst / "lib" / "module.py").read_text() == f"# {src} is not fixed up here\n"
+
+    def test_link_tree_boundaries(self):
+        # Paths sharing a prefix with the root folder (but not a whole path component) are not fixed up
+        src = self.make_venv(self.test_folder / "src")
+        (src / "bin" / "other").write_text(f"{src.parent}def/bin\n{src.parent}.bak\n{src.parent}\n'{src.parent}'\n")
+        (src / "bin" / "sibling").symlink_to(f"{src.parent}def/bin")
+        dst_project = self.test_folder / "dst"
+        link_tree(src, dst_project / "venv", src.parent, dst_project)
+        dst = dst_project / "venv"
+        assert (dst / "bin" / "other").read_text() == f"{src.parent}def/bin\n{src.parent}.bak\n{dst_project}\n'{dst_project}'\n"
+        assert os.readlink(dst / "bin" / "sibling") == f"{src.parent}def/bin"
+
+        # Root folder extended with a suffix (e.g. staging copy) is fixed up once
+        staging = src.with_name(f"{src.name}.staging")
+        link_tree(src, staging, src, staging)
+        assert (staging / "bin" / "buildenv").read_text().startswith(f"#!{staging}/bin/python\n")
+
+        # Fixed up scripts are still verified as sane, in both trees
+        for venv in (src, dst):
+            report = EnvVerifier(venv, [str(venv / "lib" / "python3" / "site-packages")]).verify()
+            assert report.ok and report.files == 1
+
+        # Same after relocation in place
+        relocate_tree(dst, dst_project, self.test_folder / "moved")
+        assert (dst / "bin" / "buildenv").read_text().startswith(f"#!{self.test_folder / 'moved'}/venv/bin/python\n")
+        assert EnvVerifier(dst, [str(dst / "lib" / "python3" / "site-packages")]).verify().ok
+        assert EnvVerifier(src, [str(src / "lib" / "python3" / "site-packages")]).verify().ok
+
+    def test_publish_clone(self, store: Path):
+        # Publish a venv
+        src = self.make_venv(self.test_folder / "src")
+        (src / ".buildenv_projects" / "abc").mkdir(parents=True)
+        (src / ".buildenv_projects" / "abc" / ".buildenv_extensions.json").write_text("{}")
+        (src / ".buildenv_timings.json").write_text("{}")
+        key = store_key("pip", [src.parent / "requirements.lock"], python_tag(src))
+        VenvStore(store).publish(key, src, "pip")
+        assert (src / STORED_MARKER).read_text() == key
+        assert json.loads((store / key / "meta.json").read_text())["root"] == str(src.parent)
+        assert (store / "store.py").is_file()
+
+        # Projects specific state is not published
+        assert (store / key / "venv" / "pyvenv.cfg").is_file()
+        assert not (store / key / "venv" / ".buildenv_projects").exists()
+        assert not (store / key / "venv" / ".buildenv_timings.json").exists()
+
+        # Clone it in another project (through command line entry point)
+        dst_project = self.test_folder / "dst"
+        dst_project.mkdir()
+        (dst_project / "requirements.lock").write_text("foo==1.0\n")
+        assert main(["clone", "pip", str(dst_project / "venv"), str(dst_project / "requirements.lock")]) == 0
+        assert (dst_project / "venv" / "bin" / "buildenv").read_text().startswith(f"#!{dst_project}/venv/bin/python\n")
+        assert (dst_project / "venv" / STORED_MARKER).read_text() == key
+
+        # Different lock: not cloned
+        (dst_project / "requirements.lock").write_text("foo==2.0\n")
+        assert main(["clone", "pip", str(dst_project / "other"), str(dst_project / "requirements.lock")]) == 1
+        assert not (dst_project / "other").exists()
+
+    def test_python_tag(self, store: Path):
+        # Python tag read from venv config (uv or venv module format), or from running interpreter
+        src = self.make_venv(self.test_folder / "src")
+        running = f"{sys.implementation.name}-{sys.version_info.major}.{sys.version_info.minor}-{sys.platform}"
+        assert python_tag() == running
+        assert python_tag(src) == running
+        (src / "pyvenv.cfg").write_text("home = /usr/bin\nversion = 3.99.2\n")
+        assert python_tag(src) == f"{sys.implementation.name}-3.99-{sys.platform}"
+        (src / "pyvenv.cfg").write_text("home = /usr/bin\nimplementation = CPython\nversion_info = 3.98.1\n")
+        assert python_tag(src) == f"cpython-3.98-{sys.platform}"
+
+        # Venv published for another interpreter: not cloned with the running one
+        VenvStore(store).publish(store_key("pip", [src.parent / "requirements.lock"], python_tag(src)), src, "pip")
+        assert main(["clone", "pip", str(self.test_folder / "dst"), str(src.parent / "requirements.lock")]) == 1
+
+    def test_disabled(self):
+        # Store is disabled without environment variable
+        os.environ.pop("BUILDENV_STORE", None)
+        assert main(["clone", "pip", "venv", "requirements.lock"]) == 1
+
+    def test_trim(self, store: Path):
+        # Fake entries
+        now = time.time()
+        for key, age, size in [("recent", 0, 3), ("older", 10, 3), ("oldest", 20, 3), ("outdated", 100 * 86400, 1)]:
+            (store / key).mkdir()
+            (store / key / "meta.json").write_text(json.dumps({"size": size}))
+            (store / key / "last_used").touch()
+            os.utime(store / key / "last_used", (now - age, now - age))
+
+        # Trim: outdated entry is evicted, then least recently used one to fit in size
+        VenvStore(store).trim(max_size=7, max_age=30 * 86400)
+        assert sorted(p.name for p in store.iterdir()) == ["older", "recent"]
+
+    def test_backend_publish(self, store: Path, monkeypatch: pytest.MonkeyPatch):
+        # Fake locked pip project, running from its own venv
+        project = self.test_folder / "project"
+        venv = self.make_venv(project)
+        (project / "buildenv.lock").touch()
+        monkeypatch.setattr(EnvBackendFactory, "_ENV_BIN", venv / "bin")
+        backend = EnvBackendFactory.create("pip", project, verbose_subprocess=False)
+
+        # Init publishes venv (only once)
+        backend.init()
+        key = store_key("pip", [project / "requirements.lock"], python_tag(venv))
+        assert (store / key / "venv" / "lib" / "module.py").is_file()
+        self.check_logs("Publishing venv to shared venv store...")
+        backend.init()
+        assert len(list(store.glob("*/meta.json"))) == 1
@@ -1,11 +1,14 @@
 import importlib.metadata
 import logging
+from argparse import Namespace
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any
 
 import pytest
 
 from buildenv.__main__ import buildenv
+from buildenv._parser import _complete_templates
 from buildenv.extension import BuildEnvProjectTemplate, BuildEnvRenderer
 from tests.commons2 import WithUvxVenv
 
@@ -161,3 +164,65 @@ class TestSameWeightedExtension(WithExtensionTest):
         assert rc == 0
         assert (self.test_folder / "my_yet_other_template.txt").is_file()
         assert not (self.test_folder / ".gitattributes").exists()
+
+
+# Fake entry point class with distribution, counting loads
+class CountingEntryPoint:
+    loads: list[str] = []
+
+    def __init__(self, name: str, template_class: type[BuildEnvProjectTemplate]):
+        self.name = name
+        self.value = f"fake_module:{template_class.__name__}"
+        self.dist = SimpleNamespace(name="fake-dist", version="1.0")
+        self.template_class = template_class
+
+    def load(self):
+        CountingEntryPoint.loads.append(self.name)
+        return self.template_class
+
+
+class TestTemplatesManifests(WithExtensionTest):
+    @pytest.fixture
+    def entry_points(self) -> list[Any]:
+        CountingEntryPoint.loads.clear()
+        return [CountingEntryPoint("my_other_template", WeightedFakeTemplate), CountingEntryPoint("my_template", FakeTemplate)]
+
+    def test_cached_manifests(self):
+        # First listing loads all templates, next ones use cached manifests (for the same project)
+        assert buildenv(["install", "--project", str(self.test_folder), "--list-templates"]) == 0
+        assert sorted(CountingEntryPoint.loads) == ["my_other_template", "my_template"]
+        assert buildenv(["install", "--project", str(self.test_folder), "--list-templates"]) == 0
+        assert len(CountingEntryPoint.loads) == 2
+        self.check_logs(["Available project templates", " - my_other_template ** ", " - my_template       *  "])
+
+        # Completion doesn't load anything either
+        assert _complete_templates("my_o", Namespace(project_folder=self.test_folder)) == ["my_other_template"]
+        assert len(CountingEntryPoint.loads) == 2
+
+        # Install only loads selected templates
+        CountingEntryPoint.loads.clear()
+        assert buildenv(["install", "--project", str(self.test_folder), "--ignore-template", "my_template"]) == 0
+        assert CountingEntryPoint.loads == ["my_other_template"]
+        assert (self.test_folder / "my_other_template.txt").is_file()
+
+    def test_cached_manifests_shared(self):
+        # Manifests are cached once for all projects
+        other_project = self.test_folder / "other"
+        other_project.mkdir()
+        assert _complete_templates("my_o", Namespace(project_folder=self.test_folder)) == ["my_other_template"]
+        assert len(CountingEntryPoint.loads) == 2
+        assert _complete_templates("my_o", Namespace(project_folder=other_project)) == ["my_other_template"]
+        assert len(CountingEntryPoint.loads) == 2
+
+    def test_failed_load_not_cached(self, entry_points: list[Any]):
+        # Template failing to load: manifests are not cached
+        template_class = entry_points[0].template_class
+        entry_points[0].template_class = None
+        assert buildenv(["install", "--list-templates"]) == 1
+        self.check_logs("Failed to load my_other_template extension")
+
+        # Next listing loads templates again
+        entry_points[0].template_class = template_class
+        CountingEntryPoint.loads.clear()
+        assert buildenv(["install", "--list-templates"]) == 0
+        assert sorted(CountingEntryPoint.loads) == ["my_other_template", "my_template"]
@@ -1,8 +1,17 @@
+import asyncio
+import os
 import platform
+import subprocess
+from pathlib import Path
 
 import pytest
+from jinja2 import Environment, FileSystemLoader
 
-from buildenv._utils import is_windows, run_subprocess
+from buildenv import aio
+from buildenv._renderers.factory import RendererFactory, RenderingAdapter
+from buildenv._renderers.git import GitIndexBatch
+from buildenv._utils import find_git_root, is_windows, run_subprocess
+from buildenv.extension import BuildEnvRenderItem
 from tests.commons2 import PreservedEnvHelper
 
 
@@ -18,3 +27,104 @@ class TestUtils(PreservedEnvHelper):
     def test_subprocess_error_check(self):
         with pytest.raises(RuntimeError, match="command returned 123"):
             run_subprocess(["python", "-c", "import sys; sys.exit(123)"])
+
+    def test_async_subprocess(self):
+        # Captured output
+        cp = asyncio.run(aio.run_subprocess(["python", "-c", "print('hello')"]))
+        assert cp.returncode == 0
+        assert cp.stdout == "hello\n"
+        self.check_logs("hello")
+
+        # Errors
+        cp = asyncio.run(aio.run_subprocess(["python", "-c", "import sys; sys.exit(123)"], check=False, error_msg="Expected error message"))
+        assert cp.returncode == 123
+        self.check_logs("Expected error message")
+        with pytest.raises(RuntimeError, match="command returned 123"):
+            asyncio.run(aio.run_subprocess(["python", "-c", "import sys; sys.exit(123)"]))
+        with pytest.raises(subprocess.CalledProcessError):
+            asyncio.run(aio.run_subprocess(["python", "-c", "import sys; sys.exit(123)"], verbose=True))
+
+    def test_find_git_root(self):
+        # Fake git layouts
+        repo = self.test_folder / "repo"
+        (repo / ".git").mkdir(parents=True)
+        (repo / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+        worktree = repo / "sub" / "worktree"
+        worktree.mkdir(parents=True)
+        (worktree / ".git").write_text("gitdir: ../../.git/worktrees/worktree\n")
+        find_git_root.cache_clear()
+
+        # Walk up from sub-folders
+        assert find_git_root(repo / "sub") == repo.resolve()
+        assert find_git_root(worktree) == worktree.resolve()
+        assert find_git_root(Path("/")) is None
+
+        # Explicit git folder and work tree
+        os.environ["GIT_DIR"] = str(repo / ".git")
+        os.environ["GIT_WORK_TREE"] = str(repo / "sub")
+        find_git_root.cache_clear()
+        assert find_git_root(worktree) == (repo / "sub").resolve()
+        assert find_git_root(self.test_folder) is None
+        find_git_root.cache_clear()
+
+    def test_git_index_batch(self):
+        # Prepare git repository with some scripts
+        project = self.test_folder / "project"
+        project.mkdir()
+        run_subprocess(["git", "init"], cwd=project)
+        for name in ("a.sh", "b.sh"):
+            (project / name).write_text("echo hello\n")
+
+        # Flush batch, including a missing file
+        with GitIndexBatch(project) as git_index:
+            git_index.add(Path("a.sh"))
+            git_index.add(Path("missing.sh"))
+            git_index.add(Path("b.sh"))
+
+        # Valid files are added, and errors are reported per file
+        cp = run_subprocess(["git", "ls-files", "-s"], cwd=project)
+        assert sorted(line.split()[0] + " " + line.split()[-1] for line in cp.stdout.splitlines()) == ["100755 a.sh", "100755 b.sh"]
+        self.check_logs(["Failed to add missing.sh to git index", "Failed to set executable flag for missing.sh in git index"])
+
+    def test_render_many(self):
+        # Prepare git repository, and templates (including a large one)
+        project = self.test_folder / "project"
+        project.mkdir()
+        run_subprocess(["git", "init"], cwd=project)
+        templates = self.test_folder / "templates"
+        templates.mkdir()
+        (templates / "script.sh.jinja").write_text("{{header}}echo {{name}}\n")
+        (templates / "big.txt.jinja").write_text("{% for i in range(100000) %}line {{i}} for {{name}}\n{% endfor %}")
+        environment = Environment(loader=FileSystemLoader(templates))
+
+        # Render a batch of files
+        items = [BuildEnvRenderItem("script.sh.jinja", True, {"name": f"script{i}"}, f"scripts/{i}") for i in range(20)]
+        items.append(BuildEnvRenderItem("big.txt.jinja", keywords={"name": "big"}))
+        RenderingAdapter(project, "uv", project).render_many(environment, items)
+        assert (project / "scripts" / "7" / "script.sh").read_text() == "#!/usr/bin/bash\necho script7"
+        assert (project / "big.txt").read_text().splitlines()[-1] == "line 99999 for big"
+        assert os.access(project / "scripts" / "7" / "script.sh", os.X_OK)
+        cp = run_subprocess(["git", "ls-files", "-s"], cwd=project)
+        assert len([line for line in cp.stdout.splitlines() if line.startswith("100755 ")]) == 20
+
+        # Render again: unchanged files are not rewritten, changed ones are replaced
+        big_mtime = (project / "big.txt").stat().st_mtime_ns
+        items[0] = BuildEnvRenderItem("script.sh.jinja", True, {"name": "updated"}, "scripts/0")
+        RenderingAdapter(project, "uv", project).render_many(environment, items)
+        assert (project / "big.txt").stat().st_mtime_ns == big_mtime
+        assert (project / "scripts" / "0" / "script.sh").read_text() == "#!/usr/bin/bash\necho updated"
+        assert os.access(project / "scripts" / "0" / "script.sh", os.X_OK)
+        assert not list(project.rglob("*.tmp"))
+
+        # Render again after removing files from git index: unchanged scripts are added again
+        run_subprocess(["git", "rm", "-q", "-r", "--cached", "scripts"], cwd=project)
+        RenderingAdapter(project, "uv", project).render_many(environment, items)
+        cp = run_subprocess(["git", "ls-files", "-s"], cwd=project)
+        assert len([line for line in cp.stdout.splitlines() if line.startswith("100755 ")]) == 20
+
+        # Dry-run streamed rendering only computes status
+        renderer = RendererFactory.create(Path("big.txt.jinja"), "uv", environment)
+        assert renderer.render(project / "big.txt", keywords={"name": "big"}, dry_run=True, stream=True) == "unchanged"
+        assert renderer.render(project / "big.txt", keywords={"name": "other"}, dry_run=True, stream=True) == "changed"
+        assert renderer.render(project / "new.txt", keywords={"name": "big"}, dry_run=True, stream=True) == "created"
+        assert not (project / "new.txt").exists()
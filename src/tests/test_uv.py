@@ -57,6 +57,45 @@ class TestUvBash(WithUv, WithBash):
         # Check command arguments
         assert install_cmd_args == ["uv", "add", "--dev", "requests"]
 
+    def test_upgrade_dry_run(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        cmd_args: list[str] = []
+
+        def fake_run(args: list[str], **kwargs: dict[str, str]):
+            # Remember command arguments, and fake lock changes report
+            nonlocal cmd_args
+            cmd_args = args
+            stderr = "Resolved 3 packages in 1ms\nUpdate foo v1.0 -> v2.0\nAdd bar v1.0\nRemove baz v0.1\nWould update lockfile\n"
+            return subprocess.CompletedProcess[str](args, 0, stdout="", stderr=stderr)
+
+        # Mock subprocess.run + installed packages
+        monkeypatch.setattr(subprocess, "run", fake_run)
+        monkeypatch.setattr(UvProjectBackend, "installed_packages", property(lambda _: {"Foo": "1.0", "baz": "0.1"}))
+
+        # Dry-run upgrade is resolved with uv lock
+        assert backend.upgrade(dry_run=True) == 0
+        assert cmd_args == ["uv", "lock", "--dry-run", "--upgrade"]
+        self.check_logs(["Foo     updated (from 1.0 to 2.0)", "bar     added (1.0)", "baz     removed (was 0.1)"])
+
+        # Targeted dry-run upgrade
+        assert backend.upgrade(dry_run=True, packages=["foo"]) == 0
+        assert cmd_args == ["uv", "lock", "--dry-run", "--upgrade-package", "foo"]
+
+    def test_targeted_upgrade(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        cmd_args: list[str] = []
+
+        def fake_run(args: list[str], **kwargs: dict[str, str]):
+            # Remember command arguments
+            nonlocal cmd_args
+            cmd_args = args
+            return subprocess.CompletedProcess[str](args, 0, stdout="", stderr="")
+
+        # Mock subprocess.run
+        monkeypatch.setattr(subprocess, "run", fake_run)
+
+        # Only listed packages are re-resolved
+        assert backend.upgrade(packages=["foo", "bar"]) == 0
+        assert cmd_args == ["uv", "sync", "--upgrade-package", "foo", "--upgrade-package", "bar"]
+
 
 class TestUvCmd(WithUv, WithCmd):
     def test_uv_backend(self, backend: EnvBackend):
@@ -1,3 +1,9 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
 from buildenv._shells.bash import BashShell
 from buildenv._shells.cmd import CmdShell
 from buildenv.backends._uv import EnvBackend, UvxBackend
@@ -10,6 +16,32 @@ class TestUvxBash(WithUvx, WithBash):
         assert isinstance(backend, UvxBackend)
         assert isinstance(backend.shell_instance, BashShell)
 
+    def test_upgrade_dry_run(self, backend: EnvBackend, monkeypatch: pytest.MonkeyPatch):
+        cmd_args: list[str] = []
+
+        def fake_run(args: list[str], **kwargs: dict[str, str]):
+            # Remember command arguments, and fake compiled requirements
+            nonlocal cmd_args
+            cmd_args = args
+            Path(args[args.index("--output-file") + 1]).write_text("foo==2.0\n")
+            return subprocess.CompletedProcess[str](args, 0, stdout="", stderr="")
+
+        # Mock subprocess.run + installed packages
+        monkeypatch.setattr(subprocess, "run", fake_run)
+        monkeypatch.setattr(UvxBackend, "installed_packages", property(lambda _: {"foo": "1.0"}))
+
+        # Dry-run upgrade is resolved with uv (without spawning any shell)
+        assert backend.upgrade(dry_run=True) == 0
+        assert cmd_args[:5] == ["uv", "pip", "compile", "--python-version", f"{sys.version_info.major}.{sys.version_info.minor}"]
+        assert "--upgrade" in cmd_args
+        self.check_logs("foo     updated (from 1.0 to 2.0)")
+
+        # Targeted upgrade only refreshes listed packages
+        assert backend.upgrade(dry_run=True, packages=["foo"]) == 0
+        assert cmd_args[5:7] == ["--refresh-package", "foo"]
+        assert cmd_args[-2:] == ["--upgrade-package", "foo"]
+        assert backend._backend_upgrade_env(["foo", "bar"]) == ("BUILDENV_UVX_ARGS", "--refresh-package foo --refresh-package bar")  # pyright: ignore[reportAttributeAccessIssue]
+
 
 class TestUvxCmd(WithUvx, WithCmd):
     def test_uvx_backend(self, backend: EnvBackend):
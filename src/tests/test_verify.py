@@ -0,0 +1,72 @@
+import base64
+import functools
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+
+import buildenv.backends.backend as backend_module
+from buildenv._verify import EnvVerifier
+from buildenv.backends.factory import EnvBackendFactory
+
+from .commons2 import PreservedEnvHelper
+
+
+class TestVerify(PreservedEnvHelper):
+    @pytest.fixture
+    def site_packages(self) -> Path:
+        # Fake installed distribution, with a large file (to be memory mapped)
+        site_packages = self.test_folder / "site-packages"
+        files = {"foo/__init__.py": b"X = 1\n", "foo/data.bin": b"\x01" * (2 * 1024 * 1024), "foo-1.0.dist-info/METADATA": b"Name: foo\nVersion: 1.0\n"}
+        record = ""
+        for name, content in files.items():
+            (site_packages / name).parent.mkdir(parents=True, exist_ok=True)
+            (site_packages / name).write_bytes(content)
+            digest = base64.urlsafe_b64encode(hashlib.sha256(content).digest()).rstrip(b"=").decode()
+            record += f"{name},sha256={digest},{len(content)}\n"
+        (site_packages / "foo-1.0.dist-info" / "RECORD").write_text(record + "foo-1.0.dist-info/RECORD,,\nfoo/__pycache__/__init__.cpython.pyc,,\n")
+        return site_packages
+
+    def test_verify(self, site_packages: Path):
+        venv = self.test_folder / "venv"
+        venv.mkdir()
+
+        # Sane environment
+        report = EnvVerifier(venv, [str(site_packages)]).verify()
+        assert report.ok
+        assert (report.distributions, report.files, report.rehashed) == (1, 3, 3)
+
+        # Incremental verification: unchanged files are not rehashed
+        (site_packages / "foo" / "__init__.py").write_bytes(b"X = 2\n")
+        report = EnvVerifier(venv, [str(site_packages)]).verify()
+        assert (report.files, report.rehashed) == (3, 1)
+        assert report.modified == [{"distribution": "foo", "path": "foo/__init__.py", "reason": "hash"}]
+
+        # Missing + truncated files
+        (site_packages / "foo" / "__init__.py").unlink()
+        (site_packages / "foo" / "data.bin").write_bytes(b"\x01")
+        report = EnvVerifier(venv, [str(site_packages)]).verify()
+        assert not report.ok
+        assert report.missing == [{"distribution": "foo", "path": "foo/__init__.py"}]
+        assert report.modified == [{"distribution": "foo", "path": "foo/data.bin", "reason": "size"}]
+        assert json.loads(report.to_json())["missing"] == report.missing
+
+    def test_backend_verify(self, site_packages: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]):
+        # Fake project venv, verifying fake distributions
+        venv = self.test_folder / "project" / "venv"
+        (venv / "bin").mkdir(parents=True)
+        monkeypatch.setattr(EnvBackendFactory, "_ENV_BIN", venv / "bin")
+        monkeypatch.setattr(backend_module, "EnvVerifier", functools.partial(EnvVerifier, path=[str(site_packages)]))
+        backend = EnvBackendFactory.create("pip", venv.parent, verbose_subprocess=False)
+
+        # Report to stdout
+        assert backend.verify() == 0
+        assert json.loads(capsys.readouterr().out)["files"] == 3
+
+        # Report to file
+        (site_packages / "foo" / "__init__.py").unlink()
+        output = self.test_folder / "report.json"
+        assert backend.verify(output) == 1
+        assert json.loads(output.read_text())["missing"] == [{"distribution": "foo", "path": "foo/__init__.py"}]
+        self.check_logs("Verified 3 files of 1 packages (0 rehashed): 1 missing, 0 modified")